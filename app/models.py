@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, ForeignKey, DECIMAL, Date, CheckConstraint, Boolean, UniqueConstraint, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, ForeignKey, DECIMAL, Date, CheckConstraint, Boolean, UniqueConstraint, Float, Index, event, inspect, update, case
+from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.sql import func
 from core.database import Base
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, LargeBinary
 from datetime import datetime
 
 
@@ -23,6 +23,8 @@ class User(Base):
     is_active = Column(Boolean, default=False, nullable=False)
 
     role = Column(String(20), nullable=False, default="buyer")
+    # Bumped on role change or password reset; access tokens carry it in the "ver" claim
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP, server_default=func.now())
 
     product = relationship("Product", back_populates="seller", cascade="all, delete", lazy="dynamic")
@@ -66,11 +68,22 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.category_id", ondelete="SET NULL"), nullable=True)
     seller_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     brand = Column(String(100))
+    sku = Column(String(64), nullable=True)  # Seller's own stock keeping unit, used as the bulk import key
     status = Column(String, default='draft', nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     currency_code = Column(String(3), ForeignKey('currencies.code'), nullable=True)
 
+    # Rating aggregates, maintained incrementally by the Review mapper events below
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_avg = Column(Float, nullable=False, default=0, server_default="0")
+    rating_1_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     currency = relationship('Currency', back_populates='products')
     category = relationship("Category", back_populates="product")
     seller = relationship("User", back_populates="product")
@@ -86,6 +99,9 @@ class Product(Base):
     
     __table_args__ = (
         CheckConstraint("status IN ('draft', 'published')", name="check_product_status"),
+        Index("ix_products_status_rating", "status", "rating_avg", "rating_count"),
+        Index("ix_products_seller_status_updated", "seller_id", "status", "updated_at"),
+        UniqueConstraint("seller_id", "sku", name="uq_products_seller_sku"),
     )
     
 
@@ -114,8 +130,10 @@ class Order(Base):
     user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     total_amount = Column(DECIMAL(10, 2), nullable=False)
     
-    order_status = Column(String(20), nullable=False, default="pending")
-    order_payment_status = Column(String(20), nullable=False, default="pending")
+    # active_history keeps the committed value in the attribute history even when
+    # the order was expired by a commit, so the sales rollups can see the transition
+    order_status = column_property(Column(String(20), nullable=False, default="pending"), active_history=True)
+    order_payment_status = column_property(Column(String(20), nullable=False, default="pending"), active_history=True)
 
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -131,6 +149,7 @@ class Order(Base):
     __table_args__ = (
         CheckConstraint("order_status IN ('pending', 'shipped', 'delivered', 'cancelled', 'returned')", name="check_order_status"),
         CheckConstraint("order_payment_status IN ('pending', 'completed', 'failed')", name="check_order_payment_status"),
+        Index("ix_orders_user_order", "user_id", "order_id"),
     )
 
 
@@ -142,7 +161,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     order_item_id = Column(Integer, primary_key=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey("orders.order_id", ondelete="CASCADE"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.order_id", ondelete="CASCADE"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(DECIMAL(10, 2), nullable=False)
@@ -186,7 +205,7 @@ class Shipping(Base):
     __tablename__ = "shipping"
 
     shipping_id = Column(Integer, primary_key=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey("orders.order_id", ondelete="CASCADE"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.order_id", ondelete="CASCADE"), nullable=False, index=True)
     tracking_number = Column(String(100), unique=True, nullable=True)
     carrier = Column(String(100), nullable=True)
     estimated_delivery_date = Column(Date, nullable=True)
@@ -216,7 +235,12 @@ class Review(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
 
     # Constraints
-    __table_args__ = (CheckConstraint("rating BETWEEN 1 AND 5", name="rating_check"),)
+    __table_args__ = (
+        CheckConstraint("rating BETWEEN 1 AND 5", name="rating_check"),
+        UniqueConstraint("product_id", "user_id", name="uq_reviews_product_user"),
+        Index("ix_reviews_product_created", "product_id", "created_at", "review_id"),
+        Index("ix_reviews_product_rating_created", "product_id", "rating", "created_at", "review_id"),
+    )
 
     # Relationships
     user = relationship("User", back_populates="reviews")
@@ -234,6 +258,10 @@ class Wishlist(Base):
     product_id = Column(Integer, ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "product_id", name="uq_wishlist_user_product"),
+    )
+
     # Relationships
     user = relationship("User", back_populates="wishlists")
     product = relationship("Product", back_populates="wishlists")
@@ -308,10 +336,10 @@ class ProductReport(Base):
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
 
-    token = Column(String, primary_key=True, index=True)  # Unique reset token
+    token_digest = Column(LargeBinary(32), primary_key=True)  # SHA-256 of the reset token; the token itself is not stored
     email = Column(String, index=True)  # Associated email
     is_used = Column(Boolean, default=False)  # Check if token is used
-    created_at = Column(DateTime, default=datetime.utcnow)  # Timestamp
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # Timestamp; the purge job scans by it
 
 
 class VerificationToken(Base):
@@ -320,14 +348,86 @@ class VerificationToken(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
     
-    token = Column(String, unique=True, index=True, nullable=False)
+    token_digest = Column(LargeBinary(32), unique=True, index=True, nullable=False)  # SHA-256 of the emailed token
     email = Column(String, index=True, nullable=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(DateTime, default=func.now(), index=True)
     
     user = relationship("User", back_populates="verification_tokens")
 
 
+class RefreshToken(Base):
+    """
+    One row per issued refresh token. Tokens from the same login share a
+    family_id; each refresh marks the presented token used and issues the
+    next one in the family, so presenting a used token again means it leaked.
+    """
+    __tablename__ = "refresh_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by = Column(String(32), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ScheduledJob(Base):
+    """State of a periodic job, shared by every worker; the lease makes sure only one runs it."""
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String(100), primary_key=True)
+    interval_seconds = Column(Integer, nullable=False)
+    next_run_at = Column(DateTime, nullable=False)
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_started_at = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    last_status = Column(String(20), nullable=True)
+    last_error = Column(Text, nullable=True)
+    run_count = Column(Integer, nullable=False, default=0)
+
+
+class QueuedJob(Base):
+    """A one-off job. Enqueued in the caller's transaction, so it only runs if that commits."""
+    __tablename__ = "queued_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=True)  # JSON keyword arguments
+    status = Column(String(20), nullable=False, default="pending")
+    run_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'running', 'done', 'failed')", name="check_queued_job_status"),
+        # Claim scans: due pending jobs, and running jobs whose lease ran out
+        Index("ix_queued_jobs_status_run_at", "status", "run_at"),
+    )
+
+
+class RequestAccessStat(Base):
+    """How often a cacheable request was served, summed over workers; drives the startup cache warm-up."""
+    __tablename__ = "request_access_stats"
+
+    kind = Column(String(30), primary_key=True)  # product_detail or product_listing
+    key = Column(String(500), primary_key=True)  # product ID, or the normalized listing query string
+    hits = Column(Integer, nullable=False, default=0)
+    last_seen_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_request_access_stats_kind_hits", "kind", "hits"),
+    )
+
+
 class ProductImages(Base):
     __tablename__ = "product_images"
 
@@ -353,3 +453,82 @@ class Currency(Base):
     products = relationship('Product', back_populates='currency')
 
 
+class SellerDailySales(Base):
+    __tablename__ = "seller_daily_sales"
+
+    seller_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    revenue = Column(DECIMAL(12, 2), nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SellerDailySales {self.seller_id} {self.day} (${self.revenue})>"
+
+
+class ProductDailySales(Base):
+    __tablename__ = "product_daily_sales"
+
+    product_id = Column(Integer, ForeignKey("products.product_id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    seller_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    revenue = Column(DECIMAL(12, 2), nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_product_daily_sales_seller_day", "seller_id", "day"),
+    )
+
+    def __repr__(self):
+        return f"<ProductDailySales {self.product_id} {self.day} (${self.revenue})>"
+
+
+def _apply_rating_delta(connection, product_id: int, rating: int, sign: int):
+    """
+    Adds (sign=1) or removes (sign=-1) a single rating from the product's aggregates
+    with one UPDATE, so no runtime aggregate over reviews is ever needed.
+    updated_at is set to itself so its onupdate does not fire: a review is not a
+    product edit, and the merchant grid pages on updated_at.
+    """
+    products = Product.__table__
+    new_count = products.c.rating_count + sign
+    new_sum = products.c.rating_sum + sign * rating
+    histogram_column = products.c[f"rating_{rating}_count"]
+
+    connection.execute(
+        update(products)
+        .where(products.c.product_id == product_id)
+        .values({
+            products.c.rating_count: new_count,
+            products.c.rating_sum: new_sum,
+            products.c.rating_avg: case((new_count > 0, new_sum * 1.0 / new_count), else_=0),
+            histogram_column: histogram_column + sign,
+            products.c.updated_at: products.c.updated_at,
+        })
+    )
+
+
+@event.listens_for(Review, "after_insert")
+def _review_inserted(mapper, connection, target):
+    _apply_rating_delta(connection, target.product_id, target.rating, 1)
+
+
+@event.listens_for(Review, "after_delete")
+def _review_deleted(mapper, connection, target):
+    _apply_rating_delta(connection, target.product_id, target.rating, -1)
+
+
+@event.listens_for(Review, "after_update")
+def _review_updated(mapper, connection, target):
+    history = inspect(target).attrs.rating.history
+    if not history.has_changes() or not history.deleted:
+        return
+
+    old_rating = history.deleted[0]
+    _apply_rating_delta(connection, target.product_id, old_rating, -1)
+    _apply_rating_delta(connection, target.product_id, target.rating, 1)
+
+
+# Registers the Session listener that keeps the daily sales rollups in sync with orders
+from app.services import sales_rollups  # noqa: E402,F401
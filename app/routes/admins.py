@@ -1,14 +1,41 @@
 # from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import Depends, APIRouter
-# from core.auth import require_role
+from fastapi import Depends, APIRouter, HTTPException, Query
+from core.auth import require_role
 # from core.database import get_db
-# from app.models import User
+from core.query_log import query_log, TOP_QUERY_SORTS
+from app.models import User
+from app.schemas import SlowQueryResponse
 # from .products import normalize_image_positions
-# from typing import Annotated
+from typing import Annotated, List
 
 router = APIRouter()
 
 
+@router.get("/slow-queries/", response_model=List[SlowQueryResponse])
+async def get_slow_queries(
+    current_user: Annotated[User, Depends(require_role(['admin'], stateless=True))],
+    limit: int = Query(20, ge=1, le=200),
+    sort_by: str = "total",
+):
+    """
+    Top statement fingerprints seen by this worker, with rolling latency
+    percentiles and the last captured EXPLAIN plan.
+    """
+    if sort_by not in TOP_QUERY_SORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort_by '{sort_by}'. Allowed values: {', '.join(sorted(TOP_QUERY_SORTS))}",
+        )
+
+    return query_log.top(limit=limit, sort_by=sort_by)
+
+
+@router.delete("/slow-queries/")
+async def reset_slow_queries(current_user: Annotated[User, Depends(require_role(['admin']))]):
+    query_log.reset()
+    return {"message": "Slow query stats reset"}
+
+
 # @router.post("/products/{product_id}/images/normalize")
 # async def normalize_product_images(
 #     current_user: Annotated[User, Depends(require_role(['admin']))],
@@ -5,8 +5,9 @@ from app.crud import get_user_by_email, get_user_by_phone
 from app.models import User, PasswordResetToken, VerificationToken
 from fastapi.security import OAuth2PasswordRequestForm
 from app.schemas import UserCreate, Token, TokenRefreshRequest, UserResponse, RequestVerificationLink, PasswordResetRequest, ResetPasswordRequest
-from core.auth import hash_password, verify_password, create_access_token, create_refresh_token, verify_token, create_verification_token, verify_verification_token, create_password_reset_token
-from core.email_utils import send_verification_email, send_reset_password_email
+from core.auth import hash_password, verify_password, create_access_token, access_token_claims, revoke_user_tokens, verify_token, verify_verification_token, token_digest
+from app.services.refresh_tokens import issue_refresh_token, rotate_refresh_token, decode_refresh_token, revoke_family, revoke_user_refresh_tokens
+from core.scheduler import scheduler
 from sqlalchemy.exc import IntegrityError
 from smtplib import SMTPException
 from pydantic import ValidationError
@@ -56,22 +57,10 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
         db.add(db_user)
         db.flush()
-        
-        verification_token = create_verification_token(user.email)
-        token_entry = VerificationToken(
-            token=verification_token,
-            user_id=db_user.user_id,
-            email=user.email
-        )
-        db.add(token_entry)
-        db.flush()
 
-        
-        success, message = send_verification_email(user.email, verification_token)
-        if not success:
-            raise HTTPException(status_code=503, detail=f"Email service error: {message}")
+        # Sent by the scheduler once the account is committed
+        scheduler.enqueue(db, "send_verification_email", {"user_id": db_user.user_id})
 
-        
         db.commit()
         db.refresh(db_user)
 
@@ -108,33 +97,11 @@ async def request_new_verification_link(data: RequestVerificationLink, db: Sessi
 
         if user.is_active:
             raise HTTPException(status_code=400, detail="Email is already verified")
-        
-        
-        db.query(VerificationToken).filter(
-            VerificationToken.user_id == user.user_id,
-            VerificationToken.is_active == True
-        ).update({"is_active": False})
 
-        
-        new_token = create_verification_token(user.email)
-        token_entry = VerificationToken(
-            token=new_token,
-            user_id=user.user_id,
-            email=user.email
-        )
-
-        db.add(token_entry)
+        # The job deactivates the previous token when it creates the new one
+        scheduler.enqueue(db, "send_verification_email", {"user_id": user.user_id})
         db.commit()
 
-        
-        try:
-            success, message = send_verification_email(user.email, new_token)
-            if not success:
-                raise HTTPException(status_code=503, detail=f"Email service error: {message}")
-        except Exception as e:
-            db.rollback()
-            raise HTTPException(status_code=503, detail=f"Email service error: {str(e)}")
-
         return {"message": "A new verification link has been sent to your email"}
 
     except HTTPException as e:
@@ -157,7 +124,7 @@ async def verify_account(token: str, db: Session = Depends(get_db)):
 
         # Find token in DB and check validity
         token_entry = db.query(VerificationToken).filter(
-            VerificationToken.token == token,
+            VerificationToken.token_digest == token_digest(token),
             VerificationToken.is_active == True
         ).first()
 
@@ -205,40 +172,46 @@ async def login(
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User is not verified yet")
 
-    access_token = create_access_token({"sub": user.email, "role": user.role})
-    refresh_token = create_refresh_token({"sub": user.email})
+    access_token = create_access_token(access_token_claims(user))
+    refresh_token = issue_refresh_token(db, user)
 
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
 @router.post("/refresh-token/", response_model=Token)
-async def refresh_token(token_data: TokenRefreshRequest):
+async def refresh_token(token_data: TokenRefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchanges a refresh token for a new access token and the next refresh token.
+    Each refresh token works once; replaying a used one revokes the whole login.
+    """
     try:
-        payload = verify_token(token_data.refresh_token)
-        email: str = payload.get("sub")
-
-        if not email:
-            raise HTTPException(status_code=401, detail="Invalid refresh token")
-
-        new_access_token = create_access_token({"sub": email})
-        return {"access_token": new_access_token, "refresh_token": token_data.refresh_token, "token_type": "bearer"}
+        user, new_refresh_token = rotate_refresh_token(db, token_data.refresh_token)
+        new_access_token = create_access_token(access_token_claims(user))
+        return {"access_token": new_access_token, "refresh_token": new_refresh_token, "token_type": "bearer"}
 
     except HTTPException:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
+    except Exception as e:
+        db.rollback()
+        print(f"Unexpected error while refreshing token: {str(e)}")
+        raise HTTPException(status_code=500, detail="An error occurred while refreshing the token.")
+
+
+@router.post("/logout/")
+async def logout(token_data: TokenRefreshRequest, db: Session = Depends(get_db)):
+    """Revokes the refresh token and every token rotated from the same login."""
+    payload = decode_refresh_token(token_data.refresh_token)
+    try:
+        revoke_family(db, payload["fam"])
+    except Exception as e:
+        db.rollback()
+        print(f"Unexpected error while logging out: {str(e)}")
+        raise HTTPException(status_code=500, detail="An error occurred while logging out.")
+
+    return {"message": "Logged out"}
 
-async def store_reset_token(db: Session, token: str, email: str):
-    """
-    Deactivates any existing reset token and stores a new one.
-    """
-    # Deactivate any previous reset token
-    db.query(PasswordResetToken).filter(PasswordResetToken.email == email).update({"is_used": True})
 
-    # Store the new reset token
-    reset_token = PasswordResetToken(token=token, email=email)
-    db.add(reset_token)
-    db.commit()
-    
 @router.post("/forgot-password/")
 async def forgot_password(
     data: PasswordResetRequest,
@@ -248,7 +221,7 @@ async def forgot_password(
     """
     Allows only unauthenticated users to request a password reset.
     If a valid token is provided in the Authorization header, reject the request.
-    Deactivates any previous reset token before generating a new one.
+    The reset email is queued; the job deactivates any previous reset token.
     """
 
     
@@ -269,22 +242,14 @@ async def forgot_password(
         raise HTTPException(status_code=404, detail="User not found")
 
     try:
-        reset_token = create_password_reset_token(user.email)
-        store_reset_token(db, reset_token, user.email)
+        # The token is created and stored when the email goes out
+        scheduler.enqueue(db, "send_password_reset_email", {"email": user.email})
+        db.commit()
 
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to generate password reset token")
 
-    
-    try:
-        success, message = send_reset_password_email(user.email, reset_token)
-        if not success:
-            raise HTTPException(status_code=503, detail=f"Email service error: {message}")
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=503, detail=f"Email service error: {str(e)}")
-
     return {"message": "A password reset link has been sent to your email"}
 
 
@@ -302,7 +267,7 @@ async def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_d
             raise HTTPException(status_code=400, detail="Invalid token")
 
         
-        reset_token = db.query(PasswordResetToken).filter_by(token=data.token).with_for_update().first()
+        reset_token = db.query(PasswordResetToken).filter_by(token_digest=token_digest(data.token)).with_for_update().first()
 
         if not reset_token:
             raise HTTPException(status_code=400, detail="Invalid or expired token")
@@ -325,6 +290,8 @@ async def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_d
 
         
         user.password_hash = hash_password(data.new_password)
+        revoke_user_tokens(user)
+        revoke_user_refresh_tokens(db, user.user_id)
 
         
         reset_token.is_used = True
@@ -0,0 +1,95 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.services.cache_warmup import cache_warmer
+from core.admission import admission
+from core.config import settings
+from core.database import engine, pool_stats, replicas
+
+router = APIRouter()
+
+
+def pool_exhausted(stats: dict) -> bool:
+    """Every connection the pool may open is checked out; a negative max_overflow means no limit."""
+    max_overflow = stats.get("max_overflow")
+    if stats.get("checkedout") is None or max_overflow is None or max_overflow < 0:
+        return False
+    limit = (stats.get("size") or 0) + max_overflow
+    return limit > 0 and stats["checkedout"] >= limit
+
+
+def check_database(engine, stats: dict) -> dict:
+    """
+    Pings the database unless the pool is exhausted, in which case the ping
+    would only queue behind real traffic for up to pool_timeout. The database
+    is answering those requests, so exhaustion is reported as degraded.
+    """
+    if pool_exhausted(stats):
+        return {"ok": True, "degraded": "Connection pool exhausted"}
+
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        print(f"Health check failed: {e}")
+        return {"ok": False, "error": "Database unreachable"}
+
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+@router.get("/health")
+def health():
+    stats = pool_stats()
+    database = check_database(engine, stats)
+
+    if not database["ok"]:
+        status = "unavailable"
+    else:
+        status = "degraded" if database.get("degraded") else "ok"
+
+    # Liveness: only an unreachable database fails it, a busy pool does not
+    return JSONResponse(
+        status_code=200 if database["ok"] else 503,
+        content={
+            "status": status,
+            "database": database,
+            "pool": stats,
+            # Replicas don't affect the status: reads fall back to the primary
+            "replicas": [replica.status() for replica in replicas.replicas],
+            "admission": admission.stats() if settings.ADMISSION_CONTROL_ENABLED else None,
+            "warmup": cache_warmer.status(),
+        },
+    )
+
+
+@router.get("/ready")
+def ready():
+    """
+    Readiness probe: 503 until the database answers and the startup cache
+    warm-up has finished or used up WARMUP_BUDGET_SECONDS, and while the
+    connection pool is exhausted, so the load balancer sends new requests
+    to other workers.
+    """
+    database = check_database(engine, pool_stats())
+    is_ready = database["ok"] and not database.get("degraded") and cache_warmer.ready
+
+    if is_ready:
+        status = "ready"
+    elif not database["ok"]:
+        status = "unavailable"
+    else:
+        status = "busy" if database.get("degraded") else "warming"
+
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "status": status,
+            "database": database,
+            "warmup": cache_warmer.status(),
+        },
+    )
@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, HTTPException
+from core.database import get_db
+from core.auth import require_role
+from app.models import Product, User, SellerDailySales, ProductDailySales
+from app.schemas import MerchantSalesDashboardResponse, SalesTotalsResponse, SalesSeriesResponse, ProductSalesResponse
+from typing import Annotated, Optional
+from datetime import date, timedelta
+from sqlalchemy import select, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+
+router = APIRouter()
+
+
+MAX_DASHBOARD_DAYS = 366
+
+
+@router.get("/dashboard/sales/", response_model=MerchantSalesDashboardResponse)
+async def get_sales_dashboard(
+    current_user: Annotated[User, Depends(require_role(['merchant'], stateless=True))],
+    db: Session = Depends(get_db),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    product_id: Optional[int] = None,
+    top: int = 10,
+):
+    """
+    Revenue, units and order counts per day, read only from the daily sales rollups.
+    Days without sales are zero-filled so the series can be charted directly.
+    Pass product_id to chart a single product instead of the whole store.
+    """
+    try:
+        end = end or date.today()
+        start = start or end - timedelta(days=29)
+
+        if start > end:
+            raise HTTPException(status_code=400, detail="Start date must be before end date")
+        if (end - start).days >= MAX_DASHBOARD_DAYS:
+            raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_DASHBOARD_DAYS} days")
+        if top < 0 or top > 50:
+            raise HTTPException(status_code=400, detail="Top must be between 0 and 50")
+
+        if product_id is not None:
+            series_rows = db.execute(
+                select(ProductDailySales.day, ProductDailySales.revenue, ProductDailySales.units, ProductDailySales.order_count)
+                .filter(
+                    ProductDailySales.product_id == product_id,
+                    ProductDailySales.seller_id == current_user.user_id,
+                    ProductDailySales.day.between(start, end),
+                )
+            ).all()
+        else:
+            series_rows = db.execute(
+                select(SellerDailySales.day, SellerDailySales.revenue, SellerDailySales.units, SellerDailySales.order_count)
+                .filter(
+                    SellerDailySales.seller_id == current_user.user_id,
+                    SellerDailySales.day.between(start, end),
+                )
+            ).all()
+
+        by_day = {row.day: row for row in series_rows}
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+        series = SalesSeriesResponse(
+            days=days,
+            revenue=[float(by_day[day].revenue) if day in by_day else 0.0 for day in days],
+            units=[by_day[day].units if day in by_day else 0 for day in days],
+            orders=[by_day[day].order_count if day in by_day else 0 for day in days],
+        )
+
+        totals = SalesTotalsResponse(
+            revenue=round(sum(series.revenue), 2),
+            units=sum(series.units),
+            orders=sum(series.orders),
+        )
+
+        top_products = []
+        if top:
+            # Served by ix_product_daily_sales_seller_day
+            top_rows = db.execute(
+                select(
+                    ProductDailySales.product_id,
+                    func.sum(ProductDailySales.revenue).label("revenue"),
+                    func.sum(ProductDailySales.units).label("units"),
+                    func.sum(ProductDailySales.order_count).label("orders"),
+                )
+                .filter(
+                    ProductDailySales.seller_id == current_user.user_id,
+                    ProductDailySales.day.between(start, end),
+                )
+                .group_by(ProductDailySales.product_id)
+                .order_by(func.sum(ProductDailySales.revenue).desc())
+                .limit(top)
+            ).all()
+
+            names = dict(db.execute(
+                select(Product.product_id, Product.name)
+                .filter(Product.product_id.in_([row.product_id for row in top_rows]))
+            ).all()) if top_rows else {}
+
+            top_products = [
+                ProductSalesResponse(
+                    product_id=row.product_id,
+                    name=names.get(row.product_id),
+                    revenue=float(row.revenue or 0),
+                    units=row.units or 0,
+                    orders=row.orders or 0,
+                )
+                for row in top_rows
+            ]
+
+        return MerchantSalesDashboardResponse(
+            start=start,
+            end=end,
+            totals=totals,
+            series=series,
+            top_products=top_products,
+        )
+
+    except HTTPException:
+        raise
+
+    except SQLAlchemyError as e:
+        print(f"Database error while building sales dashboard: {e}")
+        raise HTTPException(status_code=500, detail="Database error. Please try again later.")
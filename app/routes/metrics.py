@@ -0,0 +1,29 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from core.config import settings
+from core.metrics import generate_latest
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus text format. Plain def: in multiprocess mode this reads
+    every worker's snapshot from disk.
+    Admission control never sheds it; when METRICS_TOKEN is set, only
+    scrapers sending that Bearer token get an answer.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    if settings.METRICS_TOKEN:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return PlainTextResponse(generate_latest(), media_type="text/plain; version=0.0.4; charset=utf-8")
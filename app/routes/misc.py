@@ -1,24 +1,17 @@
 from fastapi import APIRouter, Depends
-from core.database import get_db
-from app.models import Category, Currency
+from core.database import get_read_db
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from app.schemas import CategoryResponse, CurrencyResponse
+from app.services.reference_data import get_categories as cached_categories, get_currencies as cached_currencies
 
 router = APIRouter()
 
 @router.get("/categories/", response_model=List[CategoryResponse])
-async def get_categories(db: AsyncSession = Depends(get_db)):
-    result = db.execute(select(Category))
-    categories = result.scalars().all()
-    return categories
+async def get_categories(db: AsyncSession = Depends(get_read_db)):
+    return cached_categories(db)
 
 
 @router.get("/currencies/", response_model=List[CurrencyResponse])
-async def get_currencies(db: AsyncSession = Depends(get_db)):
-    result = db.execute(select(Currency))
-    currencies = result.scalars().all()
-    return currencies
-
-
+async def get_currencies(db: AsyncSession = Depends(get_read_db)):
+    return cached_currencies(db)
@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException
+from core.database import get_db, query_budget
+from core.auth import get_current_user
+from core.utility import encode_cursor, decode_cursor
+from app.models import Order, OrderItem, Product, ProductImages, Shipping, User
+from app.schemas import OrderHistoryResponse, OrderHistoryItemResponse, OrderHistoryPageResponse, ProductCardResponse, ShippingStatusResponse
+from typing import Annotated, Optional
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, selectinload
+
+
+router = APIRouter()
+
+
+def order_to_history_response(order: Order) -> OrderHistoryResponse:
+    items = []
+    for item in order.order_items:
+        product = item.product
+        thumbnail = min(product.product_images, key=lambda img: img.rank) if product.product_images else None
+        items.append(
+            OrderHistoryItemResponse(
+                order_item_id=item.order_item_id,
+                quantity=item.quantity,
+                unit_price=float(item.unit_price),
+                total_price=float(item.total_price),
+                product=ProductCardResponse(
+                    product_id=product.product_id,
+                    name=product.name,
+                    thumbnail_url=thumbnail.image_url if thumbnail else None
+                )
+            )
+        )
+
+    shipping_response = None
+    if order.shipping:
+        shipping_response = ShippingStatusResponse(
+            shipping_status=order.shipping.shipping_status,
+            carrier=order.shipping.carrier,
+            tracking_number=order.shipping.tracking_number,
+            estimated_delivery_date=order.shipping.estimated_delivery_date
+        )
+
+    return OrderHistoryResponse(
+        order_id=order.order_id,
+        total_amount=float(order.total_amount),
+        order_status=order.order_status,
+        payment_status=order.order_payment_status,
+        created_at=order.created_at,
+        items=items,
+        shipping=shipping_response
+    )
+
+
+@router.get("/", response_model=OrderHistoryPageResponse)
+@query_budget(6)
+async def get_order_history(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = 10,
+):
+    """
+    The buyer's orders, newest first, keyset-paginated on order_id.
+    Every relationship is eager loaded with selectinload, so a page costs a fixed
+    five queries (orders, items, products, images, shipping) whatever its size.
+    """
+    try:
+        if limit <= 0 or limit > 50:
+            raise HTTPException(status_code=400, detail="Limit must be between 1 and 50")
+
+        query = (
+            select(Order)
+            .options(
+                selectinload(Order.order_items)
+                .selectinload(OrderItem.product)
+                .load_only(Product.product_id, Product.name),
+                selectinload(Order.order_items)
+                .selectinload(OrderItem.product)
+                .selectinload(Product.product_images)
+                .load_only(ProductImages.image_url, ProductImages.rank),
+                selectinload(Order.shipping)
+                .load_only(
+                    Shipping.shipping_status,
+                    Shipping.carrier,
+                    Shipping.tracking_number,
+                    Shipping.estimated_delivery_date
+                ),
+            )
+            .filter(Order.user_id == current_user.user_id)
+        )
+
+        if cursor:
+            last_order_id, = decode_cursor(cursor, int)
+            query = query.filter(Order.order_id < last_order_id)
+
+        # Served by ix_orders_user_order
+        orders = db.execute(
+            query.order_by(Order.order_id.desc()).limit(limit + 1)
+        ).scalars().all()
+
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+
+        next_cursor = encode_cursor(orders[-1].order_id) if has_more else None
+
+        return OrderHistoryPageResponse(
+            items=[order_to_history_response(order) for order in orders],
+            next_cursor=next_cursor
+        )
+
+    except HTTPException:
+        raise
+
+    except SQLAlchemyError as e:
+        print(f"Database error while retrieving order history: {e}")
+        raise HTTPException(status_code=500, detail="Database error. Please try again later.")
@@ -1,13 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from core.database import get_db
+from core.database import get_db, get_read_db, query_budget
 from app.models import Product, User, Category, ProductImages, Currency
-from app.schemas import ProductResponse, ProductCreate, cpr, CategoryResponse, CurrencyResponse, ProductImageResponse, ImageRankUpdatePayload
+from app.schemas import ProductResponse, ProductCreate, cpr, ProductImageResponse, ImageRankUpdatePayload, MerchantProductRow, MerchantProductPageResponse, ProductImportReport, ProductBatchResponse
 from core.auth import require_role
+from core.utility import encode_cursor, decode_cursor
+from app.services.product_import import import_products, detect_import_format, IMPORT_FORMATS
+from app.services.catalog_export import iter_catalog_export, EXPORT_FORMATS
+from app.services.product_cache import get_product_responses, invalidate_product, invalidate_all_products, product_detail_cache, PRODUCT_RESPONSE_OPTIONS
+from app.services.product_fields import parse_product_fields, product_load_options, serialize_product_fields, project_product_response
+from app.services.product_listing import list_products
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
 from typing import Annotated, Optional, List
+from datetime import datetime
+from decimal import Decimal
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, or_, and_
+from sqlalchemy.orm import selectinload, with_parent
 
 
 router = APIRouter()
@@ -21,125 +31,267 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 
 @router.get("/", response_model=List[ProductResponse])
+@query_budget(4)
 async def get_products(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     category_name: Optional[str] = None,
     brand: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
+    sort_by: Optional[str] = None,
+    fields: Optional[str] = None,
     limit: int = 10,
     offset: int = 0
 ):
+    """
+    Pass fields (e.g. fields=name,price,images) to select and return only those
+    fields plus product_id; images is then the thumbnail only.
+    """
     try:
-        if limit <= 0 or limit > 100:
-            raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
-        if offset < 0:
-            raise HTTPException(status_code=400, detail="Offset must be 0 or greater")
+        products = list_products(
+            db,
+            category_name=category_name,
+            brand=brand,
+            min_price=min_price,
+            max_price=max_price,
+            sort_by=sort_by,
+            fields=fields,
+            limit=limit,
+            offset=offset,
+        )
 
+        if not products:
+            raise HTTPException(status_code=404, detail="No products found with the given filters")
+
+        if fields is not None:
+            return JSONResponse(content=jsonable_encoder(products))
+
+        return products
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        print(f"Error retrieving products: {e}")
+        raise HTTPException(status_code=500, detail="An error occurred while fetching products.")
+
+MERCHANT_PRODUCT_SORTS = {
+    "updated_at": Product.updated_at,
+    "created_at": Product.created_at,
+    "price": func.coalesce(Product.price, 0),
+    "stock_quantity": func.coalesce(Product.stock_quantity, 0),
+}
+
+# Python type of each sort key, for validating cursors
+MERCHANT_PRODUCT_SORT_TYPES = {
+    "updated_at": datetime,
+    "created_at": datetime,
+    "price": Decimal,
+    "stock_quantity": int,
+}
+
+
+@router.get("/mine/", response_model=MerchantProductPageResponse)
+@query_budget(3)  # user (require_role), products, images with include_images
+async def get_my_products(
+    current_user: Annotated[User, Depends(require_role(['merchant']))],
+    db: AsyncSession = Depends(get_db),
+    status: Optional[str] = None,
+    in_stock: Optional[bool] = None,
+    max_stock: Optional[int] = None,
+    sort_by: str = "updated_at",
+    order: str = "desc",
+    include_images: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+):
+    """
+    Back-office grid of the merchant's own products, drafts included.
+    Keyset-paginated on (sort key, product_id); the cursor is only valid for the
+    sort it was issued with. Rows are plain columns; images are loaded with one
+    extra query only when include_images is set.
+    """
+    try:
+        if limit <= 0 or limit > 200:
+            raise HTTPException(status_code=400, detail="Limit must be between 1 and 200")
+
+        allowed_statuses = {'draft', 'published'}
+        if status is not None and status not in allowed_statuses:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid status '{status}'. Allowed values: {', '.join(allowed_statuses)}",
+            )
+
+        if sort_by not in MERCHANT_PRODUCT_SORTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sort_by '{sort_by}'. Allowed values: {', '.join(MERCHANT_PRODUCT_SORTS)}",
+            )
+
+        if order not in {'asc', 'desc'}:
+            raise HTTPException(status_code=400, detail="Order must be 'asc' or 'desc'")
+
+        sort_key = MERCHANT_PRODUCT_SORTS[sort_by]
+
+        # Select-style equivalent of the lazy="dynamic" User.product relationship;
+        # with a status filter it is served by ix_products_seller_status_updated
         query = (
-            select(Product)
-            .options(
-                selectinload(Product.product_images),
-                selectinload(Product.currency),
-                selectinload(Product.category)
+            select(
+                Product.product_id,
+                Product.sku,
+                Product.name,
+                Product.price,
+                Product.currency_code,
+                Product.stock_quantity,
+                Product.brand,
+                Product.category_id,
+                Product.status,
+                Product.created_at,
+                Product.updated_at,
+                sort_key.label("sort_key"),
             )
-            .filter(Product.status == 'published')
+            .where(with_parent(current_user, User.product))
         )
 
-        if category_name:
-            query = query.join(Product.category).filter(Product.category.has(name=category_name))
+        if status is not None:
+            query = query.filter(Product.status == status)
+
+        if in_stock is True:
+            query = query.filter(Product.stock_quantity > 0)
+        elif in_stock is False:
+            query = query.filter(or_(Product.stock_quantity == None, Product.stock_quantity <= 0))
+
+        if max_stock is not None:
+            query = query.filter(Product.stock_quantity <= max_stock)
+
+        if cursor:
+            cursor_sort, last_key, last_product_id = decode_cursor(cursor, str, MERCHANT_PRODUCT_SORT_TYPES[sort_by], int)
+            if cursor_sort != f"{sort_by}:{order}":
+                raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+
+            if order == 'desc':
+                query = query.filter(or_(sort_key < last_key, and_(sort_key == last_key, Product.product_id < last_product_id)))
+            else:
+                query = query.filter(or_(sort_key > last_key, and_(sort_key == last_key, Product.product_id > last_product_id)))
+
+        if order == 'desc':
+            query = query.order_by(sort_key.desc(), Product.product_id.desc())
+        else:
+            query = query.order_by(sort_key.asc(), Product.product_id.asc())
+
+        rows = db.execute(query.limit(limit + 1)).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        images_by_product = {}
+        if include_images and rows:
+            image_rows = db.execute(
+                select(ProductImages.id, ProductImages.product_id, ProductImages.image_url, ProductImages.rank)
+                .filter(ProductImages.product_id.in_([row.product_id for row in rows]))
+                .order_by(ProductImages.product_id, ProductImages.rank)
+            ).all()
+            for image in image_rows:
+                images_by_product.setdefault(image.product_id, []).append(
+                    ProductImageResponse(id=image.id, image_url=image.image_url, rank=image.rank)
+                )
 
-        if brand:
-            query = query.filter(Product.brand == brand)
+        items = [
+            MerchantProductRow(
+                product_id=row.product_id,
+                sku=row.sku,
+                name=row.name,
+                price=float(row.price) if row.price else None,
+                currency_code=row.currency_code,
+                stock_quantity=row.stock_quantity,
+                brand=row.brand,
+                category_id=row.category_id,
+                status=row.status,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+                images=images_by_product.get(row.product_id, []) if include_images else None,
+            )
+            for row in rows
+        ]
 
-        if min_price is not None:
-            if min_price < 0:
-                raise HTTPException(status_code=400, detail="Minimum price must be non-negative")
-            query = query.filter(Product.price >= min_price)
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(f"{sort_by}:{order}", rows[-1].sort_key, rows[-1].product_id)
 
-        if max_price is not None:
-            if max_price < 0:
-                raise HTTPException(status_code=400, detail="Maximum price must be non-negative")
-            query = query.filter(Product.price <= max_price)
+        return MerchantProductPageResponse(items=items, next_cursor=next_cursor)
 
-        query = query.offset(offset).limit(limit)
+    except HTTPException:
+        raise
 
-        result = db.execute(query)
-        products = result.scalars().all()
+    except SQLAlchemyError as e:
+        print(f"Database error while retrieving merchant products: {e}")
+        raise HTTPException(status_code=500, detail="Database error. Please try again later.")
 
-        if not products:
-            raise HTTPException(status_code=404, detail="No products found with the given filters")
+MAX_BATCH_PRODUCTS = 200
 
-        product_responses = []
-        for product in products:
-            first_image_url = None
-            if product.product_images:
-                first_image = min(product.product_images, key=lambda img: img.position)
-                first_image_url = first_image.image_url
-
-            
-            category_response = None
-            if product.category:
-                category_response = CategoryResponse(
-                    category_id=product.category.category_id,
-                    name=product.category.name
-                )
 
-            currency_response = None
-            if product.currency:
-                currency_response = CurrencyResponse(
-                    code=product.currency.code,
-                    name=product.currency.name,
-                    symbol=product.currency.symbol
-                )
+@router.get("/batch/", response_model=ProductBatchResponse)
+@query_budget(2)
+async def get_products_batch(ids: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Card data for up to 200 comma-separated product IDs, in request order.
+    Cached products are served from memory; the rest cost one product query
+    and one image query. IDs that are unknown or unpublished are listed in missing.
+    """
+    try:
+        try:
+            product_ids = list(dict.fromkeys(int(product_id) for product_id in ids.split(",") if product_id.strip()))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
 
-            product_responses.append(
-                ProductResponse(
-                    product_id=product.product_id,
-                    name=product.name,
-                    description=product.description,
-                    price=float(product.price) if product.price else None,
-                    stock_quantity=product.stock_quantity,
-                    brand=product.brand,
-                    status=product.status,
-                    seller_id=product.seller_id,
-                    created_at=product.created_at,
-                    updated_at=product.updated_at,
-                    reviews=[],
-                    images=[ProductImageResponse(id=0, image_url=first_image_url, position=0)] if first_image_url else [],
-                    category=category_response,
-                    currency=currency_response,
-                )
-            )
+        if not product_ids:
+            raise HTTPException(status_code=400, detail="At least one product ID is required")
+        if len(product_ids) > MAX_BATCH_PRODUCTS:
+            raise HTTPException(status_code=400, detail=f"A maximum of {MAX_BATCH_PRODUCTS} product IDs can be requested at once")
 
-        return product_responses
+        responses = get_product_responses(db, product_ids)
+
+        return ProductBatchResponse(
+            items=[responses[product_id] for product_id in product_ids if product_id in responses],
+            missing=[product_id for product_id in product_ids if product_id not in responses]
+        )
 
     except HTTPException:
         raise
 
-    except Exception as e:
-        print(f"Error retrieving products: {e}")
-        raise HTTPException(status_code=500, detail="An error occurred while fetching products.")
+    except SQLAlchemyError as e:
+        print(f"Database error while retrieving product batch: {e}")
+        raise HTTPException(status_code=500, detail="Database error. Please try again later.")
+
 
 @router.get("/{product_id}/product/view/", response_model=ProductResponse)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
+@query_budget(4)  # fields path: product, images, category, currency
+async def get_product(product_id: int, db: AsyncSession = Depends(get_read_db), fields: Optional[str] = None):
     try:
-        result = db.execute(
-            select(Product)
-            .options(
-                selectinload(Product.product_images),
-                selectinload(Product.category),
-                selectinload(Product.currency)
-            )
-            .filter(Product.product_id == product_id, Product.status == 'published')
-        )
+        requested_fields = parse_product_fields(fields)
+
+        if requested_fields is not None:
+            cached = product_detail_cache.get(product_id) if product_detail_cache.enabled else None
+            if cached is not None:
+                return JSONResponse(content=jsonable_encoder(project_product_response(cached, requested_fields)))
+
+            product = db.execute(
+                select(Product)
+                .options(*product_load_options(requested_fields))
+                .filter(Product.product_id == product_id, Product.status == 'published')
+            ).scalars().first()
+
+            if not product:
+                raise HTTPException(status_code=404, detail="Product not found")
+
+            return JSONResponse(content=jsonable_encoder(serialize_product_fields(product, requested_fields)))
 
-        product = result.scalars().first()
+        product = get_product_responses(db, [product_id]).get(product_id)
 
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        return ProductResponse.from_attributes(product)
+        return product
 
     except HTTPException:
         raise
@@ -180,14 +332,75 @@ async def create_product(
         print(e)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+@router.post("/import/", response_model=ProductImportReport)
+def bulk_import_products(
+    current_user: Annotated[User, Depends(require_role(['merchant']))],
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Creates or updates products in bulk from a CSV (with a header row) or NDJSON file.
+    Every row needs a sku plus the ProductCreate fields; rows are matched to existing
+    products on (seller, sku). Returns per-row errors; valid rows are saved even when
+    others fail.
+
+    A plain def so the long-running import runs in the threadpool instead of the event loop.
+    """
+    file_format = (file_format or detect_import_format(file.filename, file.content_type) or "").lower()
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Could not determine file format. Pass file_format as one of: {', '.join(sorted(IMPORT_FORMATS))}",
+        )
+
+    try:
+        report = import_products(db, current_user.user_id, file.file, file_format)
+        invalidate_all_products()
+        return report
+
+    except Exception as e:
+        db.rollback()
+        print(f"Unexpected error while importing products: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred while importing products")
+
+@router.get("/export/")
+async def export_catalog(
+    current_user: Annotated[User, Depends(require_role(['admin'], stateless=True))],
+    file_format: str = "ndjson",
+    gzip: bool = False,
+):
+    """
+    Streams every published product as NDJSON or CSV from one consistent snapshot,
+    for search indexers and marketplace feeds. With gzip=true the body is a .gz file.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file_format '{file_format}'. Allowed values: {', '.join(sorted(EXPORT_FORMATS))}",
+        )
+
+    filename = f"catalog-{datetime.utcnow():%Y%m%d%H%M%S}.{file_format}"
+    media_type = "application/x-ndjson" if file_format == 'ndjson' else "text/csv"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        iter_catalog_export(file_format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.get("/edit/{product_id}/product/", response_model=ProductResponse)
+@query_budget(3)
 async def get_product_for_edit(
     product_id: int,
     current_user: Annotated[User, Depends(require_role(['merchant']))],
     db: AsyncSession = Depends(get_db),
 ):
     try:
-        existing_product = db.get(Product, product_id)
+        existing_product = db.get(Product, product_id, options=PRODUCT_RESPONSE_OPTIONS)
 
         if not existing_product:
             raise HTTPException(status_code=404, detail="Product not found")
@@ -272,7 +485,8 @@ async def update_product(
                     )
 
         db.commit()
-        db.refresh(existing_product)
+        existing_product = db.get(Product, product_id, options=PRODUCT_RESPONSE_OPTIONS, populate_existing=True)
+        invalidate_product(product_id)
 
         return ProductResponse.from_attributes(existing_product)
 
@@ -311,6 +525,7 @@ async def delete_product(
 
         db.delete(product)
         db.commit()
+        invalidate_product(product_id)
         return {"message": "Product deleted successfully"}
 
     except HTTPException as http_exc:
@@ -368,6 +583,7 @@ async def upload_product_image(
         db.add(new_image)
         db.commit()
         db.refresh(new_image)
+        invalidate_product(product.product_id)
 
         return {
             "image_id": new_image.id,
@@ -444,6 +660,7 @@ async def reorder_images(
             id_to_image[image_id].rank = float(index)
 
         db.commit()
+        invalidate_product(product_id)
 
         return {"message": "Image positions updated successfully"}
 
@@ -0,0 +1,240 @@
+from fastapi import APIRouter, Depends, HTTPException
+from core.database import get_db, query_budget
+from core.auth import get_current_user
+from core.utility import encode_cursor, decode_cursor
+from app.services.product_cache import invalidate_product
+from app.models import Product, Review, User
+from app.schemas import ReviewCreate, ReviewUpdate, ReviewResponse, ReviewFeedItem, ReviewAuthorResponse, ReviewPageResponse
+from typing import Annotated, Optional
+from datetime import datetime
+from sqlalchemy import select, or_, and_
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import Session
+
+
+router = APIRouter()
+
+
+def review_to_response(review: Review) -> ReviewResponse:
+    return ReviewResponse(
+        id=review.review_id,
+        user_id=review.user_id,
+        rating=review.rating,
+        comment=review.comment
+    )
+
+
+@router.get("/{product_id}/reviews/", response_model=ReviewPageResponse)
+@query_budget(2)
+async def get_product_reviews(
+    product_id: int,
+    db: Session = Depends(get_db),
+    rating: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+):
+    """
+    Newest-first review feed, keyset-paginated on (created_at, review_id).
+    Pass the returned next_cursor to fetch the following page; it is None on the last page.
+    The reviewer's display fields are selected in the same query, so no User rows are loaded.
+    """
+    try:
+        if limit <= 0 or limit > 50:
+            raise HTTPException(status_code=400, detail="Limit must be between 1 and 50")
+        if rating is not None and not 1 <= rating <= 5:
+            raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
+
+        product_exists = db.execute(
+            select(Product.product_id)
+            .filter(Product.product_id == product_id, Product.status == 'published')
+        ).first()
+
+        if not product_exists:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+        # Served by ix_reviews_product_created, or ix_reviews_product_rating_created with a
+        # rating filter; the author columns come from the users join
+        query = (
+            select(
+                Review.review_id,
+                Review.user_id,
+                Review.rating,
+                Review.comment,
+                Review.created_at,
+                User.first_name,
+                User.last_name,
+            )
+            .join(User, User.user_id == Review.user_id)
+            .filter(Review.product_id == product_id)
+        )
+
+        if rating is not None:
+            query = query.filter(Review.rating == rating)
+
+        if cursor:
+            last_created_at, last_review_id = decode_cursor(cursor, datetime, int)
+            query = query.filter(
+                or_(
+                    Review.created_at < last_created_at,
+                    and_(Review.created_at == last_created_at, Review.review_id < last_review_id),
+                )
+            )
+
+        # Fetch one extra row to know whether another page exists
+        rows = db.execute(
+            query.order_by(Review.created_at.desc(), Review.review_id.desc()).limit(limit + 1)
+        ).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        items = [
+            ReviewFeedItem(
+                id=row.review_id,
+                rating=row.rating,
+                comment=row.comment,
+                created_at=row.created_at,
+                author=ReviewAuthorResponse(
+                    user_id=row.user_id,
+                    display_name=f"{row.first_name} {row.last_name[:1]}.".strip()
+                )
+            )
+            for row in rows
+        ]
+
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].review_id) if has_more else None
+
+        return ReviewPageResponse(items=items, next_cursor=next_cursor)
+
+    except HTTPException:
+        raise
+
+    except SQLAlchemyError as e:
+        print(f"Database error while retrieving reviews for product {product_id}: {e}")
+        raise HTTPException(status_code=500, detail="Database error. Please try again later.")
+
+
+@router.post("/{product_id}/reviews/", response_model=ReviewResponse)
+async def create_review(
+    product_id: int,
+    review: ReviewCreate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    """
+    Adds a review to a published product. The product's rating aggregates
+    are updated in the same transaction by the Review mapper events.
+    """
+    try:
+        product = db.execute(
+            select(Product.product_id, Product.seller_id)
+            .filter(Product.product_id == product_id, Product.status == 'published')
+        ).first()
+
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+        if product.seller_id == current_user.user_id:
+            raise HTTPException(status_code=403, detail="You cannot review your own product")
+
+        existing_review = db.execute(
+            select(Review.review_id)
+            .filter(Review.product_id == product_id, Review.user_id == current_user.user_id)
+        ).first()
+
+        if existing_review:
+            raise HTTPException(status_code=400, detail="You have already reviewed this product")
+
+        new_review = Review(
+            product_id=product_id,
+            user_id=current_user.user_id,
+            rating=review.rating,
+            comment=review.comment
+        )
+
+        db.add(new_review)
+        db.commit()
+        db.refresh(new_review)
+        invalidate_product(product_id)
+
+        return review_to_response(new_review)
+
+    except HTTPException:
+        raise
+
+    except IntegrityError:
+        # uq_reviews_product_user: a concurrent request got there first
+        db.rollback()
+        raise HTTPException(status_code=400, detail="You have already reviewed this product")
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Database error while creating review: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+
+@router.put("/reviews/{review_id}/", response_model=ReviewResponse)
+async def update_review(
+    review_id: int,
+    review: ReviewUpdate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    try:
+        existing_review = db.get(Review, review_id)
+
+        if not existing_review:
+            raise HTTPException(status_code=404, detail="Review not found")
+
+        if existing_review.user_id != current_user.user_id:
+            raise HTTPException(status_code=403, detail="You do not have permission to edit this review")
+
+        if review.rating is not None:
+            existing_review.rating = review.rating
+        if review.comment is not None:
+            existing_review.comment = review.comment
+
+        db.commit()
+        db.refresh(existing_review)
+        invalidate_product(existing_review.product_id)
+
+        return review_to_response(existing_review)
+
+    except HTTPException:
+        raise
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Database error while updating review {review_id}: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+
+@router.delete("/reviews/{review_id}/")
+async def delete_review(
+    review_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    try:
+        existing_review = db.get(Review, review_id)
+
+        if not existing_review:
+            raise HTTPException(status_code=404, detail="Review not found")
+
+        if existing_review.user_id != current_user.user_id and current_user.role != 'admin':
+            raise HTTPException(status_code=403, detail="You do not have permission to delete this review")
+
+        product_id = existing_review.product_id
+        db.delete(existing_review)
+        db.commit()
+        invalidate_product(product_id)
+
+        return {"message": "Review deleted successfully"}
+
+    except HTTPException:
+        raise
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Database error while deleting review {review_id}: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
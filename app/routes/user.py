@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from core.database import get_db
 from app.models import User
-from core.auth import require_role
+from core.auth import require_role, revoke_user_tokens, create_access_token, access_token_claims
 from typing import Annotated
 
 router = APIRouter()
@@ -14,7 +14,13 @@ def upgrade_to_merchant(
 ):
 
     current_user.role = "merchant"
+    # Tokens issued before the upgrade still say buyer
+    revoke_user_tokens(current_user)
     db.commit()
     db.refresh(current_user)
 
-    return {"message": "You have been upgraded to a merchant"}
\ No newline at end of file
+    return {
+        "message": "You have been upgraded to a merchant",
+        "access_token": create_access_token(access_token_claims(current_user)),
+        "token_type": "bearer",
+    }
\ No newline at end of file
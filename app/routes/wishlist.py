@@ -0,0 +1,197 @@
+from fastapi import APIRouter, Depends, HTTPException
+from core.database import get_db, query_budget
+from core.auth import get_current_user
+from core.cache import TTLCache
+from core.config import settings
+from core.utility import encode_cursor, decode_cursor
+from app.models import Product, User, Wishlist
+from app.schemas import WishlistItemResponse, WishlistPageResponse, WishlistContainsRequest, WishlistContainsResponse
+from typing import Annotated, Optional, List, Set
+from sqlalchemy import select, delete
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import Session
+
+
+router = APIRouter()
+
+
+# user_id -> frozenset of wishlisted product IDs, only for users under WISHLIST_CACHE_MAX_ITEMS
+wishlist_cache = TTLCache(maxsize=10_000, ttl=settings.WISHLIST_CACHE_TTL_SECONDS, name="wishlist")
+
+
+def get_wishlisted_ids(db: Session, user_id: int, product_ids: List[int]) -> Set[int]:
+    """
+    Returns which of product_ids are in the user's wishlist with a single query
+    on uq_wishlist_user_product, or none at all when the user's set is cached.
+    """
+    if wishlist_cache.enabled:
+        cached = wishlist_cache.get(user_id)
+        if cached is not None:
+            return cached.intersection(product_ids)
+
+        # Load the whole (small) wishlist once so later checks skip the DB
+        rows = db.execute(
+            select(Wishlist.product_id)
+            .filter(Wishlist.user_id == user_id)
+            .limit(settings.WISHLIST_CACHE_MAX_ITEMS + 1)
+        ).scalars().all()
+
+        if len(rows) <= settings.WISHLIST_CACHE_MAX_ITEMS:
+            wishlisted = frozenset(rows)
+            wishlist_cache.set(user_id, wishlisted)
+            return wishlisted.intersection(product_ids)
+
+    rows = db.execute(
+        select(Wishlist.product_id)
+        .filter(Wishlist.user_id == user_id, Wishlist.product_id.in_(product_ids))
+    ).scalars().all()
+
+    return set(rows)
+
+
+@router.get("/", response_model=WishlistPageResponse)
+@query_budget(3)
+async def get_wishlist(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = 20,
+):
+    """
+    Most recently added first, keyset-paginated on wishlist_id (insertion ordered).
+    """
+    try:
+        if limit <= 0 or limit > 100:
+            raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+
+        query = (
+            select(
+                Wishlist.wishlist_id,
+                Wishlist.created_at,
+                Product.product_id,
+                Product.name,
+                Product.price,
+                Product.currency_code,
+                Product.status,
+            )
+            .join(Product, Product.product_id == Wishlist.product_id)
+            .filter(Wishlist.user_id == current_user.user_id)
+        )
+
+        if cursor:
+            last_wishlist_id, = decode_cursor(cursor, int)
+            query = query.filter(Wishlist.wishlist_id < last_wishlist_id)
+
+        rows = db.execute(
+            query.order_by(Wishlist.wishlist_id.desc()).limit(limit + 1)
+        ).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        items = [
+            WishlistItemResponse(
+                product_id=row.product_id,
+                name=row.name,
+                price=float(row.price) if row.price else None,
+                currency_code=row.currency_code,
+                status=row.status,
+                added_at=row.created_at
+            )
+            for row in rows
+        ]
+
+        next_cursor = encode_cursor(rows[-1].wishlist_id) if has_more else None
+
+        return WishlistPageResponse(items=items, next_cursor=next_cursor)
+
+    except HTTPException:
+        raise
+
+    except SQLAlchemyError as e:
+        print(f"Database error while retrieving wishlist: {e}")
+        raise HTTPException(status_code=500, detail="Database error. Please try again later.")
+
+
+@router.post("/contains/", response_model=WishlistContainsResponse)
+async def wishlist_contains(
+    payload: WishlistContainsRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk membership check for product grids: answers for up to 100 product IDs at once.
+    """
+    try:
+        wishlisted = get_wishlisted_ids(db, current_user.user_id, payload.product_ids)
+        return WishlistContainsResponse(
+            contains={product_id: product_id in wishlisted for product_id in payload.product_ids}
+        )
+
+    except SQLAlchemyError as e:
+        print(f"Database error while checking wishlist: {e}")
+        raise HTTPException(status_code=500, detail="Database error. Please try again later.")
+
+
+@router.post("/{product_id}/")
+async def add_to_wishlist(
+    product_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    try:
+        product = db.execute(
+            select(Product.product_id)
+            .filter(Product.product_id == product_id, Product.status == 'published')
+        ).first()
+
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+        db.add(Wishlist(user_id=current_user.user_id, product_id=product_id))
+        db.commit()
+
+    except HTTPException:
+        raise
+
+    except IntegrityError:
+        # uq_wishlist_user_product: already in the wishlist, adding is idempotent
+        db.rollback()
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Database error while adding to wishlist: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    wishlist_cache.delete(current_user.user_id)
+    return {"message": "Product added to wishlist"}
+
+
+@router.delete("/{product_id}/")
+async def remove_from_wishlist(
+    product_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+):
+    try:
+        result = db.execute(
+            delete(Wishlist)
+            .where(Wishlist.user_id == current_user.user_id, Wishlist.product_id == product_id)
+        )
+        db.commit()
+
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Product is not in your wishlist")
+
+    except HTTPException:
+        raise
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Database error while removing from wishlist: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    finally:
+        wishlist_cache.delete(current_user.user_id)
+
+    return {"message": "Product removed from wishlist"}
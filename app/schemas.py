@@ -1,9 +1,9 @@
 from pydantic import BaseModel, EmailStr, condecimal, validator, Field, HttpUrl, field_validator
 from decimal import Decimal
-from typing import Optional, List, Annotated
+from typing import Optional, List, Annotated, Dict, Any
 from enum import Enum
 import re
-from datetime import datetime
+from datetime import datetime, date
 
 
 # User Schema
@@ -52,6 +52,21 @@ class ProductCreate(BaseModel):
     class Config:
         from_attributes = True
 
+class ProductImportRow(ProductCreate):
+    sku: str = Field(..., min_length=1, max_length=64)
+
+class ImportRowError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    errors: List[str]
+
+class ProductImportReport(BaseModel):
+    total_rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+
 class CategoryResponse(BaseModel):
     category_id: int
     name: str
@@ -72,6 +87,19 @@ class ProductImageResponse(BaseModel):
     image_url: str
     rank: float
 
+class RatingSummaryResponse(BaseModel):
+    average: float = 0
+    count: int = 0
+    histogram: Dict[int, int] = Field(default_factory=lambda: {star: 0 for star in range(1, 6)})
+
+    @classmethod
+    def from_attributes(cls, product):
+        return cls(
+            average=round(product.rating_avg or 0, 2),
+            count=product.rating_count or 0,
+            histogram={star: getattr(product, f"rating_{star}_count") or 0 for star in range(1, 6)}
+        )
+
 class ProductResponse(BaseModel):
     product_id: int
     name: Optional[str]
@@ -84,6 +112,7 @@ class ProductResponse(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     reviews: List = []
+    rating: Optional[RatingSummaryResponse] = None
     images: Optional[List[ProductImageResponse]] = None
     currency: Optional["CurrencyResponse"] = None
     category: Optional["CategoryResponse"] = None
@@ -126,6 +155,7 @@ class ProductResponse(BaseModel):
             created_at=product.created_at,
             updated_at=product.updated_at,
             reviews=[],
+            rating=RatingSummaryResponse.from_attributes(product),
             images=image_responses,
             category=category_response,
             currency=currency_response
@@ -135,6 +165,29 @@ class ProductResponse(BaseModel):
         from_attributes = True
 
 
+class ProductBatchResponse(BaseModel):
+    items: List[ProductResponse]
+    missing: List[int] = []
+
+class MerchantProductRow(BaseModel):
+    product_id: int
+    sku: Optional[str] = None
+    name: Optional[str] = None
+    price: Optional[float] = None
+    currency_code: Optional[str] = None
+    stock_quantity: Optional[int] = None
+    brand: Optional[str] = None
+    category_id: Optional[int] = None
+    status: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    images: Optional[List[ProductImageResponse]] = None
+
+class MerchantProductPageResponse(BaseModel):
+    items: List[MerchantProductRow]
+    next_cursor: Optional[str] = None
+
+
 class ImageRankUpdate(BaseModel):
     id: int
     rank: float  # 👈 Change from position to rank
@@ -158,6 +211,14 @@ class cpr(BaseModel):
     product_id: int
 
         
+class ReviewCreate(BaseModel):
+    rating: int = Field(..., ge=1, le=5, example=5)
+    comment: Optional[str] = Field(None, example="Great product!")
+
+class ReviewUpdate(BaseModel):
+    rating: Optional[int] = Field(None, ge=1, le=5, example=4)
+    comment: Optional[str] = None
+
 class ReviewResponse(BaseModel):
     id: int
     user_id: int
@@ -165,6 +226,41 @@ class ReviewResponse(BaseModel):
     comment: Optional[str] = None
 
 
+class ReviewAuthorResponse(BaseModel):
+    user_id: int
+    display_name: str
+
+class ReviewFeedItem(BaseModel):
+    id: int
+    rating: int
+    comment: Optional[str] = None
+    created_at: Optional[datetime] = None
+    author: ReviewAuthorResponse
+
+class ReviewPageResponse(BaseModel):
+    items: List[ReviewFeedItem]
+    next_cursor: Optional[str] = None
+
+
+class WishlistItemResponse(BaseModel):
+    product_id: int
+    name: Optional[str] = None
+    price: Optional[float] = None
+    currency_code: Optional[str] = None
+    status: str
+    added_at: Optional[datetime] = None
+
+class WishlistPageResponse(BaseModel):
+    items: List[WishlistItemResponse]
+    next_cursor: Optional[str] = None
+
+class WishlistContainsRequest(BaseModel):
+    product_ids: List[int] = Field(..., min_length=1, max_length=100, example=[1, 2, 3])
+
+class WishlistContainsResponse(BaseModel):
+    contains: Dict[int, bool]
+
+
 # Enum for order status
 class OrderStatus(str, Enum):
     pending = "pending"
@@ -208,6 +304,62 @@ class OrderItemResponse(OrderItemBase):
     class Config:
         from_attributes = True
 
+class ProductCardResponse(BaseModel):
+    product_id: int
+    name: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+
+class OrderHistoryItemResponse(BaseModel):
+    order_item_id: int
+    quantity: int
+    unit_price: float
+    total_price: float
+    product: ProductCardResponse
+
+class ShippingStatusResponse(BaseModel):
+    shipping_status: str
+    carrier: Optional[str] = None
+    tracking_number: Optional[str] = None
+    estimated_delivery_date: Optional[date] = None
+
+class OrderHistoryResponse(BaseModel):
+    order_id: int
+    total_amount: float
+    order_status: str
+    payment_status: str
+    created_at: Optional[datetime] = None
+    items: List[OrderHistoryItemResponse]
+    shipping: Optional[ShippingStatusResponse] = None
+
+class OrderHistoryPageResponse(BaseModel):
+    items: List[OrderHistoryResponse]
+    next_cursor: Optional[str] = None
+
+class SalesTotalsResponse(BaseModel):
+    revenue: float = 0
+    units: int = 0
+    orders: int = 0
+
+class SalesSeriesResponse(BaseModel):
+    days: List[date]
+    revenue: List[float]
+    units: List[int]
+    orders: List[int]
+
+class ProductSalesResponse(BaseModel):
+    product_id: int
+    name: Optional[str] = None
+    revenue: float
+    units: int
+    orders: int
+
+class MerchantSalesDashboardResponse(BaseModel):
+    start: date
+    end: date
+    totals: SalesTotalsResponse
+    series: SalesSeriesResponse
+    top_products: List[ProductSalesResponse]
+
 # Payment Schema
 class PaymentBase(BaseModel):
     order_id: int
@@ -246,3 +398,17 @@ class PasswordResetRequest(BaseModel):
 class ResetPasswordRequest(BaseModel):
     token: str = Field(..., example="eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...")
     new_password: str = Field(..., example="Secure@123")
+
+class SlowQueryResponse(BaseModel):
+    id: str
+    fingerprint: str
+    count: int
+    slow_count: int
+    total_ms: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    plan: Optional[Any] = None
+    plan_captured_at: Optional[float] = None
@@ -0,0 +1,328 @@
+"""
+Cache warming on startup, driven by recorded access stats.
+
+Every worker counts the product detail and listing requests it serves
+(AccessStatsMiddleware) and adds the counts to request_access_stats every
+ACCESS_STATS_FLUSH_SECONDS. A daily scheduler job halves the counts, so
+the table ranks what is popular now rather than in the past.
+
+On startup each worker runs a warm-up in the background:
+
+  1. loads categories and currencies into the reference cache,
+  2. loads the WARMUP_TOP_PRODUCTS most requested products, in batches,
+     which fills the product detail cache when it is enabled,
+  3. replays the WARMUP_TOP_LISTINGS most requested listing queries
+     through list_products, the query behind GET /products/.
+
+Steps 2 and 3 run against every read replica, or the primary when there
+are none, so their buffer caches hold the hot pages too. A recorded
+listing that no longer validates or fails to load is counted under
+"failed" and logged; it doesn't stop the warm-up. /ready answers
+503 until the warm-up finishes or WARMUP_BUDGET_SECONDS runs out, so a
+load balancer or Kubernetes readiness probe only sends traffic to warm
+workers. /health is not affected.
+"""
+import asyncio
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models import RequestAccessStat
+from app.services.product_cache import get_product_responses
+from app.services.product_listing import list_products
+from app.services.reference_data import get_categories, get_currencies
+from core.config import settings
+from core.database import engine, replicas
+from core.metrics import Counter, Gauge
+
+
+PRODUCT_DETAIL, PRODUCT_LISTING = "product_detail", "product_listing"
+
+PRODUCT_DETAIL_PATH = re.compile(r"^/products/(\d+)/product/view/?$")
+PRODUCT_LISTING_PATH = re.compile(r"^/products/?$")
+
+# get_products parameters and how to parse them back from a recorded key
+LISTING_PARAMS = {
+    "category_name": str,
+    "brand": str,
+    "min_price": float,
+    "max_price": float,
+    "sort_by": str,
+    "fields": str,
+    "limit": int,
+    "offset": int,
+}
+MAX_KEY_LENGTH = 500
+DETAIL_BATCH_SIZE = 100
+
+cache_warmup_duration_seconds = Gauge("cache_warmup_duration_seconds", "How long the startup warm-up took")
+cache_warmup_requests_total = Counter(
+    "cache_warmup_requests_total", "Queries replayed by the warm-up", ("kind", "outcome")
+)
+
+
+def listing_key(query_string: bytes) -> Optional[str]:
+    """Normalizes a listing query string so equivalent requests share a key; None if not worth recording."""
+    try:
+        params = sorted(
+            (name, value) for name, value in parse_qsl(query_string.decode("latin-1"))
+            if name in LISTING_PARAMS and value
+        )
+    except ValueError:
+        return None
+    key = urlencode(params)
+    return key if len(key) <= MAX_KEY_LENGTH else None
+
+
+# Recording
+
+class AccessRecorder:
+    """Per-worker hit counts since the last flush; new keys are dropped once max_keys are held."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, key: str):
+        with self._lock:
+            if key is None or (len(self._counts) >= self.max_keys and (kind, key) not in self._counts):
+                return
+            self._counts[(kind, key)] = self._counts.get((kind, key), 0) + 1
+
+    def drain(self) -> Dict[Tuple[str, str], int]:
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
+
+
+access_recorder = AccessRecorder(settings.ACCESS_STATS_MAX_KEYS)
+
+
+class AccessStatsMiddleware:
+    """Pure ASGI; counts successful GETs of the product detail and listing routes."""
+
+    def __init__(self, app, recorder: Optional[AccessRecorder] = None):
+        self.app = app
+        self.recorder = recorder or access_recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        detail = PRODUCT_DETAIL_PATH.match(path)
+        if detail:
+            kind, key = PRODUCT_DETAIL, detail.group(1)
+        elif PRODUCT_LISTING_PATH.match(path):
+            kind, key = PRODUCT_LISTING, listing_key(scope.get("query_string", b""))
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                self.recorder.record(kind, key)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def flush_access_stats(recorder: Optional[AccessRecorder] = None) -> int:
+    """Adds the recorded counts onto request_access_stats in one upsert. Returns the rows written."""
+    counts = (recorder or access_recorder).drain()
+    if not counts:
+        return 0
+
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        insert = postgresql_insert if connection.dialect.name == "postgresql" else sqlite_insert
+        table = RequestAccessStat.__table__
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=["kind", "key"],
+            set_={"hits": table.c.hits + statement.excluded.hits, "last_seen_at": statement.excluded.last_seen_at},
+        )
+        connection.execute(statement, [
+            {"kind": kind, "key": key, "hits": hits, "last_seen_at": now} for (kind, key), hits in counts.items()
+        ])
+    return len(counts)
+
+
+def decay_access_stats(db: Session):
+    """Halves every count and drops rows that reach zero or were not requested for ACCESS_STATS_RETAIN_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.ACCESS_STATS_RETAIN_DAYS)
+    db.execute(
+        update(RequestAccessStat)
+        .values(hits=RequestAccessStat.hits // 2)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(RequestAccessStat)
+        .where(or_(RequestAccessStat.hits <= 0, RequestAccessStat.last_seen_at < cutoff))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+class _AccessStatsFlusher(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="access-stats-flusher", daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                flush_access_stats()
+            except Exception as e:
+                print(f"Failed to flush access stats: {e}")
+
+
+_flusher: Optional[_AccessStatsFlusher] = None
+
+
+def start_access_stats_flusher():
+    global _flusher
+    if settings.ACCESS_STATS_ENABLED and _flusher is None:
+        _flusher = _AccessStatsFlusher(settings.ACCESS_STATS_FLUSH_SECONDS)
+        _flusher.start()
+
+
+def stop_access_stats_flusher():
+    global _flusher
+    if _flusher is not None:
+        _flusher.stopped.set()
+        try:
+            flush_access_stats()
+        except Exception as e:
+            print(f"Failed to flush access stats: {e}")
+        _flusher = None
+
+
+# Warming
+
+def top_requests(db: Session, kind: str, limit: int) -> List[str]:
+    if limit <= 0:
+        return []
+    return db.execute(
+        select(RequestAccessStat.key)
+        .filter(RequestAccessStat.kind == kind)
+        .order_by(RequestAccessStat.hits.desc())
+        .limit(limit)
+    ).scalars().all()
+
+
+def listing_params(key: str) -> dict:
+    return {name: LISTING_PARAMS[name](value) for name, value in parse_qsl(key) if name in LISTING_PARAMS}
+
+
+class CacheWarmer:
+    def __init__(self):
+        self.state = "pending"  # pending, warming, done, timed_out, failed or disabled
+        self.warmed = {"reference": 0, PRODUCT_DETAIL: 0, PRODUCT_LISTING: 0}
+        self.failed = {PRODUCT_LISTING: 0}
+        self.error: Optional[str] = None
+        self._started: Optional[float] = None
+        self._duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._cancelled = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        if self.state == "warming":
+            # A query stuck past the budget doesn't keep the worker out of rotation
+            return time.monotonic() - self._started >= settings.WARMUP_BUDGET_SECONDS
+        return self.state != "pending"
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "duration_seconds": round(self._duration, 3) if self._duration is not None else None,
+            "warmed": dict(self.warmed),
+            "failed": dict(self.failed),
+            "error": self.error,
+        }
+
+    def start(self):
+        """Starts warming in the background; call from the running event loop."""
+        if not settings.WARMUP_ENABLED:
+            self.state = "disabled"
+            return
+        self.state = "warming"
+        self._started = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(run_in_threadpool(self._run))
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._cancelled.set()
+            await asyncio.wait([self._task], timeout=5)
+
+    def _run(self):
+        deadline = self._started + settings.WARMUP_BUDGET_SECONDS
+        try:
+            finished = self.warm(deadline)
+            self.state = "done" if finished else "timed_out"
+        except Exception as e:
+            print(f"Cache warm-up failed: {e}")
+            self.error = str(e)
+            self.state = "failed"
+        self._duration = time.monotonic() - self._started
+        cache_warmup_duration_seconds.set((), self._duration)
+        print(f"Cache warm-up {self.state} in {self._duration:.2f}s: warmed {self.warmed}, failed {self.failed}")
+
+    def _out_of_time(self, deadline: float) -> bool:
+        return self._cancelled.is_set() or time.monotonic() >= deadline
+
+    def warm(self, deadline: float) -> bool:
+        """Runs the warm-up until done or the deadline; returns False if it ran out of time."""
+        targets = [replica.engine for replica in replicas.replicas if replica.healthy] or [engine]
+
+        with Session(bind=targets[0]) as db:
+            get_categories(db)
+            get_currencies(db)
+            self.warmed["reference"] = 2
+            product_ids = [int(key) for key in top_requests(db, PRODUCT_DETAIL, settings.WARMUP_TOP_PRODUCTS)]
+            listings = top_requests(db, PRODUCT_LISTING, settings.WARMUP_TOP_LISTINGS)
+
+        for target in targets:
+            with Session(bind=target) as db:
+                for offset in range(0, len(product_ids), DETAIL_BATCH_SIZE):
+                    if self._out_of_time(deadline):
+                        return False
+                    batch = product_ids[offset:offset + DETAIL_BATCH_SIZE]
+                    get_product_responses(db, batch)
+                    self.warmed[PRODUCT_DETAIL] += len(batch)
+                    cache_warmup_requests_total.inc((PRODUCT_DETAIL, "ok"), len(batch))
+
+                for key in listings:
+                    if self._out_of_time(deadline):
+                        return False
+                    try:
+                        list_products(db, **listing_params(key))
+                    except (HTTPException, ValueError, SQLAlchemyError) as e:
+                        # A recorded value the listing no longer accepts, or a query error
+                        db.rollback()
+                        print(f"Cache warm-up: listing '{key}' failed: {getattr(e, 'detail', e)}")
+                        self.failed[PRODUCT_LISTING] += 1
+                        cache_warmup_requests_total.inc((PRODUCT_LISTING, "failed"))
+                        continue
+                    self.warmed[PRODUCT_LISTING] += 1
+                    cache_warmup_requests_total.inc((PRODUCT_LISTING, "ok"))
+        return True
+
+
+cache_warmer = CacheWarmer()
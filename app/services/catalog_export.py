@@ -0,0 +1,117 @@
+"""
+Streaming export of the published catalog as NDJSON or CSV.
+
+Rows come from a server-side cursor (yield_per) inside one read-only
+REPEATABLE READ transaction on Postgres (a replica when configured), so the whole dump, including
+the per-batch image lookups, reflects a single snapshot no matter how
+long the client takes to read it. Memory is bounded by one batch.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, List
+
+from sqlalchemy import select
+
+from app.models import Product, ProductImages, Category
+from core.config import settings
+from core.database import read_engine
+
+
+EXPORT_FORMATS = {'ndjson', 'csv'}
+EXPORT_COLUMNS = [
+    'product_id', 'sku', 'name', 'description', 'price', 'currency_code', 'stock_quantity', 'brand',
+    'category_id', 'category_name', 'seller_id', 'rating_avg', 'rating_count', 'created_at', 'updated_at',
+    'image_urls',
+]
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is not None and not isinstance(value, (str, int, float, bool, list)):
+        return str(value)  # Decimal
+    return value
+
+
+def _encode_batch(records: List[dict], file_format: str, include_header: bool) -> bytes:
+    if file_format == 'ndjson':
+        return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode()
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(EXPORT_COLUMNS)
+    for record in records:
+        writer.writerow([
+            "|".join(record[column]) if column == 'image_urls' else record[column]
+            for column in EXPORT_COLUMNS
+        ])
+    return buffer.getvalue().encode()
+
+
+def iter_catalog_export(file_format: str, compress: bool = False, batch_size: int = None) -> Iterator[bytes]:
+    batch_size = batch_size or settings.CATALOG_EXPORT_BATCH_SIZE
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+
+    query = (
+        select(
+            Product.product_id,
+            Product.sku,
+            Product.name,
+            Product.description,
+            Product.price,
+            Product.currency_code,
+            Product.stock_quantity,
+            Product.brand,
+            Product.category_id,
+            Category.name.label("category_name"),
+            Product.seller_id,
+            Product.rating_avg,
+            Product.rating_count,
+            Product.created_at,
+            Product.updated_at,
+        )
+        .outerjoin(Category, Category.category_id == Product.category_id)
+        .filter(Product.status == 'published')
+        .order_by(Product.product_id)
+    )
+
+    with read_engine().connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection = connection.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+
+        with connection.begin():
+            result = connection.execution_options(yield_per=batch_size).execute(query)
+            include_header = file_format == 'csv'
+
+            for rows in result.partitions():
+                images = {}
+                for image in connection.execute(
+                    select(ProductImages.product_id, ProductImages.image_url)
+                    .filter(ProductImages.product_id.in_([row.product_id for row in rows]))
+                    .order_by(ProductImages.product_id, ProductImages.rank)
+                ):
+                    images.setdefault(image.product_id, []).append(image.image_url)
+
+                records = [
+                    {
+                        **{key: _export_value(value) for key, value in row._mapping.items()},
+                        'image_urls': images.get(row.product_id, []),
+                    }
+                    for row in rows
+                ]
+
+                chunk = _encode_batch(records, file_format, include_header)
+                include_header = False
+                yield compressor.compress(chunk) if compressor else chunk
+
+            if include_header:
+                # Empty catalog: still emit a valid CSV
+                chunk = _encode_batch([], file_format, include_header)
+                yield compressor.compress(chunk) if compressor else chunk
+
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,135 @@
+"""
+Jobs run by core.scheduler.
+
+Periodic maintenance (token purges, partition upkeep, sales rollup repair,
+access stats decay, job history) and the emails sent on behalf of auth
+requests. Email tasks get only IDs and addresses in their payload; the
+token is created when the email is sent, so no usable link is ever stored
+in queued_jobs.
+
+Importing this module registers the jobs; main.py and the standalone
+worker (python -m app.services.scheduler_worker) both do.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
+from app.models import User, VerificationToken, PasswordResetToken, QueuedJob
+from app.services.cache_warmup import decay_access_stats
+from app.services.refresh_tokens import purge_expired_refresh_tokens
+from app.services.sales_rollups import backfill_sales_rollups
+from app.services.token_cleanup import purge_expired_tokens, maintain_partitions
+from core.auth import create_verification_token, create_password_reset_token, token_digest
+from core.config import settings
+from core.database import SessionLocal, engine
+from core.email_utils import send_verification_email, send_reset_password_email
+from core.scheduler import scheduler
+
+
+class EmailNotSent(Exception):
+    pass
+
+
+@scheduler.periodic("purge_expired_tokens", every=timedelta(minutes=settings.TOKEN_PURGE_INTERVAL_MINUTES))
+def purge_tokens():
+    maintain_partitions(engine)
+    db = SessionLocal()
+    try:
+        purge_expired_tokens(db)
+    finally:
+        db.close()
+
+
+@scheduler.periodic("purge_expired_refresh_tokens", every=timedelta(hours=1))
+def purge_refresh_tokens():
+    db = SessionLocal()
+    try:
+        purge_expired_refresh_tokens(db)
+    finally:
+        db.close()
+
+
+@scheduler.periodic("repair_sales_rollups", every=timedelta(days=1))
+def repair_sales_rollups():
+    """Rebuilds the last few days, in case an order was changed outside the ORM."""
+    db = SessionLocal()
+    try:
+        backfill_sales_rollups(db, since=datetime.utcnow().date() - timedelta(days=2))
+    finally:
+        db.close()
+
+
+@scheduler.periodic("decay_access_stats", every=timedelta(days=1))
+def decay_request_access_stats():
+    db = SessionLocal()
+    try:
+        decay_access_stats(db)
+    finally:
+        db.close()
+
+
+@scheduler.periodic("prune_job_history", every=timedelta(days=1))
+def prune_job_history():
+    cutoff = datetime.utcnow() - timedelta(days=settings.JOB_HISTORY_RETAIN_DAYS)
+    db = SessionLocal()
+    try:
+        db.execute(
+            delete(QueuedJob)
+            .where(QueuedJob.status.in_(("done", "failed")), QueuedJob.finished_at < cutoff)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def store_reset_token(db, token: str, email: str):
+    """
+    Deactivates any existing reset token and stores a new one.
+    """
+    # Deactivate any previous reset token
+    db.query(PasswordResetToken).filter(PasswordResetToken.email == email).update({"is_used": True})
+
+    # Store the new reset token
+    reset_token = PasswordResetToken(token_digest=token_digest(token), email=email)
+    db.add(reset_token)
+    db.commit()
+
+
+@scheduler.task("send_verification_email")
+def send_verification(user_id: int):
+    """Replaces the user's verification token and emails the new link."""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.user_id == user_id).first()
+        if not user or user.is_active:
+            return
+
+        db.query(VerificationToken).filter(
+            VerificationToken.user_id == user.user_id,
+            VerificationToken.is_active == True  # noqa: E712
+        ).update({"is_active": False})
+
+        token = create_verification_token(user.email)
+        db.add(VerificationToken(token_digest=token_digest(token), user_id=user.user_id, email=user.email))
+        db.commit()
+
+        success, message = send_verification_email(user.email, token)
+        if not success:
+            raise EmailNotSent(message)
+    finally:
+        db.close()
+
+
+@scheduler.task("send_password_reset_email")
+def send_password_reset(email: str):
+    db = SessionLocal()
+    try:
+        token = create_password_reset_token(email)
+        store_reset_token(db, token, email)
+
+        success, message = send_reset_password_email(email, token)
+        if not success:
+            raise EmailNotSent(message)
+    finally:
+        db.close()
@@ -0,0 +1,90 @@
+"""
+Per-worker cache of published product detail responses.
+
+Disabled unless PRODUCT_CACHE_TTL_SECONDS is set. Writes in this worker
+invalidate their product immediately; other workers may serve the old
+version until the TTL expires, so keep it short.
+
+A read replica may not have replayed a write yet when the next request
+misses the cache, so for READ_YOUR_WRITES_SECONDS after an invalidation
+responses read from a replica are served but not cached.
+"""
+import time
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models import Product
+from app.schemas import ProductResponse
+from core.cache import TTLCache
+from core.config import settings
+from core.database import engine, replicas
+
+
+# Everything ProductResponse.from_attributes touches, loaded in two queries
+PRODUCT_RESPONSE_OPTIONS = [
+    joinedload(Product.category),
+    joinedload(Product.currency),
+    selectinload(Product.product_images),
+]
+
+product_detail_cache = TTLCache(
+    maxsize=settings.PRODUCT_CACHE_MAX_ITEMS, ttl=settings.PRODUCT_CACHE_TTL_SECONDS, name="product_detail"
+)
+
+
+# Products invalidated within the read-your-writes window
+_recently_written = TTLCache(maxsize=settings.PRODUCT_CACHE_MAX_ITEMS, ttl=settings.READ_YOUR_WRITES_SECONDS)
+_all_written_until = 0.0
+
+
+def invalidate_product(product_id: int):
+    product_detail_cache.delete(product_id)
+    if replicas:
+        _recently_written.set(product_id, True)
+
+
+def invalidate_all_products():
+    global _all_written_until
+    product_detail_cache.clear()
+    if replicas:
+        _all_written_until = time.monotonic() + settings.READ_YOUR_WRITES_SECONDS
+
+
+def _written_recently(product_id: int) -> bool:
+    return time.monotonic() < _all_written_until or _recently_written.get(product_id) is not None
+
+
+def get_product_responses(db: Session, product_ids: Iterable[int]) -> Dict[int, ProductResponse]:
+    """
+    Published products by ID. Cache hits are served from memory; misses cost one
+    product query (category and currency joined) plus one image query in total.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    responses = {}
+    misses: List[int] = []
+
+    for product_id in product_ids:
+        cached = product_detail_cache.get(product_id) if product_detail_cache.enabled else None
+        if cached is not None:
+            responses[product_id] = cached
+        else:
+            misses.append(product_id)
+
+    if misses:
+        statement = (
+            select(Product)
+            .options(*PRODUCT_RESPONSE_OPTIONS)
+            .filter(Product.product_id.in_(misses), Product.status == 'published')
+        )
+        from_replica = db.get_bind(clause=statement) is not engine
+        products = db.execute(statement).unique().scalars().all()
+
+        for product in products:
+            response = ProductResponse.from_attributes(product)
+            if not (from_replica and _written_recently(product.product_id)):
+                product_detail_cache.set(product.product_id, response)
+            responses[product.product_id] = response
+
+    return responses
@@ -0,0 +1,119 @@
+"""
+Sparse fieldsets for product responses (?fields=name,price,images).
+
+Only the requested columns are selected (load_only), relationships that
+are not requested are never loaded, and the payload contains only the
+requested keys plus product_id. The serializer touches nothing but the
+requested attributes, so deferred columns never trigger lazy loads.
+"""
+from typing import Optional, Set, List
+
+from fastapi import HTTPException
+from sqlalchemy.orm import load_only, selectinload, noload
+
+from app.models import Product, ProductImages
+from app.schemas import ProductResponse, CategoryResponse, CurrencyResponse, ProductImageResponse, RatingSummaryResponse
+
+
+RATING_COLUMNS = [Product.rating_avg, Product.rating_count] + [getattr(Product, f"rating_{star}_count") for star in range(1, 6)]
+
+# Response field -> columns it needs
+PRODUCT_FIELD_COLUMNS = {
+    "name": [Product.name],
+    "description": [Product.description],
+    "price": [Product.price],
+    "stock_quantity": [Product.stock_quantity],
+    "brand": [Product.brand],
+    "status": [Product.status],
+    "seller_id": [Product.seller_id],
+    "created_at": [Product.created_at],
+    "updated_at": [Product.updated_at],
+    "rating": RATING_COLUMNS,
+    "currency": [Product.currency_code],
+    "category": [Product.category_id],
+    "images": [],
+    "reviews": [],
+}
+
+
+def parse_product_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    """
+    None means the full response. Unknown names are rejected with a 400.
+    """
+    if fields is None:
+        return None
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    requested.discard("product_id")
+
+    unknown = requested - PRODUCT_FIELD_COLUMNS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed values: {', '.join(PRODUCT_FIELD_COLUMNS)}",
+        )
+
+    return requested
+
+
+def product_load_options(fields: Set[str]) -> List:
+    columns = [Product.product_id]
+    for field in fields:
+        columns.extend(PRODUCT_FIELD_COLUMNS[field])
+
+    options = [load_only(*columns)]
+    if "images" in fields:
+        options.append(
+            selectinload(Product.product_images).load_only(ProductImages.id, ProductImages.image_url, ProductImages.rank)
+        )
+    else:
+        options.append(noload(Product.product_images))
+    if "category" in fields:
+        options.append(selectinload(Product.category))
+    if "currency" in fields:
+        options.append(selectinload(Product.currency))
+
+    return options
+
+
+def serialize_product_fields(product: Product, fields: Set[str], thumbnail_only: bool = False) -> dict:
+    payload = {"product_id": product.product_id}
+
+    # Canonical order, so payloads don't depend on the order fields were requested in
+    for field in (field for field in PRODUCT_FIELD_COLUMNS if field in fields):
+        if field == "price":
+            payload["price"] = float(product.price) if product.price else None
+        elif field == "rating":
+            payload["rating"] = RatingSummaryResponse.from_attributes(product).model_dump()
+        elif field == "category":
+            payload["category"] = CategoryResponse(
+                category_id=product.category.category_id,
+                name=product.category.name
+            ).model_dump() if product.category else None
+        elif field == "currency":
+            payload["currency"] = CurrencyResponse(
+                code=product.currency.code,
+                name=product.currency.name,
+                symbol=product.currency.symbol
+            ).model_dump() if product.currency else None
+        elif field == "images":
+            images = sorted(product.product_images, key=lambda img: img.rank)
+            if thumbnail_only:
+                images = images[:1]
+            payload["images"] = [
+                ProductImageResponse(id=image.id, image_url=image.image_url, rank=image.rank).model_dump()
+                for image in images
+            ]
+        elif field == "reviews":
+            payload["reviews"] = []
+        else:
+            payload[field] = getattr(product, field)
+
+    return payload
+
+
+def project_product_response(response: ProductResponse, fields: Set[str]) -> dict:
+    """
+    Narrows an already built (e.g. cached) full response.
+    """
+    return response.model_dump(include=fields | {"product_id"})
@@ -0,0 +1,201 @@
+"""
+Streaming bulk product import.
+
+Rows are read one at a time from the (disk-spooled) upload, validated
+against ProductImportRow, and upserted on (seller_id, sku) with one
+multi-row INSERT ... ON CONFLICT DO UPDATE per batch. Each batch is
+committed on its own, so a bad batch never rolls back earlier ones and
+memory stays bounded by the batch size and the error cap.
+"""
+import csv
+import io
+import json
+from typing import BinaryIO, Iterator, Optional, Tuple, List
+
+from pydantic import ValidationError
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import Product, Category, Currency
+from app.schemas import ProductImportRow, ImportRowError, ProductImportReport
+from core.config import settings
+
+
+IMPORT_FORMATS = {'csv', 'ndjson'}
+UPSERT_COLUMNS = ('name', 'description', 'price', 'stock_quantity', 'category_id', 'brand', 'status', 'currency_code')
+
+
+def detect_import_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    filename = (filename or "").lower()
+    content_type = (content_type or "").lower()
+
+    if filename.endswith(".csv") or "csv" in content_type:
+        return 'csv'
+    if filename.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return 'ndjson'
+    return None
+
+
+def iter_import_records(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yields (row_number, record, parse_error) lazily from the binary upload.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if file_format == 'csv':
+            reader = csv.DictReader(text)
+            for row_number, record in enumerate(reader, start=1):
+                # Empty cells mean "not provided"; extra unnamed cells are ignored
+                yield row_number, {key: (value if value != "" else None) for key, value in record.items() if key is not None}, None
+        else:
+            row_number = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                row_number += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield row_number, None, f"Invalid JSON: {e.msg}"
+                    continue
+                if not isinstance(record, dict):
+                    yield row_number, None, "Each line must be a JSON object"
+                    continue
+                yield row_number, record, None
+    except UnicodeDecodeError:
+        yield 0, None, "File must be UTF-8 encoded"
+    finally:
+        # Leave the underlying upload open for FastAPI to close
+        text.detach()
+
+
+def _validate_record(record: dict) -> Tuple[Optional[ProductImportRow], List[str]]:
+    try:
+        row = ProductImportRow.model_validate(record)
+    except ValidationError as e:
+        return None, [f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()]
+
+    # Same rules update_product applies to single edits
+    errors = []
+    if row.price is not None and row.price <= 0:
+        errors.append("price: Price must be greater than 0")
+    if row.stock_quantity < 0:
+        errors.append("stock_quantity: Stock quantity cannot be negative")
+    if row.status not in {'draft', 'published'}:
+        errors.append(f"status: Invalid status '{row.status}'. Allowed values: draft, published")
+
+    return (row if not errors else None), errors
+
+
+class _ReportBuilder:
+    def __init__(self, max_errors: int):
+        self.report = ProductImportReport()
+        self.max_errors = max_errors
+
+    def fail(self, row_number: int, sku: Optional[str], errors: List[str]):
+        self.report.failed += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append(ImportRowError(row=row_number, sku=sku, errors=errors))
+        else:
+            self.report.errors_truncated = True
+
+
+def _upsert_batch(db: Session, seller_id: int, batch: List[Tuple[int, ProductImportRow]], builder: _ReportBuilder):
+    category_ids = {row.category_id for _, row in batch if row.category_id is not None}
+    currency_codes = {row.currency_code for _, row in batch if row.currency_code is not None}
+
+    known_categories = set(db.execute(
+        select(Category.category_id).filter(Category.category_id.in_(category_ids))
+    ).scalars()) if category_ids else set()
+    known_currencies = set(db.execute(
+        select(Currency.code).filter(Currency.code.in_(currency_codes))
+    ).scalars()) if currency_codes else set()
+
+    # A SKU may appear only once per INSERT ... ON CONFLICT, so repeats are merged
+    # with the later row's non-empty fields winning, exactly as across batches
+    values_by_sku = {}
+    for row_number, row in batch:
+        errors = []
+        if row.category_id is not None and row.category_id not in known_categories:
+            errors.append("category_id: Category not found")
+        if row.currency_code is not None and row.currency_code not in known_currencies:
+            errors.append(f"currency_code: Currency '{row.currency_code}' not found")
+        if errors:
+            builder.fail(row_number, row.sku, errors)
+            continue
+
+        values = {
+            "seller_id": seller_id,
+            "sku": row.sku,
+            **{column: getattr(row, column) for column in UPSERT_COLUMNS},
+        }
+        if row.sku in values_by_sku:
+            previous = values_by_sku[row.sku][1]
+            values = {key: value if value is not None else previous[key] for key, value in values.items()}
+
+        values_by_sku[row.sku] = (row_number, values)
+
+    if not values_by_sku:
+        return
+
+    products = Product.__table__
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert(products).values([values for _, values in values_by_sku.values()])
+    # Like update_product, fields left empty keep their current value
+    statement = statement.on_conflict_do_update(
+        index_elements=["seller_id", "sku"],
+        set_={
+            **{column: func.coalesce(statement.excluded[column], products.c[column]) for column in UPSERT_COLUMNS},
+            "updated_at": func.now(),
+        },
+    )
+
+    try:
+        db.execute(statement)
+        db.commit()
+        builder.report.imported += len(values_by_sku)
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Database error while importing products: {e}")
+        for row_number, values in values_by_sku.values():
+            builder.fail(row_number, values["sku"], ["Database error while saving this batch"])
+
+
+def import_products(
+    db: Session,
+    seller_id: int,
+    file: BinaryIO,
+    file_format: str,
+    batch_size: Optional[int] = None,
+    max_errors: Optional[int] = None,
+) -> ProductImportReport:
+    batch_size = batch_size or settings.PRODUCT_IMPORT_BATCH_SIZE
+    builder = _ReportBuilder(max_errors if max_errors is not None else settings.PRODUCT_IMPORT_MAX_ERRORS)
+    batch = []
+
+    for row_number, record, parse_error in iter_import_records(file, file_format):
+        builder.report.total_rows += 1 if row_number else 0
+
+        if parse_error:
+            builder.fail(row_number, None, [parse_error])
+            continue
+
+        row, errors = _validate_record(record)
+        if errors:
+            sku = record.get("sku")
+            builder.fail(row_number, str(sku) if sku is not None else None, errors)
+            continue
+
+        batch.append((row_number, row))
+        if len(batch) >= batch_size:
+            _upsert_batch(db, seller_id, batch, builder)
+            batch = []
+
+    if batch:
+        _upsert_batch(db, seller_id, batch, builder)
+
+    builder.report.errors.sort(key=lambda error: error.row)
+    return builder.report
@@ -0,0 +1,130 @@
+"""
+The public product listing (GET /products/): published products filtered by
+category, brand and price, optionally sorted by rating, one page at a time.
+
+Shared by the route and the startup cache warm-up, which replays the most
+requested listings against every database so their pages are in memory.
+"""
+from typing import List, Optional, Union
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import Product
+from app.schemas import ProductResponse, CategoryResponse, CurrencyResponse, ProductImageResponse, RatingSummaryResponse
+from app.services.product_fields import parse_product_fields, product_load_options, serialize_product_fields
+
+
+ALLOWED_SORTS = {'rating'}
+
+
+def _listing_response(product: Product) -> ProductResponse:
+    """Listing card: every field, but only the first image."""
+    first_image_url = None
+    if product.product_images:
+        first_image = min(product.product_images, key=lambda img: img.rank)
+        first_image_url = first_image.image_url
+
+    category_response = None
+    if product.category:
+        category_response = CategoryResponse(
+            category_id=product.category.category_id,
+            name=product.category.name
+        )
+
+    currency_response = None
+    if product.currency:
+        currency_response = CurrencyResponse(
+            code=product.currency.code,
+            name=product.currency.name,
+            symbol=product.currency.symbol
+        )
+
+    return ProductResponse(
+        product_id=product.product_id,
+        name=product.name,
+        description=product.description,
+        price=float(product.price) if product.price else None,
+        stock_quantity=product.stock_quantity,
+        brand=product.brand,
+        status=product.status,
+        seller_id=product.seller_id,
+        created_at=product.created_at,
+        updated_at=product.updated_at,
+        reviews=[],
+        rating=RatingSummaryResponse.from_attributes(product),
+        images=[ProductImageResponse(id=0, image_url=first_image_url, rank=0)] if first_image_url else [],
+        category=category_response,
+        currency=currency_response,
+    )
+
+
+def list_products(
+    db: Session,
+    category_name: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort_by: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: int = 10,
+    offset: int = 0,
+) -> Union[List[ProductResponse], List[dict]]:
+    """
+    One page of the listing, possibly empty. With fields set, the items are
+    plain dicts holding only those fields (images is then the thumbnail only).
+    Raises HTTPException(400) for invalid parameters.
+    """
+    if limit <= 0 or limit > 100:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Offset must be 0 or greater")
+
+    requested_fields = parse_product_fields(fields)
+
+    if requested_fields is not None:
+        load_options = product_load_options(requested_fields)
+    else:
+        load_options = [
+            selectinload(Product.product_images),
+            selectinload(Product.currency),
+            selectinload(Product.category)
+        ]
+
+    query = (
+        select(Product)
+        .options(*load_options)
+        .filter(Product.status == 'published')
+    )
+
+    if category_name:
+        query = query.join(Product.category).filter(Product.category.has(name=category_name))
+
+    if brand:
+        query = query.filter(Product.brand == brand)
+
+    if min_price is not None:
+        if min_price < 0:
+            raise HTTPException(status_code=400, detail="Minimum price must be non-negative")
+        query = query.filter(Product.price >= min_price)
+
+    if max_price is not None:
+        if max_price < 0:
+            raise HTTPException(status_code=400, detail="Maximum price must be non-negative")
+        query = query.filter(Product.price <= max_price)
+
+    if sort_by is not None:
+        if sort_by not in ALLOWED_SORTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sort_by '{sort_by}'. Allowed values: {', '.join(ALLOWED_SORTS)}",
+            )
+        # Served by ix_products_status_rating, no aggregate over reviews
+        query = query.order_by(Product.rating_avg.desc(), Product.rating_count.desc(), Product.product_id)
+
+    products = db.execute(query.offset(offset).limit(limit)).scalars().all()
+
+    if requested_fields is not None:
+        return [serialize_product_fields(product, requested_fields, thumbnail_only=True) for product in products]
+    return [_listing_response(product) for product in products]
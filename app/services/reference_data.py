@@ -0,0 +1,39 @@
+"""
+Per-worker cache of reference data: categories and currencies.
+
+Both change only through migrations or by hand, so they are served from
+memory for REFERENCE_CACHE_TTL_SECONDS (0 disables the cache). The startup
+warm-up loads them before the worker reports ready.
+"""
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Category, Currency
+from app.schemas import CategoryResponse, CurrencyResponse
+from core.cache import TTLCache
+from core.config import settings
+
+
+reference_cache = TTLCache(maxsize=2, ttl=settings.REFERENCE_CACHE_TTL_SECONDS, name="reference_data")
+
+
+def get_categories(db: Session) -> List[CategoryResponse]:
+    categories = reference_cache.get("categories") if reference_cache.enabled else None
+    if categories is None:
+        categories = [CategoryResponse.model_validate(category) for category in db.execute(select(Category)).scalars()]
+        reference_cache.set("categories", categories)
+    return categories
+
+
+def get_currencies(db: Session) -> List[CurrencyResponse]:
+    currencies = reference_cache.get("currencies") if reference_cache.enabled else None
+    if currencies is None:
+        currencies = [CurrencyResponse.model_validate(currency) for currency in db.execute(select(Currency)).scalars()]
+        reference_cache.set("currencies", currencies)
+    return currencies
+
+
+def invalidate_reference_data():
+    reference_cache.clear()
@@ -0,0 +1,186 @@
+"""
+Refresh token families: rotation on every use, reuse detection and revocation.
+
+Every refresh token is a row in refresh_tokens keyed by its jti. A login
+starts a family; each refresh marks the presented token used and issues
+the next one in the same family. Presenting a used token again means a
+copy leaked, so the whole family is revoked and both holders have to log
+in again.
+
+A refresh is one conditional UPDATE on the primary key, which also makes
+it atomic across workers; the family is only read when that UPDATE misses.
+"""
+import argparse
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from jose import jwt, JWTError
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import Session
+
+from app.models import RefreshToken, User
+from core.auth import create_refresh_token
+from core.config import settings
+
+
+logger = logging.getLogger("app.auth")
+
+
+def _invalid_token():
+    return HTTPException(status_code=401, detail="Invalid refresh token")
+
+
+def _new_token(db: Session, user: User, family_id: str) -> tuple[str, RefreshToken]:
+    jti = uuid.uuid4().hex
+    expires_at = datetime.utcnow().replace(microsecond=0) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    row = RefreshToken(jti=jti, family_id=family_id, user_id=user.user_id, expires_at=expires_at)
+    db.add(row)
+    token = create_refresh_token({"sub": user.email, "uid": user.user_id, "jti": jti, "fam": family_id, "exp": expires_at})
+    return token, row
+
+
+def issue_refresh_token(db: Session, user: User) -> str:
+    """Starts a new family for a fresh login."""
+    token, _ = _new_token(db, user, uuid.uuid4().hex)
+    db.commit()
+    return token
+
+
+def decode_refresh_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, settings.REFRESH_SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise _invalid_token()
+
+    if not payload.get("sub") or not payload.get("jti") or not payload.get("fam"):
+        raise _invalid_token()
+    return payload
+
+
+def _active_row_filter(now: datetime):
+    return (
+        RefreshToken.used_at.is_(None),
+        RefreshToken.revoked_at.is_(None),
+        RefreshToken.expires_at > now,
+    )
+
+
+def revoke_family(db: Session, family_id: str) -> int:
+    now = datetime.utcnow()
+    active = db.execute(
+        select(RefreshToken.jti).filter(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+    ).scalars().all()
+    if active:
+        db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+        )
+    db.commit()
+    return len(active)
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> int:
+    """
+    Revokes every family of the user, e.g. on password reset. Leaves the
+    commit to the caller so it lands with the change that caused it.
+    """
+    active = db.execute(
+        select(RefreshToken.jti).filter(RefreshToken.user_id == user_id, *_active_row_filter(datetime.utcnow()))
+    ).scalars().all()
+    if active:
+        db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+    return len(active)
+
+
+def rotate_refresh_token(db: Session, token: str) -> tuple[User, str]:
+    """
+    Consumes a refresh token and returns its user with the next token of the
+    family. Raises 401 for unknown, expired or revoked tokens, and revokes the
+    family when an already used token comes back.
+    """
+    payload = decode_refresh_token(token)
+    jti, family_id = payload["jti"], payload["fam"]
+    now = datetime.utcnow()
+
+    # Single primary-key update
+    consumed = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == jti, *_active_row_filter(now))
+        .values(used_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if not consumed:
+        db.rollback()
+        row = db.get(RefreshToken, jti)
+        if row is not None and row.used_at is not None and row.revoked_at is None:
+            revoked = revoke_family(db, row.family_id)
+            logger.warning(
+                "Refresh token reuse detected for user %s, family %s; revoked %d token(s)",
+                row.user_id, row.family_id, revoked,
+            )
+        raise _invalid_token()
+
+    user = db.get(User, payload.get("uid")) if payload.get("uid") else None
+    if user is None or user.email != payload["sub"] or not user.is_active:
+        db.rollback()
+        raise _invalid_token()
+
+    new_token, row = _new_token(db, user, family_id)
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == jti)
+        .values(replaced_by=row.jti)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return user, new_token
+
+
+def purge_expired_refresh_tokens(db: Session, batch_size: int = None, retain_days: int = 0) -> int:
+    """
+    Deletes tokens that expired more than retain_days ago, batch_size rows per
+    transaction so the table is never locked for long. Used and revoked rows
+    are kept until they expire so reuse can still be detected.
+    """
+    batch_size = batch_size or settings.REFRESH_TOKEN_PURGE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=retain_days)
+    deleted = 0
+    while True:
+        batch = db.execute(
+            select(RefreshToken.jti).filter(RefreshToken.expires_at <= cutoff).limit(batch_size)
+        ).scalars().all()
+        if not batch:
+            break
+        db.execute(delete(RefreshToken).where(RefreshToken.jti.in_(batch)).execution_options(synchronize_session=False))
+        db.commit()
+        deleted += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    return deleted
+
+
+if __name__ == "__main__":
+    from core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the refresh token store")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    purge_parser = subcommands.add_parser("purge", help="Delete expired refresh tokens in batches")
+    purge_parser.add_argument("--batch-size", type=int, default=None)
+    purge_parser.add_argument("--retain-days", type=int, default=0, help="Keep expired rows this many days for audits")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        deleted = purge_expired_refresh_tokens(db, batch_size=args.batch_size, retain_days=args.retain_days)
+        print(f"Deleted {deleted} expired refresh token(s)")
+    finally:
+        db.close()
@@ -0,0 +1,266 @@
+"""
+Daily sales rollups per seller and per product.
+
+An order counts towards sales once its payment has completed, and stops
+counting if it is later cancelled or returned. Every flush that moves an
+order across that line applies a +/- delta to the rollup rows for the
+order's day, so the merchant dashboard never aggregates order_items live.
+
+Rebuild the rollups from the orders tables (e.g. after importing orders
+with raw SQL) with:
+
+    python -m app.services.sales_rollups backfill [--since YYYY-MM-DD]
+"""
+import argparse
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import event, select, delete, func, and_, inspect, Date
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models import Order, OrderItem, Product, SellerDailySales, ProductDailySales
+
+
+UNCOUNTED_ORDER_STATUSES = ('cancelled', 'returned')
+ROLLUP_COUNTERS = ("units", "revenue", "order_count")
+
+
+def order_counts_towards_sales(order_status: Optional[str], payment_status: Optional[str]) -> bool:
+    return payment_status == 'completed' and order_status not in UNCOUNTED_ORDER_STATUSES
+
+
+def _upsert(connection, model, conflict_columns: list, row: dict):
+    """
+    INSERT ... ON CONFLICT DO UPDATE that adds the row's counters onto the existing ones.
+    """
+    insert = postgresql_insert if connection.dialect.name == "postgresql" else sqlite_insert
+    table = model.__table__
+    statement = insert(table).values(**row)
+    statement = statement.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={column: table.c[column] + statement.excluded[column] for column in ROLLUP_COUNTERS},
+    )
+    connection.execute(statement)
+
+
+def _order_lines(connection, order_id: int):
+    """
+    One row per product in the order: (product_id, seller_id, units, revenue, created_at).
+    """
+    return connection.execute(
+        select(
+            OrderItem.product_id,
+            Product.seller_id,
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.total_price),
+            Order.created_at,
+        )
+        .join(Order, Order.order_id == OrderItem.order_id)
+        .join(Product, Product.product_id == OrderItem.product_id)
+        .filter(OrderItem.order_id == order_id)
+        .group_by(OrderItem.product_id, Product.seller_id, Order.created_at)
+    ).all()
+
+
+def apply_order_to_rollups(connection, lines, sign: int):
+    """
+    Adds (sign=1) or removes (sign=-1) an order's lines from the rollups.
+    """
+    seller_totals = {}
+    for product_id, seller_id, units, revenue, created_at in lines:
+        order_day = (created_at or datetime.utcnow()).date()
+        units = int(units or 0)
+        revenue = Decimal(revenue or 0)
+
+        _upsert(connection, ProductDailySales, ["product_id", "day"], {
+            "product_id": product_id,
+            "day": order_day,
+            "seller_id": seller_id,
+            "units": sign * units,
+            "revenue": sign * revenue,
+            "order_count": sign,
+        })
+
+        totals = seller_totals.setdefault((seller_id, order_day), [0, Decimal(0)])
+        totals[0] += units
+        totals[1] += revenue
+
+    for (seller_id, order_day), (units, revenue) in seller_totals.items():
+        _upsert(connection, SellerDailySales, ["seller_id", "day"], {
+            "seller_id": seller_id,
+            "day": order_day,
+            "units": sign * units,
+            "revenue": sign * revenue,
+            "order_count": sign,
+        })
+
+
+def _previous_value(order: Order, attribute: str):
+    history = inspect(order).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(order, attribute)
+
+
+def _counted_before(order: Order) -> bool:
+    return order_counts_towards_sales(
+        _previous_value(order, "order_status"),
+        _previous_value(order, "order_payment_status"),
+    )
+
+
+def _orders_with_changed_items(session) -> list:
+    """
+    Persistent orders whose items are added, edited or removed in this flush.
+    """
+    order_ids = set()
+    for item in [*session.new, *session.dirty, *session.deleted]:
+        if not isinstance(item, OrderItem):
+            continue
+        history = inspect(item).attrs.order_id.history
+        order_ids.update(order_id for order_id in history.sum() if order_id is not None)
+        # Items appended through order.order_items have no order_id until the flush
+        order = item.__dict__.get("order")
+        if order is not None and order not in session.new:
+            order_ids.add(order.order_id)
+
+    orders = [session.get(Order, order_id) for order_id in order_ids]
+    return [order for order in orders if order is not None and order not in session.new]
+
+
+@event.listens_for(Session, "before_flush")
+def _snapshot_counted_orders(session, flush_context, instances):
+    """
+    Reads the lines of every counted order this flush will stop counting or whose
+    items it changes, while the database still holds what the rollups were built from.
+    """
+    changed_items = _orders_with_changed_items(session)
+    deleted_orders = [obj for obj in session.deleted if isinstance(obj, Order)]
+    status_changes = [
+        obj for obj in session.dirty
+        if isinstance(obj, Order) and obj not in session.deleted
+        and not order_counts_towards_sales(obj.order_status, obj.order_payment_status)
+    ]
+
+    snapshots = {}
+    for order in {*changed_items, *deleted_orders, *status_changes}:
+        if order.order_id is not None and _counted_before(order):
+            snapshots[order.order_id] = _order_lines(session.connection(), order.order_id)
+
+    session.info["sales_rollup_snapshots"] = snapshots
+    session.info["sales_rollup_changed_items"] = [order for order in changed_items if order not in session.deleted]
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_sales_rollups(session, flush_context):
+    """
+    Runs after the flush has written the rows but while new/dirty/deleted and
+    attribute history still describe the flush, so transitions can be detected.
+    A counted order that changes is taken out using the lines snapshotted before
+    the flush and added back with its current lines.
+    """
+    snapshots = session.info.pop("sales_rollup_snapshots", {})
+    changed_items = session.info.pop("sales_rollup_changed_items", [])
+
+    new_orders = [obj for obj in session.new if isinstance(obj, Order)]
+    dirty_orders = [obj for obj in session.dirty if isinstance(obj, Order) and obj not in session.deleted]
+    deleted_orders = [obj for obj in session.deleted if isinstance(obj, Order)]
+
+    if not new_orders and not dirty_orders and not deleted_orders and not changed_items:
+        return
+
+    connection = session.connection()
+
+    for order in new_orders:
+        if order_counts_towards_sales(order.order_status, order.order_payment_status):
+            apply_order_to_rollups(connection, _order_lines(connection, order.order_id), 1)
+
+    for order in {*dirty_orders, *changed_items}:
+        counted_now = order_counts_towards_sales(order.order_status, order.order_payment_status)
+        snapshot = snapshots.get(order.order_id)
+
+        if snapshot is not None:
+            apply_order_to_rollups(connection, snapshot, -1)
+        if counted_now and (snapshot is not None or not _counted_before(order)):
+            apply_order_to_rollups(connection, _order_lines(connection, order.order_id), 1)
+
+    # The items were deleted with the order; the snapshot still has their lines
+    for order in deleted_orders:
+        if order.order_id in snapshots:
+            apply_order_to_rollups(connection, snapshots[order.order_id], -1)
+
+
+def backfill_sales_rollups(db: Session, since: Optional[date] = None):
+    """
+    Rebuilds the rollups for every day from `since` (or all time) with two INSERT ... SELECTs.
+    """
+    order_day = func.date(Order.created_at, type_=Date)
+    counted = and_(
+        Order.order_payment_status == 'completed',
+        Order.order_status.not_in(UNCOUNTED_ORDER_STATUSES),
+    )
+    day_filter = [order_day >= since] if since else []
+
+    db.execute(delete(ProductDailySales).where(*([ProductDailySales.day >= since] if since else [])))
+    db.execute(delete(SellerDailySales).where(*([SellerDailySales.day >= since] if since else [])))
+
+    product_rows = (
+        select(
+            OrderItem.product_id,
+            order_day.label("day"),
+            Product.seller_id,
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.total_price),
+            func.count(func.distinct(Order.order_id)),
+        )
+        .join(Order, Order.order_id == OrderItem.order_id)
+        .join(Product, Product.product_id == OrderItem.product_id)
+        .filter(counted, *day_filter)
+        .group_by(OrderItem.product_id, order_day, Product.seller_id)
+    )
+    db.execute(
+        ProductDailySales.__table__.insert().from_select(
+            ["product_id", "day", "seller_id", "units", "revenue", "order_count"], product_rows
+        )
+    )
+
+    seller_rows = (
+        select(
+            Product.seller_id,
+            order_day.label("day"),
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.total_price),
+            func.count(func.distinct(Order.order_id)),
+        )
+        .join(Order, Order.order_id == OrderItem.order_id)
+        .join(Product, Product.product_id == OrderItem.product_id)
+        .filter(counted, *day_filter)
+        .group_by(Product.seller_id, order_day)
+    )
+    db.execute(
+        SellerDailySales.__table__.insert().from_select(
+            ["seller_id", "day", "units", "revenue", "order_count"], seller_rows
+        )
+    )
+
+    db.commit()
+
+
+if __name__ == "__main__":
+    from core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the daily sales rollups")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subcommands.add_parser("backfill", help="Rebuild rollups from the orders tables")
+    backfill_parser.add_argument("--since", type=date.fromisoformat, default=None, help="First day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        backfill_sales_rollups(db, since=args.since)
+        print(f"Sales rollups rebuilt{f' since {args.since}' if args.since else ''}")
+    finally:
+        db.close()
@@ -0,0 +1,35 @@
+"""
+Standalone scheduler worker, for deployments that run the jobs outside
+the web workers (SCHEDULER_ENABLED=false there):
+
+    python -m app.services.scheduler_worker
+
+Stops on SIGTERM or SIGINT once the running jobs have finished.
+"""
+import signal
+import threading
+from typing import Optional
+
+import app.services.jobs  # noqa: F401  registers the jobs on core.scheduler.scheduler
+from core.scheduler import scheduler
+
+
+def run(stop: Optional[threading.Event] = None):
+    stop = stop or threading.Event()
+    scheduler.start()
+    print(
+        f"Scheduler {scheduler.owner} running {len(scheduler.periodic_jobs)} periodic job(s) "
+        f"and {len(scheduler.tasks)} task(s)",
+        flush=True,
+    )
+    try:
+        stop.wait()
+    finally:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    run(stop)
@@ -0,0 +1,276 @@
+"""
+Purging of expired and used verification and password reset tokens.
+
+Nothing deletes these rows on the request path: a new link only flips the
+previous token's flag. purge_expired_tokens deletes rows that can no
+longer verify anything (expired past a grace period, or already used) in
+small batches. Each batch is its own short transaction, and on Postgres
+rows locked by a request in flight are skipped (SKIP LOCKED), so the purge
+never holds long locks or stalls a verification.
+
+On Postgres the tables can optionally be converted to daily range
+partitions on created_at (`partition` command below). Whole days then go
+with DROP TABLE instead of row deletes, and the batch purge only has to
+handle used tokens in the live partitions. The conversion copies only
+tokens that are still live and drops the old table, so run it in a
+maintenance window. Both tables have short-lived tokens, so the primary
+key and unique constraints gain created_at, which Postgres requires on
+partitioned tables; tokens embed their own expiry, so they stay unique in
+practice.
+
+    python -m app.services.token_cleanup purge
+    python -m app.services.token_cleanup partition --table verification_tokens
+    python -m app.services.token_cleanup maintain-partitions
+
+The scheduler's purge_expired_tokens job runs both purge and
+maintain-partitions; from cron, schedule them as separate commands.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, date
+from typing import Dict, List
+
+from sqlalchemy import select, delete, or_, text
+from sqlalchemy.orm import Session
+
+from app.models import VerificationToken, PasswordResetToken
+from core.config import settings
+
+
+# Postgres-side layout for the partitioned versions of the token tables.
+# Kept next to the conversion so a schema change to these tables updates both.
+PARTITIONED_TABLES: Dict[str, dict] = {
+    "verification_tokens": {
+        "primary_key": ["id", "created_at"],
+        "unique": [["token_digest", "created_at"]],
+        "indexes": [["email"]],
+        "sequence_column": "id",
+    },
+    "password_reset_tokens": {
+        "primary_key": ["token_digest", "created_at"],
+        "unique": [],
+        "indexes": [["email"]],
+        "sequence_column": None,
+    },
+}
+
+
+def _purge_rules(now: datetime) -> List[tuple]:
+    grace = timedelta(minutes=settings.TOKEN_PURGE_GRACE_MINUTES)
+    verification_cutoff = now - timedelta(minutes=settings.VERIFICATION_TOKEN_EXPIRE_MINUTES) - grace
+    reset_cutoff = now - timedelta(minutes=settings.RESET_TOKEN_EXPIRE_MINUTES) - grace
+    return [
+        (
+            VerificationToken,
+            VerificationToken.id,
+            or_(VerificationToken.created_at < verification_cutoff, VerificationToken.is_active == False),  # noqa: E712
+        ),
+        (
+            PasswordResetToken,
+            PasswordResetToken.token_digest,
+            or_(PasswordResetToken.created_at < reset_cutoff, PasswordResetToken.is_used == True),  # noqa: E712
+        ),
+    ]
+
+
+def purge_expired_tokens(
+    db: Session,
+    batch_size: int = None,
+    max_batches: int = None,
+    pause_seconds: float = None,
+) -> Dict[str, int]:
+    """
+    Deletes expired or used tokens batch_size rows at a time, committing after
+    each batch and pausing between them so other writers get the table. Stops
+    after max_batches per table; the next run picks up the rest.
+    """
+    batch_size = batch_size or settings.TOKEN_PURGE_BATCH_SIZE
+    max_batches = max_batches or settings.TOKEN_PURGE_MAX_BATCHES
+    pause_seconds = settings.TOKEN_PURGE_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    deleted = {}
+    for model, key, expired in _purge_rules(datetime.utcnow()):
+        count = 0
+        for _ in range(max_batches):
+            batch_query = select(key).filter(expired).limit(batch_size)
+            if is_postgres:
+                batch_query = batch_query.with_for_update(skip_locked=True)
+            keys = db.execute(batch_query).scalars().all()
+            if not keys:
+                break
+            db.execute(delete(model).where(key.in_(keys)).execution_options(synchronize_session=False))
+            db.commit()
+            count += len(keys)
+            if len(keys) < batch_size:
+                break
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        deleted[model.__tablename__] = count
+    return deleted
+
+
+# Postgres partitioning
+
+def _partition_name(table: str, day: date) -> str:
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def is_partitioned(connection, table: str) -> bool:
+    return connection.execute(
+        text("SELECT c.relkind = 'p' FROM pg_class c WHERE c.relname = :table AND pg_table_is_visible(c.oid)"),
+        {"table": table},
+    ).scalar() or False
+
+
+def ensure_partitions(connection, table: str, today: date = None, days_ahead: int = None) -> List[str]:
+    """Creates the daily partitions from today through days_ahead; already existing ones are left alone."""
+    today = today or datetime.utcnow().date()
+    days_ahead = settings.TOKEN_PARTITION_DAYS_AHEAD if days_ahead is None else days_ahead
+    created = []
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        name = _partition_name(table, day)
+        exists = connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+        if exists:
+            continue
+        connection.execute(text(
+            f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+
+def drop_expired_partitions(connection, table: str, today: date = None, retain_days: int = None) -> List[str]:
+    """Drops daily partitions that ended more than retain_days ago. Constant time per partition."""
+    today = today or datetime.utcnow().date()
+    retain_days = settings.TOKEN_PARTITION_RETAIN_DAYS if retain_days is None else retain_days
+    oldest_kept = today - timedelta(days=retain_days)
+    partitions = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ),
+        {"table": table},
+    ).scalars().all()
+
+    dropped = []
+    prefix = f"{table}_p"
+    for name in partitions:
+        if not name.startswith(prefix):
+            continue  # the default partition, or something created by hand
+        try:
+            day = datetime.strptime(name[len(prefix):], "%Y%m%d").date()
+        except ValueError:
+            continue
+        if day < oldest_kept:
+            connection.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+    return dropped
+
+
+def partition_table(connection, table: str, today: date = None):
+    """
+    Rebuilds `table` as a partitioned table in one transaction: the old table
+    is renamed, a partitioned copy takes its name, live rows are copied over
+    and the old table is dropped. Postgres 11+ only.
+    """
+    spec = PARTITIONED_TABLES[table]
+    today = today or datetime.utcnow().date()
+    legacy = f"{table}_unpartitioned"
+
+    connection.execute(text(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE'))
+    connection.execute(text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+    connection.execute(text(
+        f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+    ))
+    connection.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN created_at SET NOT NULL'))
+    connection.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN created_at SET DEFAULT now()'))
+    connection.execute(text(
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey_partitioned" PRIMARY KEY ({", ".join(spec["primary_key"])})'
+    ))
+    for columns in spec["unique"]:
+        connection.execute(text(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "uq_{table}_{"_".join(columns)}" UNIQUE ({", ".join(columns)})'
+        ))
+    for columns in spec["indexes"]:
+        connection.execute(text(
+            f'CREATE INDEX "ix_{table}_{"_".join(columns)}_partitioned" ON "{table}" ({", ".join(columns)})'
+        ))
+    if table == "verification_tokens":
+        connection.execute(text(
+            f'ALTER TABLE "{table}" ADD FOREIGN KEY (user_id) REFERENCES users (user_id)'
+        ))
+    if spec["sequence_column"]:
+        # The id sequence belongs to the old table's column and would be dropped with it
+        sequence = connection.execute(
+            text("SELECT pg_get_serial_sequence(:table, :column)"),
+            {"table": legacy, "column": spec["sequence_column"]},
+        ).scalar()
+        if sequence:
+            connection.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{table}".{spec["sequence_column"]}'))
+
+    # Rows older than the first daily partition (clock skew, long grace) land here
+    connection.execute(text(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT'))
+    ensure_partitions(connection, table, today=today)
+
+    expire_minutes = (
+        settings.VERIFICATION_TOKEN_EXPIRE_MINUTES if table == "verification_tokens" else settings.RESET_TOKEN_EXPIRE_MINUTES
+    )
+    live_since = datetime.utcnow() - timedelta(minutes=expire_minutes + settings.TOKEN_PURGE_GRACE_MINUTES)
+    connection.execute(
+        text(f'INSERT INTO "{table}" SELECT * FROM "{legacy}" WHERE created_at >= :live_since'),
+        {"live_since": live_since},
+    )
+    connection.execute(text(f'DROP TABLE "{legacy}"'))
+
+
+def maintain_partitions(engine) -> Dict[str, dict]:
+    """Creates upcoming partitions and drops expired ones for every partitioned token table."""
+    report = {}
+    if engine.dialect.name != "postgresql":
+        return report
+
+    for table in PARTITIONED_TABLES:
+        with engine.begin() as connection:
+            if not is_partitioned(connection, table):
+                continue
+            report[table] = {
+                "created": ensure_partitions(connection, table),
+                "dropped": drop_expired_partitions(connection, table),
+            }
+    return report
+
+
+if __name__ == "__main__":
+    from core.database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Purge expired verification and reset tokens")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    purge_parser = subcommands.add_parser("purge", help="Delete expired and used tokens in batches")
+    purge_parser.add_argument("--batch-size", type=int, default=None)
+    purge_parser.add_argument("--max-batches", type=int, default=None)
+    partition_parser = subcommands.add_parser("partition", help="Convert a token table to daily partitions (Postgres)")
+    partition_parser.add_argument("--table", required=True, choices=sorted(PARTITIONED_TABLES))
+    subcommands.add_parser("maintain-partitions", help="Create upcoming and drop expired daily partitions")
+    args = parser.parse_args()
+
+    if args.command == "purge":
+        db = SessionLocal()
+        try:
+            print(purge_expired_tokens(db, batch_size=args.batch_size, max_batches=args.max_batches))
+        finally:
+            db.close()
+    elif args.command == "partition":
+        if engine.dialect.name != "postgresql":
+            parser.error("Partitioning is only supported on Postgres")
+        with engine.begin() as connection:
+            if is_partitioned(connection, args.table):
+                parser.error(f"{args.table} is already partitioned")
+            partition_table(connection, args.table)
+        print(f"{args.table} converted to daily partitions")
+    else:
+        print(maintain_partitions(engine))
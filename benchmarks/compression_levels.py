@@ -0,0 +1,106 @@
+"""
+CPU time vs bytes saved per encoder and level, on a catalog-sized JSON
+page and the Swagger UI bundle. Used to pick the COMPRESSION_* defaults.
+
+    python -m benchmarks.compression_levels [--repeat 5] [--json]
+
+brotli and zstd rows only appear when those packages are installed
+(pip install -r requirements-optional.txt).
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from core.compression import available_encodings, compress_bytes
+
+
+LEVELS = {
+    "gzip": [1, 4, 6, 9],
+    "br": [1, 4, 5, 8, 11],
+    "zstd": [1, 3, 6, 12, 19],
+}
+SWAGGER_BUNDLE = Path(__file__).resolve().parent.parent / "static" / "swagger-ui" / "swagger-ui-bundle.js"
+
+
+def catalog_page(size: int = 100) -> bytes:
+    """A /products/?limit=100 shaped payload."""
+    products = [
+        {
+            "product_id": product_id,
+            "name": f"Product {product_id}",
+            "description": f"Hand finished item number {product_id}, ships in 2-3 business days. " * 4,
+            "price": round(9.99 + product_id * 1.37, 2),
+            "stock_quantity": product_id % 50,
+            "brand": ["Acme", "Globex", "Initech", "Umbrella"][product_id % 4],
+            "status": "published",
+            "seller_id": 1 + product_id % 7,
+            "created_at": "2025-02-01T12:00:00",
+            "updated_at": "2025-02-03T08:30:00",
+            "rating": {
+                "average": 4.2, "count": product_id * 3,
+                "breakdown": {"1": 1, "2": 2, "3": 5, "4": 10, "5": product_id},
+            },
+            "currency": {"code": "USD", "name": "US Dollar", "symbol": "$"},
+            "category": {"category_id": 1 + product_id % 12, "name": "Home & Garden"},
+            "images": [
+                {"id": product_id * 10 + rank, "image_url": f"/uploads/products/{product_id}_{rank}.jpg", "rank": rank}
+                for rank in range(1, 4)
+            ],
+            "reviews": [],
+        }
+        for product_id in range(1, size + 1)
+    ]
+    return json.dumps(products).encode()
+
+
+def measure(name: str, data: bytes, repeat: int):
+    rows = []
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                compressed = compress_bytes(data, encoding, level)
+                best = min(best, time.perf_counter() - started)
+            rows.append({
+                "payload": name,
+                "encoding": encoding,
+                "level": level,
+                "original_bytes": len(data),
+                "compressed_bytes": len(compressed),
+                "ratio": round(len(data) / len(compressed), 2),
+                "ms": round(best * 1000, 3),
+                "mb_per_s": round(len(data) / best / 1_000_000, 1),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per level; the fastest is reported")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    payloads = {"catalog_page_100": catalog_page()}
+    if SWAGGER_BUNDLE.exists():
+        payloads["swagger_ui_bundle"] = SWAGGER_BUNDLE.read_bytes()
+
+    rows = []
+    for name, data in payloads.items():
+        rows.extend(measure(name, data, args.repeat))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'payload':<18} {'enc':<5} {'lvl':>3} {'bytes':>10} {'ratio':>6} {'ms':>9} {'MB/s':>7}")
+    for row in rows:
+        print(
+            f"{row['payload']:<18} {row['encoding']:<5} {row['level']:>3} {row['compressed_bytes']:>10} "
+            f"{row['ratio']:>6} {row['ms']:>9} {row['mb_per_s']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Load test for the connection pool settings.
+
+Many threads (standing in for threadpool handlers and workers' sessions)
+each check out a connection, run a query, hold the connection for
+--hold-ms to simulate the rest of the request, and release it. Latency
+includes the wait for the pool, which is what pushes p99 up when the
+pool is too small, and timeouts show up as errors.
+
+    python -m benchmarks.pool_load --threads 40 --requests 2000 --hold-ms 5 \\
+        --configs 5:0:30 5:10:30 20:10:30 5:0:0.05
+
+Each config is pool_size:max_overflow:pool_timeout. Uses DATABASE_URL
+from settings; point it at Postgres for realistic numbers.
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from core.config import settings
+from benchmarks.stats import percentile
+
+
+def run_config(url: str, pool_size: int, max_overflow: int, pool_timeout: float, pre_ping: bool, threads: int, requests: int, hold_ms: float) -> dict:
+    engine = create_engine(
+        url, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout, pool_pre_ping=pre_ping
+    )
+
+    def one_request(_):
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                time.sleep(hold_ms / 1000)
+        except PoolTimeoutError:
+            return None
+        return time.perf_counter() - started
+
+    # Warm the pool so connect() cost isn't part of the first samples
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        list(executor.map(one_request, range(pool_size)))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    latencies = [result * 1000 for result in results if result is not None]
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pre_ping": pre_ping,
+        "threads": threads,
+        "requests": requests,
+        "errors": results.count(None),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(max(latencies), 2) if latencies else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=settings.DATABASE_URL)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--hold-ms", type=float, default=5)
+    parser.add_argument("--configs", nargs="+", default=["5:0:30", "5:10:30", "20:10:30", "5:0:0.05"])
+    parser.add_argument("--no-pre-ping", action="store_true", help="Disable pool_pre_ping to measure its cost")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for config in args.configs:
+        pool_size, max_overflow, pool_timeout = config.split(":")
+        rows.append(run_config(
+            args.url, int(pool_size), int(max_overflow), float(pool_timeout), not args.no_pre_ping,
+            args.threads, args.requests, args.hold_ms,
+        ))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'size':>4} {'ovf':>4} {'timeout':>7} {'errors':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for row in rows:
+        print(
+            f"{row['pool_size']:>4} {row['max_overflow']:>4} {row['pool_timeout']:>7} {row['errors']:>6} "
+            f"{row['throughput_rps']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {row['max_ms']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
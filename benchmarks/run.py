@@ -0,0 +1,296 @@
+"""
+In-process load test of the real FastAPI app.
+
+Concurrent asyncio clients drive main.app through httpx's ASGI transport
+(no network, no server), each picking a weighted random scenario per
+request. Results are emitted as JSON with throughput and p50/p95/p99 per
+scenario, and can be compared with a previous run to catch regressions:
+
+    python -m benchmarks.run --database-url sqlite:////tmp/bench.db --seed --products 20000 \\
+        --clients 20 --duration 30 --output bench.json
+    python -m benchmarks.run --database-url sqlite:////tmp/bench.db \\
+        --compare bench.json --max-regression 20
+
+Scenarios: login, listing (random filters), detail, image_upload, and
+order_history. There is no checkout endpoint in the API yet, so the
+order path is measured through order history.
+
+Handlers do their database work synchronously on the event loop, so this
+measures the app as deployed per worker, not an idealized async stack.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.stats import percentile
+
+
+DEFAULT_WEIGHTS = "login=1,listing=10,detail=10,image_upload=1,order_history=3"
+
+
+def parse_weights(value: str) -> dict:
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class Fixtures:
+    """IDs and tokens sampled from the seeded database."""
+
+    def __init__(self, engine, rng: random.Random, sample_size: int = 2000):
+        from sqlalchemy import select
+        from app.models import User, Product, Category, Order
+        from core.auth import create_access_token
+
+        with engine.connect() as connection:
+            self.buyers = connection.execute(
+                select(User.email).filter(User.role == "buyer").order_by(User.user_id).limit(sample_size)
+            ).scalars().all()
+            self.published = connection.execute(
+                select(Product.product_id).filter(Product.status == "published").limit(sample_size * 5)
+            ).scalars().all()
+            self.merchant_products = connection.execute(
+                select(User.email, Product.product_id).join(Product, Product.seller_id == User.user_id)
+                .filter(User.role == "merchant").limit(sample_size * 5)
+            ).all()
+            self.categories = connection.execute(select(Category.name)).scalars().all()
+            self.buyers_with_orders = connection.execute(
+                select(User.email).join(Order, Order.user_id == User.user_id).distinct().limit(sample_size)
+            ).scalars().all()
+
+        if not (self.buyers and self.published and self.merchant_products):
+            raise SystemExit("Database has no benchmark data; run with --seed first")
+
+        self.rng = rng
+        self._tokens = {}
+        self._create_access_token = create_access_token
+
+    def auth(self, email: str, role: str) -> dict:
+        token = self._tokens.get(email)
+        if token is None:
+            token = self._tokens[email] = self._create_access_token({"sub": email, "role": role})
+        return {"Authorization": f"Bearer {token}"}
+
+
+async def scenario_login(client, fixtures: Fixtures):
+    from benchmarks.seed import BENCH_PASSWORD
+    return await client.post(
+        "/auth/login/", data={"username": fixtures.rng.choice(fixtures.buyers), "password": BENCH_PASSWORD}
+    )
+
+
+async def scenario_listing(client, fixtures: Fixtures):
+    rng = fixtures.rng
+    params = {"limit": 20}
+    if fixtures.categories and rng.random() < 0.5:
+        params["category_name"] = rng.choice(fixtures.categories)
+    if rng.random() < 0.5:
+        low = rng.randint(0, 500)
+        params.update(min_price=low, max_price=low + rng.randint(50, 500))
+    if rng.random() < 0.3:
+        params["sort_by"] = "rating"
+    if rng.random() < 0.2:
+        params["offset"] = rng.randint(0, 200)
+    response = await client.get("/products/", params=params)
+    # An empty filter combination is a valid 404 from this endpoint
+    return response if response.status_code != 404 else _Ok(response)
+
+
+async def scenario_detail(client, fixtures: Fixtures):
+    return await client.get(f"/products/{fixtures.rng.choice(fixtures.published)}/product/view/")
+
+
+async def scenario_image_upload(client, fixtures: Fixtures):
+    email, product_id = fixtures.rng.choice(fixtures.merchant_products)
+    response = await client.post(
+        "/products/upload/image/product",
+        headers=fixtures.auth(email, "merchant"),
+        data={"product_id": str(product_id)},
+        files={"image": (f"bench-{product_id}.jpg", b"\xff\xd8\xff" + os.urandom(2048), "image/jpeg")},
+    )
+    # Products are capped at 10 images; hitting the cap is expected on long runs
+    return response if response.status_code != 400 else _Ok(response)
+
+
+async def scenario_order_history(client, fixtures: Fixtures):
+    email = fixtures.rng.choice(fixtures.buyers_with_orders or fixtures.buyers)
+    return await client.get("/orders/", headers=fixtures.auth(email, "buyer"))
+
+
+class _Ok:
+    def __init__(self, response):
+        self.status_code = 200
+        self.original_status = response.status_code
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "listing": scenario_listing,
+    "detail": scenario_detail,
+    "image_upload": scenario_image_upload,
+    "order_history": scenario_order_history,
+}
+
+
+async def run_load(app, fixtures: Fixtures, weights: dict, clients: int, duration: float, warmup: float) -> dict:
+    import httpx
+
+    names = list(weights)
+    cumulative = [weights[name] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    async def client_loop():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    return
+                name = fixtures.rng.choices(names, weights=cumulative)[0]
+                started = time.perf_counter()
+                try:
+                    response = await SCENARIOS[name](client, fixtures)
+                    ok = response.status_code < 400
+                except Exception as e:
+                    print(f"{name} raised {e!r}", file=sys.stderr)
+                    ok = False
+                finished = time.perf_counter()
+                if started >= measure_from:
+                    latencies[name].append((finished - started) * 1000)
+                    if not ok:
+                        errors[name] += 1
+
+    await asyncio.gather(*(client_loop() for _ in range(clients)))
+
+    results = {}
+    for name in names:
+        samples = latencies[name]
+        results[name] = {
+            "requests": len(samples),
+            "errors": errors[name],
+            "throughput_rps": round(len(samples) / duration, 2),
+            "p50_ms": round(percentile(samples, 0.50), 2),
+            "p95_ms": round(percentile(samples, 0.95), 2),
+            "p99_ms": round(percentile(samples, 0.99), 2),
+            "max_ms": round(max(samples), 2) if samples else 0.0,
+        }
+
+    everything = [sample for samples in latencies.values() for sample in samples]
+    results["total"] = {
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(everything) / duration, 2),
+        "p50_ms": round(percentile(everything, 0.50), 2),
+        "p95_ms": round(percentile(everything, 0.95), 2),
+        "p99_ms": round(percentile(everything, 0.99), 2),
+        "max_ms": round(max(everything), 2) if everything else 0.0,
+    }
+    return results
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> bool:
+    """Prints a p99/throughput diff against a previous run; False if any p99 regressed too far."""
+    ok = True
+    print(f"{'scenario':<15} {'p99 base':>10} {'p99 now':>10} {'Δ%':>7} {'rps base':>10} {'rps now':>10}", file=sys.stderr)
+    for name, now in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or not base["p99_ms"]:
+            continue
+        delta = (now["p99_ms"] - base["p99_ms"]) / base["p99_ms"] * 100
+        flag = ""
+        if delta > max_regression:
+            ok = False
+            flag = "  REGRESSION"
+        print(
+            f"{name:<15} {base['p99_ms']:>10} {now['p99_ms']:>10} {delta:>7.1f} "
+            f"{base['throughput_rps']:>10} {now['throughput_rps']:>10}{flag}",
+            file=sys.stderr,
+        )
+    return ok
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    from benchmarks.seed import add_volume_arguments, volumes_from_args
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--seed", action="store_true", help="Seed the (empty) database first")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before measuring")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS, help=f"Scenario weights (default {DEFAULT_WEIGHTS})")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Previous JSON report to diff against")
+    parser.add_argument("--max-regression", type=float, default=20, help="Allowed p99 increase in percent")
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    weights = parse_weights(args.weights)
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}. Allowed values: {', '.join(SCENARIOS)}")
+
+    # Settings are read at import time, so point the app at the benchmark database first
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SLOW_QUERY_MS", "1000")
+    os.environ.setdefault("SLOW_REQUEST_DB_MS", "1000")
+    # Every simulated client shares one address, which the catalog policy would throttle
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    import main as app_module
+    from core.database import engine
+    from benchmarks.seed import seed
+
+    volumes = volumes_from_args(args)
+    seed_timings = seed(engine, volumes) if args.seed else None
+
+    rng = random.Random(volumes.random_seed)
+    fixtures = Fixtures(engine, rng)
+    scenarios = asyncio.run(run_load(app_module.app, fixtures, weights, args.clients, args.duration, args.warmup))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "dialect": engine.dialect.name,
+            "clients": args.clients,
+            "duration_s": args.duration,
+            "weights": weights,
+            "seeded": seed_timings,
+        },
+        "scenarios": scenarios,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Synthetic data generator for benchmarks.
+
+Fills an empty database with users, categories, currencies, products,
+images, reviews and orders using batched multi-row INSERTs (Core, not
+the ORM), then rebuilds the denormalized product ratings and the daily
+sales rollups that the ORM hooks would normally maintain. Output is
+deterministic for a given --random-seed.
+
+Rows that other rows refer to get explicit IDs, so on Postgres their
+sequences are moved past the seeded IDs afterwards; inserts made by the
+app during a benchmark would otherwise collide with them.
+
+    python -m benchmarks.seed --database-url sqlite:////tmp/bench.db --products 20000
+"""
+import argparse
+import json
+import random
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert, select, func, text
+from sqlalchemy.orm import Session
+
+
+BENCH_PASSWORD = "Bench@1234"
+BRANDS = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Tyrell"]
+CURRENCIES = [("USD", "US Dollar", "$"), ("EUR", "Euro", "€"), ("GBP", "British Pound", "£")]
+ORDER_STATUSES = ["pending", "shipped", "delivered", "delivered", "delivered", "cancelled", "returned"]
+
+
+@dataclass
+class SeedVolumes:
+    buyers: int = 1000
+    merchants: int = 50
+    categories: int = 30
+    products: int = 10000
+    images_per_product: int = 3
+    reviews: int = 20000
+    orders: int = 5000
+    items_per_order: int = 3
+    batch_size: int = 5000
+    random_seed: int = 42
+
+
+def buyer_email(index: int) -> str:
+    return f"bench-buyer-{index}@example.com"
+
+
+def merchant_email(index: int) -> str:
+    return f"bench-merchant-{index}@example.com"
+
+
+def _insert_batches(connection, table, rows, batch_size: int) -> int:
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            connection.execute(insert(table), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+
+def refresh_product_ratings(connection):
+    """Same backfill as the ratings migration, for reviews inserted without the ORM hooks."""
+    histogram = ",\n".join(
+        f"rating_{star}_count = (SELECT COUNT(*) FROM reviews r WHERE r.product_id = products.product_id AND r.rating = {star})"
+        for star in range(1, 6)
+    )
+    connection.execute(text(f"""
+        UPDATE products SET
+            rating_count = (SELECT COUNT(*) FROM reviews r WHERE r.product_id = products.product_id),
+            rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r WHERE r.product_id = products.product_id),
+            {histogram}
+    """))
+    connection.execute(text(
+        "UPDATE products SET rating_avg = CASE WHEN rating_count > 0 THEN rating_sum * 1.0 / rating_count ELSE 0 END"
+    ))
+
+
+# Tables seeded with explicit IDs, and their serial columns
+EXPLICIT_ID_COLUMNS = [("users", "user_id"), ("categories", "category_id"), ("products", "product_id"), ("orders", "order_id")]
+
+
+def reset_sequences(connection):
+    """Points each serial sequence past the highest seeded ID. Postgres only; SQLite uses MAX(rowid) anyway."""
+    if connection.dialect.name != "postgresql":
+        return
+    for table, column in EXPLICIT_ID_COLUMNS:
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), COALESCE(MAX({column}), 0) + 1, false) FROM {table}"
+        ))
+
+
+def seed(engine, volumes: SeedVolumes) -> dict:
+    from app.models import User, Category, Currency, Product, ProductImages, Review, Order, OrderItem
+    from app.services.sales_rollups import backfill_sales_rollups
+    from core.auth import hash_password
+    from core.database import Base
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(volumes.random_seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    timings = {}
+
+    with engine.begin() as connection:
+        if connection.execute(select(func.count()).select_from(User.__table__)).scalar():
+            raise SystemExit("Refusing to seed a database that already has users; use an empty database")
+
+        def timed(name, table, rows):
+            started = time.perf_counter()
+            count = _insert_batches(connection, table, rows, volumes.batch_size)
+            timings[name] = {"rows": count, "seconds": round(time.perf_counter() - started, 3)}
+
+        # bcrypt is deliberately slow, so every account shares one hash
+        password_hash = hash_password(BENCH_PASSWORD)
+        admin_id = volumes.buyers + volumes.merchants + 1
+
+        def users():
+            for user_id in range(1, admin_id + 1):
+                if user_id <= volumes.buyers:
+                    email, role = buyer_email(user_id), "buyer"
+                elif user_id <= volumes.buyers + volumes.merchants:
+                    email, role = merchant_email(user_id - volumes.buyers), "merchant"
+                else:
+                    email, role = "bench-admin@example.com", "admin"
+                yield {
+                    "user_id": user_id, "first_name": "Bench", "last_name": f"User{user_id}", "email": email,
+                    "password_hash": password_hash, "phone": f"+1555{user_id:07d}", "is_active": True, "role": role,
+                }
+
+        timed("users", User.__table__, users())
+        timed("currencies", Currency.__table__, (
+            {"code": code, "name": name, "symbol": symbol} for code, name, symbol in CURRENCIES
+        ))
+        timed("categories", Category.__table__, (
+            {"category_id": category_id, "name": f"Category {category_id}"}
+            for category_id in range(1, volumes.categories + 1)
+        ))
+
+        merchant_ids = range(volumes.buyers + 1, volumes.buyers + volumes.merchants + 1)
+        prices = {}
+
+        def products():
+            for product_id in range(1, volumes.products + 1):
+                price = Decimal(rng.randint(199, 99999)) / 100
+                prices[product_id] = price
+                created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                yield {
+                    "product_id": product_id, "name": f"Bench product {product_id}",
+                    "description": f"Synthetic product {product_id} for load tests. " * 3,
+                    "price": price, "stock_quantity": rng.randint(0, 500),
+                    "category_id": rng.randint(1, volumes.categories), "seller_id": rng.choice(merchant_ids),
+                    "brand": rng.choice(BRANDS), "sku": f"BENCH-{product_id}",
+                    "status": "published" if rng.random() < 0.95 else "draft",
+                    "currency_code": rng.choice(CURRENCIES)[0], "created_at": created_at, "updated_at": created_at,
+                }
+
+        timed("products", Product.__table__, products())
+        timed("product_images", ProductImages.__table__, (
+            {
+                "product_id": product_id, "image_url": f"https://example.com/uploads/bench/{product_id}-{rank}.jpg",
+                "rank": float(rank), "created_at": now,
+            }
+            for product_id in range(1, volumes.products + 1)
+            for rank in range(1, volumes.images_per_product + 1)
+        ))
+
+        def reviews():
+            # One review per buyer and product (uq_reviews_product_user)
+            reviewed = set()
+            while len(reviewed) < min(volumes.reviews, volumes.buyers * volumes.products):
+                user_id, product_id = rng.randint(1, volumes.buyers), rng.randint(1, volumes.products)
+                if (user_id, product_id) in reviewed:
+                    continue
+                reviewed.add((user_id, product_id))
+                yield {
+                    "user_id": user_id, "product_id": product_id,
+                    "rating": rng.choices(range(1, 6), weights=(1, 1, 2, 4, 6))[0], "comment": "Synthetic review",
+                    "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 180)),
+                }
+
+        timed("reviews", Review.__table__, reviews())
+
+        order_items = []
+
+        def orders():
+            for order_id in range(1, volumes.orders + 1):
+                total = Decimal("0")
+                for _ in range(rng.randint(1, volumes.items_per_order)):
+                    product_id = rng.randint(1, volumes.products)
+                    quantity = rng.randint(1, 3)
+                    line_total = prices[product_id] * quantity
+                    total += line_total
+                    order_items.append({
+                        "order_id": order_id, "product_id": product_id, "quantity": quantity,
+                        "unit_price": prices[product_id], "total_price": line_total,
+                    })
+                created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+                yield {
+                    "order_id": order_id, "user_id": rng.randint(1, volumes.buyers), "total_amount": total,
+                    "order_status": rng.choice(ORDER_STATUSES),
+                    "order_payment_status": "completed" if rng.random() < 0.9 else "pending",
+                    "created_at": created_at, "updated_at": created_at,
+                }
+
+        timed("orders", Order.__table__, orders())
+        timed("order_items", OrderItem.__table__, iter(order_items))
+        reset_sequences(connection)
+
+        started = time.perf_counter()
+        refresh_product_ratings(connection)
+        timings["rating_backfill"] = {"seconds": round(time.perf_counter() - started, 3)}
+
+    started = time.perf_counter()
+    with Session(engine) as db:
+        backfill_sales_rollups(db)
+        db.commit()
+    timings["sales_rollup_backfill"] = {"seconds": round(time.perf_counter() - started, 3)}
+
+    return timings
+
+
+def add_volume_arguments(parser: argparse.ArgumentParser):
+    for field, default in asdict(SeedVolumes()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+
+
+def volumes_from_args(args) -> SeedVolumes:
+    return SeedVolumes(**{field: getattr(args, field) for field in asdict(SeedVolumes())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    print(json.dumps(seed(create_engine(args.database_url), volumes_from_args(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
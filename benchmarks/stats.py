@@ -0,0 +1,9 @@
+"""Summary statistics shared by the benchmark scripts."""
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile of samples for q in [0, 1]; 0.0 when there are none."""
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
@@ -0,0 +1,137 @@
+"""
+Index size and lookup latency: full JWT strings vs SHA-256 digests.
+
+Builds two scratch tables holding the same --rows verification tokens,
+one keyed by the token string (the old layout) and one by its 32-byte
+digest (the new one). It reports each unique index's size and the latency
+of point lookups by a presented token. Digest lookups include the hashing.
+
+    python -m benchmarks.token_lookup --url sqlite:////tmp/tokens.db --rows 200000
+    python -m benchmarks.token_lookup --url postgresql://... --rows 1000000 --json
+
+The scratch tables are dropped afterwards.
+"""
+import argparse
+import json
+import random
+import time
+
+from sqlalchemy import Column, Integer, String, LargeBinary, MetaData, Table, create_engine, insert, select, text
+
+from core.auth import create_verification_token, token_digest
+from benchmarks.stats import percentile
+
+
+def index_size_bytes(connection, table: str, index: str) -> int:
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        return connection.execute(text("SELECT pg_relation_size(:index)"), {"index": index}).scalar()
+    if dialect == "sqlite":
+        try:
+            return connection.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = :index"), {"index": index}).scalar() or 0
+        except Exception:
+            return -1  # SQLite built without the dbstat table
+    return -1
+
+
+def run(url: str, rows: int, lookups: int, batch_size: int) -> dict:
+    engine = create_engine(url)
+    metadata = MetaData()
+    by_token = Table(
+        "bench_tokens_by_string", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("token", String, nullable=False, unique=True),
+    )
+    by_digest = Table(
+        "bench_tokens_by_digest", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("token_digest", LargeBinary(32), nullable=False, unique=True),
+    )
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    tokens = []
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        for offset in range(0, rows, batch_size):
+            batch = [
+                create_verification_token(f"bench-{index}-{random.random()}@example.com")
+                for index in range(offset, min(rows, offset + batch_size))
+            ]
+            tokens.extend(batch)
+            connection.execute(insert(by_token), [{"token": token} for token in batch])
+            connection.execute(insert(by_digest), [{"token_digest": token_digest(token)} for token in batch])
+    load_seconds = time.perf_counter() - started
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM ANALYZE bench_tokens_by_string"))
+            connection.execute(text("VACUUM ANALYZE bench_tokens_by_digest"))
+
+    with engine.connect() as connection:
+        index_names = {
+            row[0]: row[1] for row in connection.execute(text(
+                "SELECT tablename, indexname FROM pg_indexes WHERE tablename LIKE 'bench_tokens_%' AND indexname NOT LIKE '%pkey'"
+            ))
+        } if engine.dialect.name == "postgresql" else {
+            row[0]: row[1] for row in connection.execute(text(
+                "SELECT tbl_name, name FROM sqlite_master WHERE type = 'index' AND tbl_name LIKE 'bench_tokens_%'"
+            ))
+        }
+
+        sample = random.sample(tokens, min(lookups, len(tokens)))
+        string_latencies, digest_latencies = [], []
+        for token in sample:
+            started = time.perf_counter()
+            connection.execute(select(by_token.c.id).where(by_token.c.token == token)).scalar()
+            string_latencies.append((time.perf_counter() - started) * 1e6)
+
+            started = time.perf_counter()
+            connection.execute(select(by_digest.c.id).where(by_digest.c.token_digest == token_digest(token))).scalar()
+            digest_latencies.append((time.perf_counter() - started) * 1e6)
+
+        report = {
+            "dialect": engine.dialect.name,
+            "rows": rows,
+            "lookups": len(sample),
+            "avg_token_bytes": round(sum(len(token) for token in tokens) / len(tokens), 1),
+            "load_seconds": round(load_seconds, 2),
+        }
+        for name, table, latencies in (
+            ("string", "bench_tokens_by_string", string_latencies),
+            ("digest", "bench_tokens_by_digest", digest_latencies),
+        ):
+            report[name] = {
+                "index_bytes": index_size_bytes(connection, table, index_names.get(table, "")),
+                "lookup_p50_us": round(percentile(latencies, 0.50), 1),
+                "lookup_p99_us": round(percentile(latencies, 0.99), 1),
+            }
+
+    metadata.drop_all(engine)
+    engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:////tmp/token_lookup.db")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    report = run(args.url, args.rows, args.lookups, args.batch_size)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['rows']} tokens on {report['dialect']}, avg {report['avg_token_bytes']} bytes each")
+    print(f"{'layout':<8} {'index bytes':>14} {'p50 us':>10} {'p99 us':>10}")
+    for name in ("string", "digest"):
+        row = report[name]
+        print(f"{name:<8} {row['index_bytes']:>14} {row['lookup_p50_us']:>10} {row['lookup_p99_us']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Admission control and load shedding.
+
+Requests are sorted into route classes (login and orders are critical,
+merchant writes normal, catalog reads low). Each class has a concurrency
+limit that adapts with AIMD: every request finishing under the class's
+latency target adds 1/limit (about +1 per round of requests), and one
+over target cuts the limit by ADMISSION_DECREASE_FACTOR, at most once per
+target interval. Requests over the limit wait in a short queue; when the
+queue is full or the wait runs out they get 503 with Retry-After instead
+of piling up in the server until everything times out.
+
+Low-priority classes never queue while a more important class is
+overloaded (waiting or over its latency target), so catalog traffic is
+shed first and the DB time goes to login and orders. The latency seen by
+that check halves every ADMISSION_LATENCY_HALF_LIFE_SECONDS without a
+completed request, so one slow response on a quiet class doesn't keep
+shedding the others until its next request.
+
+State is per worker and lives on the event loop, so no locks are needed.
+Limits, in-flight counts, queue depth, waits and rejections are exported
+through core.metrics.
+"""
+import asyncio
+import math
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Deque, Dict, List, Optional
+
+from starlette.responses import JSONResponse
+
+from core.config import settings
+from core.metrics import Counter, Gauge, Histogram
+
+
+CRITICAL, NORMAL, LOW = 0, 1, 2
+
+admission_limit = Gauge("admission_limit", "Adaptive concurrency limit per route class", ("route_class",))
+admission_in_flight = Gauge("admission_in_flight", "Admitted requests still running per route class", ("route_class",))
+admission_queue_depth = Gauge("admission_queue_depth", "Requests waiting for admission per route class", ("route_class",))
+admission_queue_wait_seconds = Histogram(
+    "admission_queue_wait_seconds", "Time spent waiting for admission", ("route_class",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+admission_rejected_total = Counter(
+    "admission_rejected_total", "Requests shed with 503 per route class and reason", ("route_class", "reason")
+)
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    name: str
+    priority: int
+    pattern: "re.Pattern"
+    methods: Optional[frozenset] = None  # None matches any method
+    target_ms: float = 500
+    initial_limit: int = 20
+    min_limit: int = 2
+    max_limit: int = 200
+    max_queue: int = 50
+    max_queue_wait_ms: float = 1000
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.methods is None or method in self.methods) and self.pattern.match(path) is not None
+
+
+# Checked in order; health, readiness and metrics are never shed so probes see the real state
+EXEMPT_PATHS = re.compile(r"^/(health|ready|metrics)/?$")
+
+DEFAULT_ROUTE_CLASSES = [
+    RouteClass("auth", CRITICAL, re.compile(r"^/auth/"), target_ms=1000),
+    RouteClass("orders", CRITICAL, re.compile(r"^/orders/")),
+    RouteClass(
+        "merchant_writes", NORMAL, re.compile(r"^/(products|merchant)/"),
+        methods=frozenset({"POST", "PUT", "PATCH", "DELETE"}), target_ms=1000, max_queue=20,
+    ),
+    RouteClass(
+        "catalog", LOW, re.compile(r"^/(products|misc|wishlist)/"),
+        target_ms=300, initial_limit=50, max_limit=500, max_queue=20, max_queue_wait_ms=250,
+    ),
+    RouteClass("default", NORMAL, re.compile(r"^/")),
+]
+
+
+def parse_route_class_overrides(value: str, classes: List[RouteClass]) -> List[RouteClass]:
+    """Applies "catalog.target_ms=200,catalog.max_limit=100" style overrides."""
+    by_name = {route_class.name: route_class for route_class in classes}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        target, _, raw = entry.partition("=")
+        name, _, field = target.partition(".")
+        if name not in by_name or field not in {
+            "target_ms", "initial_limit", "min_limit", "max_limit", "max_queue", "max_queue_wait_ms"
+        }:
+            raise ValueError(f"Invalid ADMISSION_CLASSES entry '{entry}'")
+        try:
+            number = float(raw) if field.endswith("_ms") else int(raw)
+        except ValueError:
+            raise ValueError(f"Invalid ADMISSION_CLASSES entry '{entry}'")
+        by_name[name] = replace(by_name[name], **{field: number})
+    return list(by_name.values())
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    def __init__(self, route_class: RouteClass, decrease_factor: float, latency_half_life: float):
+        self.route_class = route_class
+        self.decrease_factor = decrease_factor
+        self.latency_half_life = latency_half_life
+        self.limit = float(route_class.initial_limit)
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.last_decrease = 0.0
+        self.last_latency = 0.0
+        self.last_completed = 0.0
+        self._labels = (route_class.name,)
+        admission_limit.set(self._labels, self.limit)
+
+    @property
+    def recent_latency(self) -> float:
+        """last_latency, decayed by the time since it was measured."""
+        if self.latency_half_life <= 0:
+            return self.last_latency
+        idle = time.monotonic() - self.last_completed
+        return self.last_latency * 0.5 ** (idle / self.latency_half_life)
+
+    @property
+    def overloaded(self) -> bool:
+        return bool(self.waiters) or self.recent_latency > self.route_class.target_ms / 1000
+
+    def _retry_after(self) -> float:
+        # Roughly how long the current queue needs to drain
+        return max(1.0, (len(self.waiters) + 1) / max(self.limit, 1) * self.route_class.target_ms / 1000)
+
+    async def acquire(self, shed: bool):
+        if self.in_flight < int(self.limit) and not self.waiters:
+            self._admit()
+            return
+
+        if shed or self.route_class.max_queue <= 0:
+            raise Rejected("shed", self._retry_after())
+        if len(self.waiters) >= self.route_class.max_queue:
+            raise Rejected("queue_full", self._retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        admission_queue_depth.set(self._labels, len(self.waiters))
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.route_class.max_queue_wait_ms / 1000)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the wait ran out; give the slot back
+                self.release(None)
+            raise Rejected("queue_timeout", self._retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            if not waiter.done():
+                waiter.cancel()
+            admission_queue_depth.set(self._labels, len(self.waiters))
+            admission_queue_wait_seconds.observe(self._labels, time.perf_counter() - started)
+
+    def _admit(self):
+        self.in_flight += 1
+        admission_in_flight.set(self._labels, self.in_flight)
+
+    def release(self, latency: Optional[float]):
+        self.in_flight -= 1
+        if latency is not None:
+            self._adjust(latency)
+        admission_in_flight.set(self._labels, self.in_flight)
+        self._wake()
+
+    def _adjust(self, latency: float):
+        route_class = self.route_class
+        target = route_class.target_ms / 1000
+        now = time.monotonic()
+        self.last_latency = latency
+        self.last_completed = now
+        if latency <= target:
+            self.limit = min(route_class.max_limit, self.limit + 1 / self.limit)
+        elif now - self.last_decrease >= target:
+            # One cut per target interval, so a burst of slow responses counts once
+            self.limit = max(route_class.min_limit, self.limit * self.decrease_factor)
+            self.last_decrease = now
+        admission_limit.set(self._labels, self.limit)
+
+    def _wake(self):
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if waiter.done():
+                continue
+            self._admit()
+            waiter.set_result(None)
+
+
+class AdmissionController:
+    def __init__(self, classes: List[RouteClass], decrease_factor: float, latency_half_life: float):
+        self.classes = classes
+        self.limiters: Dict[str, AdaptiveLimiter] = {
+            route_class.name: AdaptiveLimiter(route_class, decrease_factor, latency_half_life) for route_class in classes
+        }
+
+    def classify(self, method: str, path: str) -> Optional[AdaptiveLimiter]:
+        if EXEMPT_PATHS.match(path):
+            return None
+        for route_class in self.classes:
+            if route_class.matches(method, path):
+                return self.limiters[route_class.name]
+        return None
+
+    def should_shed(self, limiter: AdaptiveLimiter) -> bool:
+        """Lower-priority classes skip the queue while a more important one is struggling."""
+        priority = limiter.route_class.priority
+        return any(
+            other.route_class.priority < priority and other.overloaded
+            for other in self.limiters.values()
+        )
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "limit": round(limiter.limit, 2),
+                "in_flight": limiter.in_flight,
+                "queued": len(limiter.waiters),
+                "last_latency_ms": round(limiter.last_latency * 1000, 1),
+                "recent_latency_ms": round(limiter.recent_latency * 1000, 1),
+            }
+            for name, limiter in self.limiters.items()
+        }
+
+
+def configured_controller() -> AdmissionController:
+    return AdmissionController(
+        parse_route_class_overrides(settings.ADMISSION_CLASSES, DEFAULT_ROUTE_CLASSES),
+        settings.ADMISSION_DECREASE_FACTOR,
+        settings.ADMISSION_LATENCY_HALF_LIFE_SECONDS,
+    )
+
+
+admission = configured_controller()
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI; the slot is held until the last body chunk is sent, so streamed responses count."""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.controller.classify(scope["method"], scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire(shed=self.controller.should_shed(limiter))
+        except Rejected as rejected:
+            admission_rejected_total.inc((limiter.route_class.name, rejected.reason))
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Service is busy. Please try again shortly."},
+                headers={"Retry-After": str(math.ceil(rejected.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        latency = None
+        try:
+            await self.app(scope, receive, send)
+            latency = time.perf_counter() - started
+        finally:
+            # Failed requests give the slot back without teaching the limiter anything
+            limiter.release(latency)
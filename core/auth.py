@@ -1,3 +1,4 @@
+import hashlib
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from fastapi import HTTPException, Depends, status
@@ -8,8 +9,10 @@ from app.models import User
 from typing import Optional, Annotated
 from sqlalchemy.orm import Session
 from .database import get_db
+from .cache import TTLCache
 from fastapi import Form
 from pydantic import EmailStr
+from dataclasses import dataclass
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -26,6 +29,10 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
+def access_token_claims(user: User) -> dict:
+    """Claims for an access token; uid, role and ver let stateless role checks skip the user lookup."""
+    return {"sub": user.email, "uid": user.user_id, "role": user.role, "ver": user.token_version or 0}
+
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
@@ -40,6 +47,14 @@ def verify_token(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+def token_digest(token: str) -> bytes:
+    """
+    SHA-256 of an emailed token. Only the digest is stored, so the tables
+    hold no usable tokens and lookups compare 32 bytes instead of a JWT.
+    """
+    return hashlib.sha256(token.encode()).digest()
+
+
 def create_verification_token(email: str):
     expire = datetime.utcnow() + timedelta(minutes=settings.VERIFICATION_TOKEN_EXPIRE_MINUTES)
     to_encode = {"sub": email, "exp": expire}
@@ -60,6 +75,39 @@ def create_password_reset_token(email: str) -> str:
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+# Lowest token version still accepted per email. Entries only need to outlive the
+# access tokens they reject. Per worker: other workers learn about a revocation
+# when a DB-backed check sees the newer version, so a stateless endpoint on
+# another worker can accept a revoked token until it expires.
+token_revocations = TTLCache(
+    maxsize=settings.TOKEN_REVOCATION_MAX_ITEMS,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    name="token_revocations",
+)
+
+
+def revoke_user_tokens(user: User):
+    """
+    Invalidates every access token issued to the user so far. Call on role
+    change or password reset, before committing.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    token_revocations.set(user.email, user.token_version)
+
+
+def is_token_revoked(email: str, version: int) -> bool:
+    return version < token_revocations.get(email, 0)
+
+
+@dataclass
+class TokenClaims:
+    """The user as seen by a stateless role check; only what the access token carries."""
+    user_id: int
+    email: str
+    role: str
+    token_version: int
+
+
 def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)], 
     db: Session = Depends(get_db)
@@ -84,21 +132,76 @@ def get_current_user(
             raise credentials_exception
 
         if not user.is_active:
-            raise HTTPException(status_code = status.HTTp_401_UNAUTHORIZED, detail="User account is not yet activated", headers={"WWW-Authenticate": "Bearer"})
+            raise HTTPException(status_code = status.HTTP_401_UNAUTHORIZED, detail="User account is not yet activated", headers={"WWW-Authenticate": "Bearer"})
+
+        current_version = user.token_version or 0
+        if payload.get("ver", 0) != current_version:
+            token_revocations.set(user.email, current_version)
+            raise credentials_exception
         return user
 
     except JWTError:
         raise credentials_exception
 
 
-def require_role(required_roles: list[str]):
-    """Dependency to check if the user has the required role."""
+def get_token_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> Optional[TokenClaims]:
+    """
+    Verified claims of a current access token, or None when the token predates
+    the uid/ver claims and the caller has to load the user instead.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+
+    email = payload.get("sub")
+    if not email:
+        raise credentials_exception
+
+    if payload.get("uid") is None or payload.get("role") is None or payload.get("ver") is None:
+        return None
+
+    if is_token_revoked(email, payload["ver"]):
+        raise credentials_exception
+
+    return TokenClaims(user_id=payload["uid"], email=email, role=payload["role"], token_version=payload["ver"])
+
+
+def require_role(required_roles: list[str], stateless: bool = False):
+    """
+    Dependency to check if the user has the required role.
+
+    With stateless=True (and STATELESS_ROLE_CHECKS on) the role comes from the
+    verified token and the dependency returns TokenClaims instead of a User, so
+    only use it on read-only endpoints that need nothing beyond user_id, email
+    and role. Revocation is only as fresh as this worker's revocation set.
+    """
     def role_checker(user: User = Depends(get_current_user)):
         if user.role not in required_roles:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
         return user
 
-    return role_checker
+    if not (stateless and settings.STATELESS_ROLE_CHECKS):
+        return role_checker
+
+    def claims_checker(
+        token: Annotated[str, Depends(oauth2_scheme)],
+        claims: Optional[TokenClaims] = Depends(get_token_claims),
+        db: Session = Depends(get_db),
+    ):
+        if claims is None:
+            return role_checker(get_current_user(token, db))
+        if claims.role not in required_roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+        return claims
+
+    return claims_checker
 
 
 # from fastapi import Form
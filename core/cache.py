@@ -0,0 +1,71 @@
+import time
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Hashable, List
+
+
+_MISSING = object()
+_caches: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+
+def registered_caches() -> List["TTLCache"]:
+    """Named caches, for metrics."""
+    return sorted(_caches, key=lambda cache: cache.name)
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache with per-entry expiry.
+    Entries live in the worker process only, so keep TTLs short where
+    other workers may change the underlying rows.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60, name: str = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if name:
+            _caches.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < time.monotonic():
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
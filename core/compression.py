@@ -0,0 +1,286 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+gzip is always available; brotli and zstd are used when the optional
+`brotli` / `zstandard` packages are installed (requirements-optional.txt).
+Only allowlisted content types over COMPRESSION_MIN_SIZE are compressed,
+and responses that already carry a Content-Encoding (e.g. precompressed
+static files or a .gz export) pass through untouched.
+"""
+import gzip
+import mimetypes
+import os
+import zlib
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> Dict[str, type]:
+    """Supported encodings, in server preference order."""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = _ZstdStream
+    if brotli is not None:
+        encodings["br"] = _BrotliStream
+    encodings["gzip"] = _GzipStream
+    return encodings
+
+
+def compress_bytes(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def negotiate_encoding(accept_encoding: str, supported) -> Optional[str]:
+    """
+    Picks the supported encoding with the highest q-value, breaking ties by
+    server preference (the order of `supported`).
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _content_type_allowed(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    for allowed in settings.COMPRESSION_CONTENT_TYPES:
+        if allowed.endswith("/*") and media_type.startswith(allowed[:-1]):
+            return True
+        if media_type == allowed:
+            return True
+    return False
+
+
+def _level_for(encoding: str) -> int:
+    return {
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    }[encoding]
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware, so streamed bodies are compressed chunk by chunk
+    instead of being buffered.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.encodings[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str, stream_class, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.stream_class = stream_class
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.stream = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk tells us the size
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            if (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not _content_type_allowed(headers.get("content-type", ""))
+            ):
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                compressed = compress_bytes(body, self.encoding, _level_for(self.encoding))
+                headers["Content-Length"] = str(len(compressed))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+
+            del headers["Content-Length"]
+            self.stream = self.stream_class(_level_for(self.encoding))
+            await self._send(self.start_message)
+
+        if more_body:
+            chunk = self.stream.compress(body) + self.stream.flush()
+        else:
+            chunk = self.stream.compress(body) + self.stream.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves in-memory compressed variants built once by
+    precompress(), so large assets cost no compression CPU per request.
+    Falls back to the plain file when no variant matches.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.variants: Dict[Tuple[str, str], bytes] = {}
+
+    def precompress(self):
+        levels = {"gzip": 9, "br": 11, "zstd": 19}
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                full_path = os.path.join(root, filename)
+                relative_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                content_type = mimetypes.guess_type(full_path)[0] or ""
+                if not _content_type_allowed(content_type) or os.path.getsize(full_path) < settings.COMPRESSION_MIN_SIZE:
+                    continue
+
+                with open(full_path, "rb") as file:
+                    data = file.read()
+                for encoding in available_encodings():
+                    self.variants[(relative_path, encoding)] = compress_bytes(data, encoding, levels[encoding])
+
+    async def get_response(self, path: str, scope) -> Response:
+        relative_path = path.replace(os.sep, "/")
+        supported = [encoding for encoding in available_encodings() if (relative_path, encoding) in self.variants]
+        if not supported:
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        plain = await super().get_response(path, scope)
+        if plain.status_code not in (200, 304):
+            return plain
+        # The identity response and its 304 depend on Accept-Encoding too
+        plain.headers["Vary"] = "Accept-Encoding"
+
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), supported)
+        if encoding is None or plain.status_code != 200:
+            return plain
+
+        headers = {
+            key: value for key, value in plain.headers.items()
+            if key.lower() not in ("content-length", "content-encoding", "etag")
+        }
+        headers["Content-Encoding"] = encoding
+        etag = plain.headers.get("etag")
+        if etag:
+            # Each encoding is a different representation, so it needs its own strong ETag
+            headers["ETag"] = f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+            if_none_match = request_headers.get("if-none-match", "")
+            if headers["ETag"] in [tag.strip(" W/") for tag in if_none_match.split(",")]:
+                return NotModifiedResponse(Headers(headers=headers))
+
+        return Response(
+            content=self.variants[(relative_path, encoding)],
+            headers=headers,
+            media_type=plain.media_type,
+        )
@@ -9,7 +9,42 @@ class Settings:
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH_SIZE", 1000))
+
+    # Token buckets for the auth and catalog endpoints; see core/rate_limit.py for the policy format
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory or redis (REDIS_URL)
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_POLICIES: str = os.getenv("RATE_LIMIT_POLICIES", "")
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+    RATE_LIMIT_TRUST_FORWARDED: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"  # only behind a proxy that sets X-Forwarded-For
+
+    # Adaptive per-route-class concurrency limits with 503 shedding; see core/admission.py
+    ADMISSION_CONTROL_ENABLED: bool = os.getenv("ADMISSION_CONTROL_ENABLED", "false").lower() == "true"
+    ADMISSION_CLASSES: str = os.getenv("ADMISSION_CLASSES", "")  # e.g. "catalog.target_ms=200,auth.max_queue=100"
+    ADMISSION_DECREASE_FACTOR: float = float(os.getenv("ADMISSION_DECREASE_FACTOR", 0.9))
+    # How fast a class's last latency stops counting as overload once it goes quiet
+    ADMISSION_LATENCY_HALF_LIFE_SECONDS: float = float(os.getenv("ADMISSION_LATENCY_HALF_LIFE_SECONDS", 5))
+
+    # Let endpoints declared with require_role(..., stateless=True) authorize from token claims without loading the user
+    STATELESS_ROLE_CHECKS: bool = os.getenv("STATELESS_ROLE_CHECKS", "false").lower() == "true"
+    TOKEN_REVOCATION_MAX_ITEMS: int = int(os.getenv("TOKEN_REVOCATION_MAX_ITEMS", 100000))
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+
+    # Connection pool, per worker. Size it so workers * (size + overflow) stays under max_connections
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))  # Postgres only; 0 = no limit
+
+    # Comma-separated read replica URLs for read-only handlers; empty sends everything to DATABASE_URL
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL_SECONDS", 10))
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 30))
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
     
     SMTP_SERVER = os.getenv("SMTP_SERVER")
     SMTP_PORT = os.getenv("SMTP_PORT")
@@ -19,4 +54,87 @@ class Settings:
     VERIFICATION_TOKEN_EXPIRE_MINUTES: int = 10
     RESET_TOKEN_EXPIRE_MINUTES: int = 10
 
+    # Purge of expired/used verification and reset tokens (app/services/token_cleanup.py)
+    TOKEN_PURGE_BATCH_SIZE: int = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", 1000))
+    TOKEN_PURGE_MAX_BATCHES: int = int(os.getenv("TOKEN_PURGE_MAX_BATCHES", 100))
+    TOKEN_PURGE_PAUSE_SECONDS: float = float(os.getenv("TOKEN_PURGE_PAUSE_SECONDS", 0.05))
+    TOKEN_PURGE_GRACE_MINUTES: int = int(os.getenv("TOKEN_PURGE_GRACE_MINUTES", 60))
+    TOKEN_PARTITION_DAYS_AHEAD: int = int(os.getenv("TOKEN_PARTITION_DAYS_AHEAD", 3))
+    TOKEN_PARTITION_RETAIN_DAYS: int = int(os.getenv("TOKEN_PARTITION_RETAIN_DAYS", 2))
+    TOKEN_PURGE_INTERVAL_MINUTES: int = int(os.getenv("TOKEN_PURGE_INTERVAL_MINUTES", 15))
+
+    # In-process job scheduler (core/scheduler.py). Turn it off in the web workers
+    # when a separate `python -m app.services.scheduler_worker` process runs the jobs
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_WORKERS: int = int(os.getenv("SCHEDULER_WORKERS", 2))
+    SCHEDULER_POLL_SECONDS: float = float(os.getenv("SCHEDULER_POLL_SECONDS", 5))
+    SCHEDULER_LEASE_SECONDS: int = int(os.getenv("SCHEDULER_LEASE_SECONDS", 60))  # keep well above the poll interval
+    SCHEDULER_RETRY_BASE_SECONDS: float = float(os.getenv("SCHEDULER_RETRY_BASE_SECONDS", 30))
+    SCHEDULER_RETRY_MAX_SECONDS: float = float(os.getenv("SCHEDULER_RETRY_MAX_SECONDS", 3600))
+    JOB_HISTORY_RETAIN_DAYS: int = int(os.getenv("JOB_HISTORY_RETAIN_DAYS", 7))
+
+    # Per-worker cache of each user's wishlisted product IDs; 0 disables it
+    WISHLIST_CACHE_TTL_SECONDS: int = int(os.getenv("WISHLIST_CACHE_TTL_SECONDS", 0))
+    WISHLIST_CACHE_MAX_ITEMS: int = int(os.getenv("WISHLIST_CACHE_MAX_ITEMS", 500))
+
+    # Per-worker cache of product detail responses; 0 disables it
+    PRODUCT_CACHE_TTL_SECONDS: int = int(os.getenv("PRODUCT_CACHE_TTL_SECONDS", 0))
+    PRODUCT_CACHE_MAX_ITEMS: int = int(os.getenv("PRODUCT_CACHE_MAX_ITEMS", 10000))
+
+    # Per-worker cache of categories and currencies; 0 disables it
+    REFERENCE_CACHE_TTL_SECONDS: int = int(os.getenv("REFERENCE_CACHE_TTL_SECONDS", 300))
+
+    # Startup cache warm-up from recorded access stats (app/services/cache_warmup.py).
+    # /ready answers 503 until it finishes or the budget runs out
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_BUDGET_SECONDS: float = float(os.getenv("WARMUP_BUDGET_SECONDS", 30))
+    WARMUP_TOP_PRODUCTS: int = int(os.getenv("WARMUP_TOP_PRODUCTS", 500))
+    WARMUP_TOP_LISTINGS: int = int(os.getenv("WARMUP_TOP_LISTINGS", 50))
+    ACCESS_STATS_ENABLED: bool = os.getenv("ACCESS_STATS_ENABLED", "true").lower() == "true"
+    ACCESS_STATS_FLUSH_SECONDS: float = float(os.getenv("ACCESS_STATS_FLUSH_SECONDS", 60))
+    ACCESS_STATS_MAX_KEYS: int = int(os.getenv("ACCESS_STATS_MAX_KEYS", 10000))
+    ACCESS_STATS_RETAIN_DAYS: int = int(os.getenv("ACCESS_STATS_RETAIN_DAYS", 14))
+
+    PRODUCT_IMPORT_BATCH_SIZE: int = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", 500))
+    PRODUCT_IMPORT_MAX_ERRORS: int = int(os.getenv("PRODUCT_IMPORT_MAX_ERRORS", 1000))
+    CATALOG_EXPORT_BATCH_SIZE: int = int(os.getenv("CATALOG_EXPORT_BATCH_SIZE", 1000))
+
+    # Response compression; brotli and zstd need the optional brotli / zstandard packages (requirements-optional.txt)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+    COMPRESSION_ZSTD_LEVEL: int = int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3))
+    COMPRESSION_CONTENT_TYPES: list = os.getenv(
+        "COMPRESSION_CONTENT_TYPES",
+        "application/json,application/x-ndjson,application/javascript,text/*,image/svg+xml"
+    ).split(",")
+
+    # /metrics; set METRICS_MULTIPROC_DIR when running several uvicorn workers
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_MULTIPROC_DIR: str = os.getenv("METRICS_MULTIPROC_DIR", "")
+    METRICS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", 5))
+    # Bearer token the scraper must send (Prometheus: authorization.credentials).
+    # Leave empty only when /metrics is unreachable from the public internet.
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+
+    # Per-request query stats (core.database.QueryStatsMiddleware)
+    QUERY_STATS_HEADERS: bool = os.getenv("QUERY_STATS_HEADERS", "false").lower() == "true"  # dev only
+    QUERY_STATS_SLOWEST: int = int(os.getenv("QUERY_STATS_SLOWEST", 3))
+    SLOW_REQUEST_QUERY_COUNT: int = int(os.getenv("SLOW_REQUEST_QUERY_COUNT", 20))
+    SLOW_REQUEST_DB_MS: float = float(os.getenv("SLOW_REQUEST_DB_MS", 250))
+    # Strict mode is for tests: a request over its @query_budget raises QueryBudgetExceeded
+    QUERY_BUDGET_STRICT: bool = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+    QUERY_BUDGET_DEFAULT: int = int(os.getenv("QUERY_BUDGET_DEFAULT", 20))
+
+    # Slow-query log (core.query_log); stats are kept for every statement
+    QUERY_LOG_ENABLED: bool = os.getenv("QUERY_LOG_ENABLED", "true").lower() == "true"
+    QUERY_LOG_WINDOW: int = int(os.getenv("QUERY_LOG_WINDOW", 500))
+    QUERY_LOG_MAX_FINGERPRINTS: int = int(os.getenv("QUERY_LOG_MAX_FINGERPRINTS", 2000))
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", 200))
+    SLOW_QUERY_LOG_PARAMETERS: bool = os.getenv("SLOW_QUERY_LOG_PARAMETERS", "false").lower() == "true"
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.1))
+    SLOW_QUERY_EXPLAIN_TOP_N: int = int(os.getenv("SLOW_QUERY_EXPLAIN_TOP_N", 10))
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", 600))
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", 5000))
+
 settings = Settings()
\ No newline at end of file
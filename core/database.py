@@ -1,11 +1,86 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import List, Optional, Tuple
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.engine import make_url
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from core.config import settings
+from core.query_log import query_log
 
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
+
+def engine_options(url: str) -> dict:
+    """
+    Pool and timeout settings for create_engine. In-memory SQLite uses a
+    single-connection pool that takes none of the QueuePool arguments.
+    """
+    url = make_url(url)
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        # Server-side limit per statement; a long export can raise it with SET LOCAL
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+class PoolWaiters:
+    """
+    Counts callers currently inside engine.raw_connection(), i.e. queued on
+    (or acquiring from) the pool. QueuePool doesn't expose its waiters.
+    """
+
+    def __init__(self, engine):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._raw_connection = engine.raw_connection
+        engine.raw_connection = self._tracked_raw_connection
+
+    def _tracked_raw_connection(self):
+        with self._lock:
+            self.count += 1
+        try:
+            return self._raw_connection()
+        finally:
+            with self._lock:
+                self.count -= 1
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+pool_waiters = PoolWaiters(engine)
+
+
+def pool_stats(engine=engine, waiters: PoolWaiters = pool_waiters) -> dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "waiting": waiters.count if waiters else None}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        stats[name] = getattr(pool, name)() if hasattr(pool, name) else None
+    if stats["overflow"] is not None:
+        # QueuePool counts overflow from -size; report only connections beyond the pool size
+        stats["overflow"] = max(0, stats["overflow"])
+    if hasattr(pool, "timeout"):
+        stats["max_overflow"] = getattr(pool, "_max_overflow", None)
+        stats["timeout"] = pool.timeout()
+    return stats
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -16,3 +91,336 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Read replicas
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine = create_engine(url, **engine_options(url))
+        self.waiters = PoolWaiters(self.engine)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, exception_context):
+        # Take the replica out of rotation at once; the health checker brings it back
+        if exception_context.is_disconnect or exception_context.connection is None:
+            self.healthy = False
+            self.last_error = str(exception_context.original_exception)
+
+    def check(self):
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                if connection.dialect.name == "postgresql":
+                    # Replay timestamp alone grows while an idle primary sends nothing
+                    self.lag_seconds = connection.execute(text(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                    )).scalar()
+        except SQLAlchemyError as e:
+            self.healthy = False
+            self.last_error = str(e)
+            return
+
+        lagging = self.lag_seconds is not None and self.lag_seconds > settings.REPLICA_MAX_LAG_SECONDS
+        self.healthy = not lagging
+        self.last_error = f"Replication lag {self.lag_seconds:.1f}s" if lagging else None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+            "pool": pool_stats(self.engine, self.waiters),
+        }
+
+
+class ReplicaSet:
+    """
+    Round-robin over healthy replicas. When none is healthy, reads fall back
+    to the primary. A daemon thread re-checks every replica (connectivity and,
+    on Postgres, replay lag) every REPLICA_HEALTH_CHECK_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def check_all(self):
+        for replica in self.replicas:
+            replica.check()
+
+    def _run(self):
+        while not self._stopped.wait(settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS):
+            self.check_all()
+
+    def start_health_checks(self):
+        if self.replicas and self._thread is None:
+            self.check_all()
+            self._thread = threading.Thread(target=self._run, name="replica-health-check", daemon=True)
+            self._thread.start()
+
+    def stop_health_checks(self):
+        self._stopped.set()
+        self._thread = None
+
+
+replicas = ReplicaSet([url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()])
+
+
+class _RequestWrites:
+    def __init__(self, sticky: bool):
+        self.sticky = sticky  # client wrote recently (cookie)
+        self.wrote = False    # this request wrote to the primary
+
+
+_request_writes: ContextVar[Optional[_RequestWrites]] = ContextVar("request_writes", default=None)
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _mark_primary_write(conn, cursor, statement, parameters, context, executemany):
+    state = _request_writes.get()
+    if state is not None and not state.wrote and context is not None and (
+        context.isinsert or context.isupdate or context.isdelete
+    ):
+        state.wrote = True
+
+
+def _reads_need_primary() -> bool:
+    state = _request_writes.get()
+    return state is not None and (state.sticky or state.wrote)
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to one replica, chosen once per session so every statement
+    sees the same snapshot, and everything else to the primary: flushes,
+    INSERT/UPDATE/DELETE, and all statements once this request or this
+    client (see ReplicaStickinessMiddleware) has written.
+    """
+
+    _replica_engine = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase) or _reads_need_primary():
+            return engine
+
+        if self._replica_engine is None:
+            replica = replicas.pick()
+            self._replica_engine = replica.engine if replica else engine
+        return self._replica_engine
+
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+
+def get_read_db():
+    """
+    get_db for read-only handlers: a replica when one is configured and
+    healthy, the primary otherwise.
+    """
+    db = ReadSessionLocal() if replicas else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def read_engine():
+    """Engine for standalone read-only work (e.g. exports) outside a request's writes."""
+    replica = replicas.pick() if replicas and not _reads_need_primary() else None
+    return replica.engine if replica else engine
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes across requests: after a request writes to the primary,
+    the client gets a short-lived cookie that keeps its reads on the primary
+    for READ_YOUR_WRITES_SECONDS, longer than replicas normally lag.
+    """
+
+    cookie_name = "db_primary_until"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replicas:
+            await self.app(scope, receive, send)
+            return
+
+        cookie = SimpleCookie(Headers(scope=scope).get("cookie", ""))
+        try:
+            sticky = float(cookie[self.cookie_name].value) > time.time()
+        except (KeyError, ValueError):
+            sticky = False
+
+        state = _RequestWrites(sticky)
+        token = _request_writes.set(state)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                until = int(time.time() + settings.READ_YOUR_WRITES_SECONDS)
+                MutableHeaders(raw=message["headers"]).append(
+                    "Set-Cookie",
+                    f"{self.cookie_name}={until}; Max-Age={settings.READ_YOUR_WRITES_SECONDS}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
+
+
+# Per-request query instrumentation
+
+query_logger = logging.getLogger("app.queries")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestQueryStats:
+    """Queries issued while handling one request."""
+
+    def __init__(self, keep_slowest: int):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.keep_slowest = keep_slowest
+        self.slowest: List[Tuple[float, str]] = []  # min-heap of (seconds, statement)
+        self.statements: List[str] = []
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        if settings.QUERY_BUDGET_STRICT:
+            self.statements.append(statement)
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest, (seconds, statement))
+        elif self.slowest and seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, statement))
+
+    def slowest_statements(self) -> List[Tuple[float, str]]:
+        return sorted(self.slowest, reverse=True)
+
+
+_request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _request_query_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+
+    stats = _request_query_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+    # EXPLAINs issued by the slow-query log opt out, so they don't feed back into it
+    if settings.QUERY_LOG_ENABLED and conn.get_execution_options().get("query_log", True):
+        query_log.record(conn.engine, statement, parameters, seconds)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_query_timer(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def query_budget(max_queries: int):
+    """
+    Declares how many queries a handler may issue; checked on every request
+    in strict mode (QUERY_BUDGET_STRICT) instead of QUERY_BUDGET_DEFAULT.
+
+        @router.get("/")
+        @query_budget(5)
+        async def get_order_history(...):
+    """
+    def decorator(func):
+        func.__query_budget__ = max_queries
+        return func
+    return decorator
+
+
+class QueryStatsMiddleware:
+    """
+    Collects RequestQueryStats for every HTTP request. Adds X-DB-Query-Count,
+    X-DB-Time-Ms and Server-Timing headers when QUERY_STATS_HEADERS is on,
+    logs a warning past SLOW_REQUEST_QUERY_COUNT / SLOW_REQUEST_DB_MS, and in
+    strict mode raises QueryBudgetExceeded so tests fail on N+1 regressions.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(settings.QUERY_STATS_SLOWEST)
+        token = _request_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.QUERY_STATS_HEADERS:
+                # Streamed bodies keep querying after this point; headers show the count so far
+                db_ms = stats.total_seconds * 1000
+                headers = MutableHeaders(raw=message["headers"])
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{db_ms:.1f}"
+                headers.append("Server-Timing", f"db;dur={db_ms:.1f};desc=\"{stats.count} queries\"")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_query_stats.reset(token)
+
+        route = scope.get("route")
+        route_path = getattr(route, "path", scope["path"])
+        db_ms = stats.total_seconds * 1000
+
+        if stats.count > settings.SLOW_REQUEST_QUERY_COUNT or db_ms > settings.SLOW_REQUEST_DB_MS:
+            query_logger.warning(
+                "%s %s issued %d queries in %.1f ms; slowest: %s",
+                scope["method"], route_path, stats.count, db_ms,
+                " | ".join(f"{seconds * 1000:.1f} ms {statement[:200]}" for seconds, statement in stats.slowest_statements()),
+            )
+
+        if settings.QUERY_BUDGET_STRICT:
+            budget = getattr(getattr(route, "endpoint", None), "__query_budget__", settings.QUERY_BUDGET_DEFAULT)
+            if stats.count > budget:
+                raise QueryBudgetExceeded(
+                    f"{scope['method']} {route_path} issued {stats.count} queries, budget is {budget}:\n\n"
+                    + "\n\n".join(stats.statements)
+                )
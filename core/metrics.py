@@ -0,0 +1,467 @@
+"""
+Prometheus-style metrics without a client library.
+
+Every metric keeps one shard (a plain dict) per thread, so recording a
+value never takes a lock: only the owning thread writes its shard and
+scrapes add the shards up. Each uvicorn worker has its own registry;
+with METRICS_MULTIPROC_DIR set, workers periodically write a snapshot
+to <dir>/<pid>.json and /metrics merges all of them, summing counters
+and histograms and summing gauges over live workers only. Clear the
+directory before (re)starting the server, as with prometheus_client.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.config import settings
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards: List[dict] = []
+        self._local = threading.local()
+        registry.register(self)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            self._shards.append(shard)  # list.append is atomic; happens once per thread
+        return shard
+
+    def _merged(self) -> dict:
+        merged = {}
+        for shard in list(self._shards):
+            for labels, value in shard.copy().items():
+                merged[labels] = _add(merged.get(labels), value)
+        return merged
+
+    def collect(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(labels), value] for labels, value in self._merged().items()],
+        }
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    inc()/dec() may come from any thread. set() is for values owned by a
+    single writer (e.g. a limit); don't mix set() and inc() on one label set.
+    """
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._set_values: dict = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, labels: Tuple = (), value: float = 0):
+        self._set_values[labels] = value
+
+    def _merged(self) -> dict:
+        merged = super()._merged()
+        merged.update(self._set_values.copy())
+        return merged
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, labels: Tuple, value: float):
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # Per-bucket (non-cumulative) counts, then +Inf, sum, count
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def collect(self) -> dict:
+        family = super().collect()
+        family["buckets"] = list(self.buckets)
+        return family
+
+
+def _add(left, right):
+    if left is None:
+        return list(right) if isinstance(right, list) else right
+    if isinstance(right, list):
+        return [a + b for a, b in zip(left, right)]
+    return left + right
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.collectors: List[Callable[[], Dict[str, dict]]] = []
+
+    def register(self, metric: _Metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def register_collector(self, collector: Callable[[], Dict[str, dict]]):
+        """
+        `collector` is called on every snapshot and returns families in the
+        collect() format, for values read from elsewhere (pool, caches).
+        """
+        self.collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, dict]:
+        families = {name: metric.collect() for name, metric in self.metrics.items()}
+        for collector in self.collectors:
+            try:
+                families.update(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        return families
+
+
+registry = Registry()
+
+
+# Multiprocess mode
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_snapshot(directory: str):
+    """Atomically replaces this worker's snapshot file."""
+    payload = json.dumps(registry.snapshot())
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w") as file:
+        file.write(payload)
+    os.replace(temp_path, os.path.join(directory, f"{os.getpid()}.json"))
+
+
+def read_snapshots(directory: str) -> Iterable[Tuple[int, Dict[str, dict]]]:
+    for filename in os.listdir(directory):
+        if not filename.endswith(".json") or filename.startswith("."):
+            continue
+        try:
+            pid = int(filename[:-5])
+            with open(os.path.join(directory, filename)) as file:
+                yield pid, json.load(file)
+        except (ValueError, OSError) as e:
+            print(f"Skipping metrics snapshot {filename}: {e}")
+
+
+def merge_snapshots(snapshots: Iterable[Tuple[int, Dict[str, dict]]]) -> Dict[str, dict]:
+    merged: Dict[str, dict] = {}
+    own_pid = os.getpid()
+    for pid, families in snapshots:
+        # A dead worker's counters still count; its gauges don't
+        alive = pid == own_pid or _pid_alive(pid)
+        for name, family in families.items():
+            if family["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**family, "samples": {}})
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                target["samples"][key] = _add(target["samples"].get(key), value)
+
+    for family in merged.values():
+        family["samples"] = [[list(labels), value] for labels, value in family["samples"].items()]
+    return merged
+
+
+class _SnapshotWriter(threading.Thread):
+    def __init__(self, directory: str, interval: float):
+        super().__init__(name="metrics-snapshot-writer", daemon=True)
+        self.directory = directory
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                write_snapshot(self.directory)
+            except OSError as e:
+                print(f"Failed to write metrics snapshot: {e}")
+
+
+_writer: Optional[_SnapshotWriter] = None
+
+
+def start_multiprocess_writer():
+    global _writer
+    if settings.METRICS_MULTIPROC_DIR and _writer is None:
+        os.makedirs(settings.METRICS_MULTIPROC_DIR, exist_ok=True)
+        _writer = _SnapshotWriter(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL_SECONDS)
+        _writer.start()
+
+
+def stop_multiprocess_writer():
+    global _writer
+    if _writer is not None:
+        _writer.stopped.set()
+        write_snapshot(_writer.directory)
+        _writer = None
+
+
+# Text exposition
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(families: Dict[str, dict]) -> str:
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {_escape(family['help'])}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        labelnames = family["labelnames"]
+
+        for labels, value in sorted(family["samples"], key=lambda sample: [str(label) for label in sample[0]]):
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_labels_text(labelnames, labels)} {_number(value)}")
+                continue
+
+            cumulative = 0
+            for upper, count in zip(family["buckets"] + [float("inf")], value[:-2]):
+                cumulative += count
+                le = 'le="%s"' % _number(upper)
+                lines.append(f"{name}_bucket{_labels_text(labelnames, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels_text(labelnames, labels)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels_text(labelnames, labels)} {value[-1]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def generate_latest() -> str:
+    directory = settings.METRICS_MULTIPROC_DIR
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        write_snapshot(directory)
+        families = merge_snapshots(read_snapshots(directory))
+    else:
+        families = registry.snapshot()
+
+    # Derived after merging, so the ratio covers every worker
+    families["cache_hit_ratio"] = _cache_hit_ratio(families)
+    return render(families)
+
+
+# HTTP instrumentation
+
+http_requests_total = Counter(
+    "http_requests_total", "Requests handled, by route template and status", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "Request latency including middleware", ("method", "route")
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress", "Requests currently being handled, by route template", ("method", "route")
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Records count and latency per route template. The template is read from
+    scope["route"], which the router sets on the shared scope once it matches,
+    so raw paths (and their unbounded IDs) never become label values.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            http_requests_total.inc((method, route, str(status)))
+            http_request_duration_seconds.observe((method, route), time.perf_counter() - started)
+
+
+def _track_in_progress(route_app, route_path: str):
+    async def app(scope, receive, send):
+        labels = (scope["method"], route_path)
+        http_requests_in_progress.inc(labels)
+        try:
+            await route_app(scope, receive, send)
+        finally:
+            http_requests_in_progress.dec(labels)
+
+    app.__wrapped_for_metrics__ = True
+    return app
+
+
+def instrument_routes(app):
+    """
+    Wraps each route's handler so the in-progress gauge knows its template
+    (the middleware only learns it after routing). Call once all routers
+    are included.
+    """
+    for route in app.router.routes:
+        route_app = getattr(route, "app", None)
+        if route_app is None or getattr(route_app, "__wrapped_for_metrics__", False):
+            continue
+        route.app = _track_in_progress(route_app, route.path)
+
+
+# Database and cache instrumentation
+
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+db_pool_checkout_timeouts_total = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up waiting for a connection"
+)
+
+_instrumented_engines = weakref.WeakKeyDictionary()
+
+
+def instrument_engine(engine, waiters=None):
+    """
+    Times engine.raw_connection(), which is where sessions block on the pool,
+    and exposes the pool's occupancy on each scrape.
+    """
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines[engine] = waiters
+
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        except PoolTimeoutError:
+            db_pool_checkout_timeouts_total.inc()
+            raise
+        finally:
+            db_pool_checkout_seconds.observe((), time.perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+
+
+def _pool_families() -> Dict[str, dict]:
+    from core.database import pool_stats
+
+    gauges = (
+        ("db_pool_checked_out", "checkedout", "Connections currently checked out of the pool"),
+        ("db_pool_size", "size", "Configured pool size"),
+        ("db_pool_overflow", "overflow", "Connections open beyond the pool size"),
+        ("db_pool_waiting", "waiting", "Callers waiting for a connection"),
+    )
+    samples = {name: [] for name, _, _ in gauges}
+    for engine, waiters in list(_instrumented_engines.items()):
+        stats = pool_stats(engine, waiters)
+        database = engine.url.database or engine.url.drivername
+        for name, key, _ in gauges:
+            if stats.get(key) is not None:
+                samples[name].append([[database], stats[key]])
+
+    return {
+        name: {"type": "gauge", "help": help_text, "labelnames": ["database"], "samples": samples[name]}
+        for name, _, help_text in gauges
+    }
+
+
+def _cache_families() -> Dict[str, dict]:
+    from core.cache import registered_caches
+
+    hits, misses, sizes = [], [], []
+    for cache in registered_caches():
+        hits.append([[cache.name], cache.hits])
+        misses.append([[cache.name], cache.misses])
+        sizes.append([[cache.name], len(cache)])
+
+    return {
+        "cache_hits_total": {"type": "counter", "help": "Cache lookups that found a live entry", "labelnames": ["cache"], "samples": hits},
+        "cache_misses_total": {"type": "counter", "help": "Cache lookups that missed or found an expired entry", "labelnames": ["cache"], "samples": misses},
+        "cache_entries": {"type": "gauge", "help": "Entries currently held", "labelnames": ["cache"], "samples": sizes},
+    }
+
+
+def _cache_hit_ratio(families: Dict[str, dict]) -> dict:
+    hits = {tuple(labels): value for labels, value in families.get("cache_hits_total", {}).get("samples", [])}
+    misses = {tuple(labels): value for labels, value in families.get("cache_misses_total", {}).get("samples", [])}
+    return {
+        "type": "gauge",
+        "help": "Hits / lookups since the worker started (use rate() of the counters for recent ratios)",
+        "labelnames": ["cache"],
+        "samples": [
+            [list(labels), hits[labels] / (hits[labels] + misses.get(labels, 0))]
+            for labels in hits if hits[labels] + misses.get(labels, 0)
+        ],
+    }
+
+
+registry.register_collector(_pool_families)
+registry.register_collector(_cache_families)
@@ -0,0 +1,210 @@
+"""
+Slow-query log.
+
+Every statement executed on the engine is reduced to a fingerprint
+(literals, placeholders and IN/VALUES lists normalized) and its latency
+added to that fingerprint's rolling window, from which p50/p95/p99 are
+computed on demand. Statements slower than SLOW_QUERY_MS are written to
+the app.slow_queries logger as one JSON object per line.
+
+For SELECTs among the worst offenders (top SLOW_QUERY_EXPLAIN_TOP_N by
+total time), a sample of slow executions is re-run under
+EXPLAIN (ANALYZE, BUFFERS) on a background thread, inside a read-only
+transaction that is rolled back, at most once per fingerprint per
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS. SQLite falls back to EXPLAIN QUERY
+PLAN. Stats are per worker.
+"""
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+from core.config import settings
+
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))*", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    normalized = _VALUES_LIST.sub("VALUES (...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class FingerprintStats:
+    def __init__(self, fingerprint: str, window: int):
+        self.fingerprint = fingerprint
+        self.id = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+        self.count = 0
+        self.slow_count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.recent = deque(maxlen=window)
+        self.last_seen = 0.0
+        self.plan: Optional[Any] = None
+        self.plan_captured_at: Optional[float] = None
+        self.explain_started_at = 0.0
+
+    def percentile(self, q: float) -> float:
+        samples = sorted(self.recent)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "slow_count": self.slow_count,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "plan": self.plan,
+            "plan_captured_at": self.plan_captured_at,
+        }
+
+
+class QueryLog:
+    def __init__(self):
+        self._stats: "OrderedDict[str, FingerprintStats]" = OrderedDict()
+        self._fingerprints: "OrderedDict[str, str]" = OrderedDict()  # statement -> fingerprint
+        self._lock = threading.Lock()
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    def _fingerprint(self, statement: str) -> str:
+        # SQLAlchemy caches compiled SQL, so the same strings repeat; skip the regexes for them
+        cached = self._fingerprints.get(statement)
+        if cached is None:
+            cached = self._fingerprints[statement] = fingerprint(statement)
+            if len(self._fingerprints) > settings.QUERY_LOG_MAX_FINGERPRINTS * 4:
+                self._fingerprints.popitem(last=False)
+        return cached
+
+    def record(self, engine, statement: str, parameters, seconds: float):
+        key = self._fingerprint(statement)
+        now = time.time()
+        slow = seconds * 1000 >= settings.SLOW_QUERY_MS
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = FingerprintStats(key, settings.QUERY_LOG_WINDOW)
+                if len(self._stats) > settings.QUERY_LOG_MAX_FINGERPRINTS:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(key)
+
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.recent.append(seconds)
+            stats.last_seen = now
+            if slow:
+                stats.slow_count += 1
+
+            explain = slow and self._should_explain(stats, statement, now)
+            if explain:
+                stats.explain_started_at = now
+
+        if slow:
+            entry = {
+                "event": "slow_query",
+                "fingerprint_id": stats.id,
+                "duration_ms": round(seconds * 1000, 3),
+                "p95_ms": round(stats.percentile(0.95) * 1000, 3),
+                "statement": statement,
+            }
+            if settings.SLOW_QUERY_LOG_PARAMETERS:
+                entry["parameters"] = _jsonable(parameters)
+            slow_query_logger.warning(json.dumps(entry, default=str))
+
+        if explain:
+            self._explainer.submit(self._explain, engine, stats, statement, parameters)
+
+    def _should_explain(self, stats: FingerprintStats, statement: str, now: float) -> bool:
+        if not statement.lstrip()[:6].upper() == "SELECT":
+            return False  # ANALYZE executes the statement
+        if now - stats.explain_started_at < settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+            return False
+        if random.random() >= settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            return False
+
+        worst = sorted(self._stats.values(), key=lambda item: item.total_seconds, reverse=True)
+        return stats in worst[:settings.SLOW_QUERY_EXPLAIN_TOP_N]
+
+    def _explain(self, engine, stats: FingerprintStats, statement: str, parameters):
+        try:
+            with engine.connect() as connection:
+                connection = connection.execution_options(query_log=False)
+                with connection.begin() as transaction:
+                    if connection.dialect.name == "postgresql":
+                        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+                        connection.exec_driver_sql(
+                            f"SET LOCAL statement_timeout = {int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}"
+                        )
+                        rows = connection.exec_driver_sql(
+                            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+                        ).scalars().all()
+                        plan = rows[0] if len(rows) == 1 else rows
+                    else:
+                        plan = [
+                            " ".join(str(value) for value in row)
+                            for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+                        ]
+                    transaction.rollback()
+        except Exception as e:
+            print(f"EXPLAIN failed for slow query {stats.id}: {e}")
+            return
+
+        stats.plan = plan
+        stats.plan_captured_at = time.time()
+        slow_query_logger.warning(json.dumps({"event": "slow_query_plan", "fingerprint_id": stats.id, "plan": plan}, default=str))
+
+    def top(self, limit: int = 20, sort_by: str = "total") -> List[dict]:
+        keys = {
+            "total": lambda item: item.total_seconds,
+            "count": lambda item: item.count,
+            "max": lambda item: item.max_seconds,
+            "p99": lambda item: item.percentile(0.99),
+            "slow": lambda item: item.slow_count,
+        }
+        with self._lock:
+            snapshot = list(self._stats.values())
+        return [item.to_dict() for item in sorted(snapshot, key=keys[sort_by], reverse=True)[:limit]]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _jsonable(parameters):
+    if isinstance(parameters, dict):
+        return {key: str(value)[:200] for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_jsonable(value) if isinstance(value, (list, tuple, dict)) else str(value)[:200] for value in parameters]
+    return str(parameters)[:200]
+
+
+TOP_QUERY_SORTS = {"total", "count", "max", "p99", "slow"}
+
+query_log = QueryLog()
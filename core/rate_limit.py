@@ -0,0 +1,299 @@
+"""
+Token-bucket rate limiting for the auth and catalog endpoints.
+
+Each policy matches a method and path pattern and has a bucket per client
+IP and, optionally, one per account (the email or username in the request
+body), so a credential-stuffing run is throttled whether it spreads over
+many accounts or many addresses. A rejected request gets 429 with
+Retry-After before it reaches bcrypt, SMTP or the database.
+
+Buckets live in process memory by default. With RATE_LIMIT_BACKEND=redis
+they are shared by every worker through REDIS_URL; refill and take happen
+in one Lua script, so concurrent workers cannot both spend the last token.
+If Redis is unreachable requests are let through rather than failed.
+
+Limits can be overridden per policy without code changes:
+
+    RATE_LIMIT_POLICIES="login.ip=20/60,login.account=5/300,catalog.ip=0/60"
+
+Each entry is <policy>.<ip|account>=<burst>/<seconds to refill the burst>;
+a burst of 0 turns that bucket off.
+"""
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from core.config import settings
+from core.metrics import Counter
+
+
+logger = logging.getLogger("app.rate_limit")
+
+# Bodies are only buffered to find the account; anything larger is not a login form
+MAX_ACCOUNT_BODY_BYTES = 64 * 1024
+
+rate_limited_total = Counter(
+    "rate_limited_total", "Requests rejected by the rate limiter", ("policy", "bucket")
+)
+
+
+@dataclass(frozen=True)
+class Limit:
+    burst: float
+    period_seconds: float
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second."""
+        return self.burst / self.period_seconds
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    methods: frozenset
+    pattern: "re.Pattern"
+    per_ip: Optional[Limit] = None
+    per_account: Optional[Limit] = None
+    account_field: Optional[str] = None
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and self.pattern.match(path) is not None
+
+
+DEFAULT_POLICIES = [
+    RateLimitPolicy(
+        "login", frozenset({"POST"}), re.compile(r"^/auth/login/?$"),
+        per_ip=Limit(20, 60), per_account=Limit(5, 300), account_field="username",
+    ),
+    RateLimitPolicy(
+        "forgot_password", frozenset({"POST"}), re.compile(r"^/auth/forgot-password/?$"),
+        per_ip=Limit(5, 300), per_account=Limit(3, 900), account_field="email",
+    ),
+    RateLimitPolicy(
+        "verification_link", frozenset({"POST"}), re.compile(r"^/auth/request-verification-link/?$"),
+        per_ip=Limit(5, 300), per_account=Limit(3, 900), account_field="email",
+    ),
+    RateLimitPolicy(
+        "catalog", frozenset({"GET"}),
+        re.compile(r"^/(products/(batch/|\d+/product/view/|\d+/reviews/)?|misc/.*)$"),
+        per_ip=Limit(120, 60),
+    ),
+]
+
+
+def parse_policy_overrides(value: str, policies: List[RateLimitPolicy]) -> List[RateLimitPolicy]:
+    by_name = {policy.name: policy for policy in policies}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        try:
+            target, _, limit = entry.partition("=")
+            name, _, bucket = target.partition(".")
+            burst, _, period = limit.partition("/")
+            policy = by_name[name]
+            if not float(period) > 0:
+                raise ValueError("period must be positive")
+            new_limit = Limit(float(burst), float(period)) if float(burst) > 0 else None
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid RATE_LIMIT_POLICIES entry '{entry}'")
+
+        if bucket == "ip":
+            by_name[name] = replace(policy, per_ip=new_limit)
+        elif bucket == "account":
+            by_name[name] = replace(policy, per_account=new_limit)
+        else:
+            raise ValueError(f"Invalid RATE_LIMIT_POLICIES entry '{entry}'; bucket must be ip or account")
+    return list(by_name.values())
+
+
+def configured_policies() -> List[RateLimitPolicy]:
+    return parse_policy_overrides(settings.RATE_LIMIT_POLICIES, DEFAULT_POLICIES)
+
+
+class MemoryBuckets:
+    """Per-process buckets; the least recently used are dropped past max_keys."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: Limit, cost: float = 1) -> float:
+        """Spends cost tokens; returns 0 if allowed, else seconds until enough have refilled."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# KEYS[1] bucket; ARGV burst, rate per second, cost. Returns the wait in seconds as a string
+# (Lua numbers become integers on the way out). Uses the server clock so workers agree.
+TOKEN_BUCKET_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Buckets shared by all workers; one script call per check."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio
+
+        self.prefix = prefix
+        self._redis = redis.asyncio.Redis.from_url(url)
+        self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, limit: Limit, cost: float = 1) -> float:
+        try:
+            wait = await self._script(keys=[self.prefix + key], args=[limit.burst, limit.rate, cost])
+        except Exception as e:
+            logger.warning("Rate limiter backend unavailable, allowing request: %s", e)
+            return 0.0
+        return float(wait)
+
+
+def make_buckets():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBuckets(settings.REDIS_URL)
+    return MemoryBuckets(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def client_ip(scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def account_from_body(body: bytes, content_type: str, field: str) -> Optional[str]:
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            value = parse_qs(body.decode("latin-1")).get(field, [None])[0]
+        elif content_type.startswith("application/json"):
+            data = json.loads(body)
+            value = data.get(field) if isinstance(data, dict) else None
+        else:
+            return None
+    except ValueError:
+        return None
+
+    if not isinstance(value, str) or not value.strip():
+        return None
+    # Keys never hold the address itself
+    return hashlib.sha256(value.strip().lower().encode()).hexdigest()[:32]
+
+
+async def _read_body(receive):
+    """Reads up to MAX_ACCOUNT_BODY_BYTES and returns (body, messages to replay)."""
+    messages = []
+    body = b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False) or len(body) > MAX_ACCOUNT_BODY_BYTES:
+            break
+    return body, messages
+
+
+def _replay(messages, receive):
+    pending = list(messages)
+
+    async def replayed():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replayed
+
+
+class RateLimitMiddleware:
+    """Pure ASGI, so unmatched requests pass through without touching their body."""
+
+    def __init__(self, app, policies: Optional[List[RateLimitPolicy]] = None, buckets=None):
+        self.app = app
+        self.policies = configured_policies() if policies is None else policies
+        self.buckets = buckets or make_buckets()
+
+    def _policy_for(self, scope) -> Optional[RateLimitPolicy]:
+        for policy in self.policies:
+            if policy.matches(scope["method"], scope["path"]):
+                return policy
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        policy = self._policy_for(scope)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        if policy.per_ip:
+            wait = await self.buckets.take(f"{policy.name}:ip:{client_ip(scope)}", policy.per_ip)
+            if wait:
+                await self._reject(policy, "ip", wait, scope, receive, send)
+                return
+
+        if policy.per_account and policy.account_field:
+            body, messages = await _read_body(receive)
+            receive = _replay(messages, receive)
+            account = account_from_body(body, Headers(scope=scope).get("content-type", ""), policy.account_field)
+            if account:
+                wait = await self.buckets.take(f"{policy.name}:account:{account}", policy.per_account)
+                if wait:
+                    await self._reject(policy, "account", wait, scope, receive, send)
+                    return
+
+        await self.app(scope, receive, send)
+
+    async def _reject(self, policy: RateLimitPolicy, bucket: str, wait: float, scope, receive, send):
+        rate_limited_total.inc((policy.name, bucket))
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests. Please try again later."},
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+        await response(scope, receive, send)
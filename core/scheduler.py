@@ -0,0 +1,384 @@
+"""
+In-process job scheduler backed by the database.
+
+Two kinds of jobs:
+
+    @scheduler.periodic("purge_expired_tokens", every=timedelta(minutes=15))
+    def purge_tokens(): ...
+
+    @scheduler.task("send_verification_email", max_attempts=5)
+    def send_verification(user_id: int): ...
+
+    scheduler.enqueue(db, "send_verification_email", {"user_id": user.user_id})
+
+Periodic jobs have one row each in scheduled_jobs. One-off jobs are rows
+in queued_jobs, added through the caller's session, so a job enqueued by a
+request only exists if the request's transaction commits. Payloads are
+JSON keyword arguments.
+
+Every worker process runs a poller thread and a bounded thread pool
+(SCHEDULER_WORKERS). A job is claimed with a conditional UPDATE that
+takes a lease (SCHEDULER_LEASE_SECONDS) only if nobody holds a live one,
+so several workers never run the same job twice. Leases are renewed while
+the job runs. If a worker dies mid-job, the lease lapses and another
+worker picks the job up, so jobs must be safe to run again
+(at-least-once). Failed one-off jobs are retried with exponential
+backoff until max_attempts.
+
+Nothing outside the database is needed. Web workers start the scheduler
+from the app lifespan. With SCHEDULER_ENABLED=false there, a separate
+process can run the same jobs:
+
+    python -m app.services.scheduler_worker
+"""
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.orm import Session
+
+from app.models import ScheduledJob, QueuedJob
+from core.config import settings
+from core.database import SessionLocal
+from core.metrics import Counter, Gauge, Histogram
+
+
+job_runs_total = Counter("scheduler_job_runs_total", "Finished job runs by job and outcome", ("job", "status"))
+job_duration_seconds = Histogram(
+    "scheduler_job_duration_seconds", "Job run time", ("job",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+jobs_running = Gauge("scheduler_jobs_running", "Jobs currently running in this worker", ("job",))
+job_queue_depth = Gauge("scheduler_queue_depth", "One-off jobs due and waiting for a worker")
+
+MAX_ERROR_LENGTH = 4000
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    func: Callable[[], None]
+    every: timedelta
+
+
+@dataclass
+class Task:
+    name: str
+    func: Callable[..., None]
+    max_attempts: int
+
+
+class Scheduler:
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.periodic_jobs: Dict[str, PeriodicJob] = {}
+        self.tasks: Dict[str, Task] = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: Dict[str, str] = {}  # lease key -> job name, for jobs running here
+        self._running_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    # Registration
+
+    def periodic(self, name: str, every: timedelta):
+        def decorator(func):
+            self.periodic_jobs[name] = PeriodicJob(name, func, every)
+            return func
+        return decorator
+
+    def task(self, name: str, max_attempts: int = 5):
+        def decorator(func):
+            self.tasks[name] = Task(name, func, max_attempts)
+            return func
+        return decorator
+
+    def enqueue(self, db: Session, name: str, payload: Optional[dict] = None, delay_seconds: float = 0) -> QueuedJob:
+        """Adds a one-off job to the caller's session; it runs once the caller commits."""
+        task = self.tasks.get(name)
+        job = QueuedJob(
+            name=name,
+            payload=json.dumps(payload or {}),
+            status="pending",
+            run_at=datetime.utcnow() + timedelta(seconds=delay_seconds),
+            attempts=0,
+            max_attempts=task.max_attempts if task else 5,
+        )
+        db.add(job)
+        return job
+
+    # Lifecycle
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._sync_periodic_jobs()
+        self._stopped.clear()
+        self._executor = ThreadPoolExecutor(max_workers=settings.SCHEDULER_WORKERS, thread_name_prefix="scheduler-job")
+        self._thread = threading.Thread(target=self._poll_loop, name="scheduler-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30):
+        """Stops claiming, waits for running jobs, and hands back the leases of jobs that never started."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._release_leases()
+        self._thread = None
+        self._executor = None
+
+    def _poll_loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Scheduler poll failed: {e}")
+            self._stopped.wait(settings.SCHEDULER_POLL_SECONDS)
+
+    def _sync_periodic_jobs(self):
+        """Makes sure every registered periodic job has a row, with the current interval."""
+        if not self.periodic_jobs:
+            return
+        db = self.session_factory()
+        try:
+            existing = {job.name: job for job in db.query(ScheduledJob).filter(ScheduledJob.name.in_(self.periodic_jobs))}
+            now = datetime.utcnow()
+            for job in self.periodic_jobs.values():
+                interval = int(job.every.total_seconds())
+                row = existing.get(job.name)
+                if row is None:
+                    db.add(ScheduledJob(name=job.name, interval_seconds=interval, next_run_at=now, run_count=0))
+                elif row.interval_seconds != interval:
+                    row.interval_seconds = interval
+                    row.next_run_at = min(row.next_run_at, now + job.every)
+            db.commit()
+        except Exception as e:
+            # Another worker inserted the same rows first
+            db.rollback()
+            print(f"Scheduler could not sync periodic jobs: {e}")
+        finally:
+            db.close()
+
+    # Claiming
+
+    def _free_slots(self) -> int:
+        with self._running_lock:
+            return settings.SCHEDULER_WORKERS - len(self._running)
+
+    def run_pending(self) -> int:
+        """One poll: renews leases, claims due jobs up to the free pool slots and submits them."""
+        db = self.session_factory()
+        submitted = 0
+        try:
+            now = datetime.utcnow()
+            self._renew_leases(db, now)
+
+            for job in self.periodic_jobs.values():
+                if self._free_slots() <= 0:
+                    break
+                if self._claim_periodic(db, job, now):
+                    self._submit(f"periodic:{job.name}", job.name, self._run_periodic, job)
+                    submitted += 1
+
+            free = self._free_slots()
+            if free > 0:
+                for queued in self._claim_queued(db, now, free):
+                    self._submit(f"queued:{queued.id}", queued.name, self._run_queued, queued.id, queued.name, queued.payload, queued.attempts, queued.max_attempts)
+                    submitted += 1
+
+            job_queue_depth.set((), db.execute(
+                select(func.count()).select_from(QueuedJob).filter(QueuedJob.status == "pending", QueuedJob.run_at <= now)
+            ).scalar() or 0)
+        finally:
+            db.close()
+        return submitted
+
+    def _lease_until(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS)
+
+    def _claim_periodic(self, db: Session, job: PeriodicJob, now: datetime) -> bool:
+        with self._running_lock:
+            if f"periodic:{job.name}" in self._running:
+                return False
+        claimed = db.execute(
+            update(ScheduledJob)
+            .where(
+                ScheduledJob.name == job.name,
+                ScheduledJob.next_run_at <= now,
+                or_(ScheduledJob.lease_expires_at.is_(None), ScheduledJob.lease_expires_at < now),
+            )
+            .values(lease_owner=self.owner, lease_expires_at=self._lease_until(now), last_started_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return bool(claimed)
+
+    def _claim_queued(self, db: Session, now: datetime, limit: int):
+        claimable = or_(
+            and_(QueuedJob.status == "pending", QueuedJob.run_at <= now),
+            # Claimed by a worker that stopped renewing its lease
+            and_(QueuedJob.status == "running", QueuedJob.lease_expires_at < now),
+        )
+        candidates = db.execute(
+            select(QueuedJob.id).filter(claimable).order_by(QueuedJob.run_at).limit(limit * 2)
+        ).scalars().all()
+
+        claimed = []
+        for job_id in candidates:
+            if len(claimed) >= limit:
+                break
+            won = db.execute(
+                update(QueuedJob)
+                .where(QueuedJob.id == job_id, claimable)
+                .values(
+                    status="running",
+                    lease_owner=self.owner,
+                    lease_expires_at=self._lease_until(now),
+                    attempts=QueuedJob.attempts + 1,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            if won:
+                claimed.append(db.execute(
+                    select(QueuedJob.id, QueuedJob.name, QueuedJob.payload, QueuedJob.attempts, QueuedJob.max_attempts)
+                    .filter(QueuedJob.id == job_id)
+                ).one())
+        return claimed
+
+    def _renew_leases(self, db: Session, now: datetime):
+        with self._running_lock:
+            keys = list(self._running)
+        periodic = [key.split(":", 1)[1] for key in keys if key.startswith("periodic:")]
+        queued = [int(key.split(":", 1)[1]) for key in keys if key.startswith("queued:")]
+        if periodic:
+            db.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.name.in_(periodic), ScheduledJob.lease_owner == self.owner)
+                .values(lease_expires_at=self._lease_until(now))
+                .execution_options(synchronize_session=False)
+            )
+        if queued:
+            db.execute(
+                update(QueuedJob)
+                .where(QueuedJob.id.in_(queued), QueuedJob.lease_owner == self.owner)
+                .values(lease_expires_at=self._lease_until(now))
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+
+    def _release_leases(self):
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(ScheduledJob).where(ScheduledJob.lease_owner == self.owner)
+                .values(lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(
+                update(QueuedJob).where(QueuedJob.lease_owner == self.owner, QueuedJob.status == "running")
+                .values(status="pending", lease_owner=None, lease_expires_at=None, attempts=QueuedJob.attempts - 1)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    # Running
+
+    def _submit(self, key: str, name: str, runner: Callable, *args):
+        with self._running_lock:
+            self._running[key] = name
+        jobs_running.inc((name,))
+
+        def finished(_future):
+            # Also called for jobs cancelled on shutdown; stop() hands their leases back
+            with self._running_lock:
+                self._running.pop(key, None)
+            jobs_running.dec((name,))
+
+        self._executor.submit(runner, *args).add_done_callback(finished)
+
+    def _timed(self, name: str, func: Callable, *args, **kwargs) -> Optional[str]:
+        """Runs the job, records metrics, and returns the error text if it failed."""
+        started = time.perf_counter()
+        error = None
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            error = traceback.format_exc()[-MAX_ERROR_LENGTH:]
+            print(f"Job {name} failed: {type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}")
+        job_duration_seconds.observe((name,), time.perf_counter() - started)
+        job_runs_total.inc((name, "failed" if error else "ok"))
+        return error
+
+    def _run_periodic(self, job: PeriodicJob):
+        started_at = datetime.utcnow()
+        error = self._timed(job.name, job.func)
+        finished_at = datetime.utcnow()
+
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.name == job.name, ScheduledJob.lease_owner == self.owner)
+                .values(
+                    next_run_at=max(started_at + job.every, finished_at),
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    last_finished_at=finished_at,
+                    last_status="failed" if error else "ok",
+                    last_error=error,
+                    run_count=ScheduledJob.run_count + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _run_queued(self, job_id: int, name: str, payload: Optional[str], attempts: int, max_attempts: int):
+        task = self.tasks.get(name)
+        if task is None:
+            error = f"No task registered under '{name}'"
+            job_runs_total.inc((name, "failed"))
+            attempts = max_attempts
+        else:
+            error = self._timed(name, task.func, **json.loads(payload or "{}"))
+
+        now = datetime.utcnow()
+        if error is None:
+            values = {"status": "done", "finished_at": now, "last_error": None}
+        elif attempts >= max_attempts:
+            values = {"status": "failed", "finished_at": now, "last_error": error}
+        else:
+            backoff = min(settings.SCHEDULER_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.SCHEDULER_RETRY_MAX_SECONDS)
+            values = {"status": "pending", "run_at": now + timedelta(seconds=backoff), "last_error": error}
+
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(QueuedJob)
+                .where(QueuedJob.id == job_id, QueuedJob.lease_owner == self.owner)
+                .values(lease_owner=None, lease_expires_at=None, **values)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+scheduler = Scheduler()
+
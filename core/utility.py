@@ -2,13 +2,66 @@ import random
 import string
 import os
 import uuid
-from typing import List
+import json
+import base64
+import binascii
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Any
 from fastapi import UploadFile, HTTPException
 
 def generate_random_string(length: int = 12):
     return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
 
+def _encode_cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encodes the sort key of the last row of a page into an opaque keyset cursor.
+    Datetimes and Decimals are stored as strings and restored by decode_cursor.
+    """
+    payload = [_encode_cursor_value(value) for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _cursor_value_is(value: Any, expected: type) -> bool:
+    # bool is an int subclass, but true/false is never a valid key
+    return isinstance(value, expected) and not (isinstance(value, bool) and expected is not bool)
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """
+    Decodes a cursor produced by encode_cursor, one value per type given, raising
+    a 400 if it has been tampered with or a value is not of its expected type.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("Unexpected cursor shape")
+        values = [_decode_cursor_value(value) for value in payload]
+        if not all(_cursor_value_is(value, expected) for value, expected in zip(values, types)):
+            raise ValueError("Unexpected cursor value")
+        return values
+    except (ValueError, KeyError, TypeError, ArithmeticError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 async def upload_images(images: List[UploadFile], upload_dir: str = "uploads/products") -> List[str]:
     """
     Handles image uploads. Saves images locally for now.
@@ -3,16 +3,55 @@ from app.exceptions import validation_exception_handler, authentication_exceptio
 from fastapi.exceptions import RequestValidationError
 from fastapi import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
-
-
-app = FastAPI(title="E-Commerce API")
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from core.compression import CompressionMiddleware, PrecompressedStaticFiles
+from core.config import settings
+from core.database import engine, pool_waiters, replicas, QueryStatsMiddleware, ReplicaStickinessMiddleware
+from core.rate_limit import RateLimitMiddleware
+from core.admission import AdmissionControlMiddleware
+from core.scheduler import scheduler
+from app.services import jobs  # noqa: F401  registers the scheduled jobs
+from app.services.cache_warmup import AccessStatsMiddleware, cache_warmer, start_access_stats_flusher, stop_access_stats_flusher
+from core import metrics
+
+
+static_files = PrecompressedStaticFiles(directory="static")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compress the large swagger bundles once, off the event loop
+    await run_in_threadpool(static_files.precompress)
+    await run_in_threadpool(replicas.start_health_checks)
+    if settings.METRICS_ENABLED:
+        metrics.instrument_engine(engine, pool_waiters)
+        for replica in replicas.replicas:
+            metrics.instrument_engine(replica.engine, replica.waiters)
+        metrics.instrument_routes(app)
+        metrics.start_multiprocess_writer()
+    if settings.SCHEDULER_ENABLED:
+        await run_in_threadpool(scheduler.start)
+    start_access_stats_flusher()
+    # Runs in the background; /ready reports 503 until it is done
+    cache_warmer.start()
+    yield
+    await cache_warmer.stop()
+    await run_in_threadpool(stop_access_stats_flusher)
+    if settings.SCHEDULER_ENABLED:
+        await run_in_threadpool(scheduler.stop)
+    replicas.stop_health_checks()
+    if settings.METRICS_ENABLED:
+        metrics.stop_multiprocess_writer()
+
+
+app = FastAPI(title="E-Commerce API", lifespan=lifespan)
 
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(HTTPException, authentication_exception_handler)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", static_files, name="static")
 
 @app.get("/offline-docs", include_in_schema=False)
 def get_offline_docs():
@@ -58,13 +97,26 @@ app.add_middleware(
     allow_headers=["*"],
     
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ReplicaStickinessMiddleware)
+if settings.ACCESS_STATS_ENABLED:
+    app.add_middleware(AccessStatsMiddleware)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+if settings.ADMISSION_CONTROL_ENABLED:
+    # Outside the other middlewares so shed requests cost as little as possible
+    app.add_middleware(AdmissionControlMiddleware)
+if settings.METRICS_ENABLED:
+    # Added last so it is outermost and times the whole middleware stack
+    app.add_middleware(metrics.MetricsMiddleware)
 @app.get("/")
 def root():
     return {"message": "E-Commerce API is running"}
 
 
 
-from app.routes import auth, misc, products, user, admins
+from app.routes import auth, misc, products, user, admins, reviews, wishlist, orders, merchant, health, metrics as metrics_routes
 
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -72,8 +124,14 @@ from fastapi.responses import JSONResponse
 
 app.include_router(auth.router, prefix="/auth", include_in_schema=False) #  AUTH ROUTE
 app.include_router(products.router, prefix="/products", include_in_schema=True) #  PRODUCTS ROUTE
+app.include_router(reviews.router, prefix="/products", include_in_schema=True) #  REVIEWS ROUTE
 app.include_router(user.router, prefix="/user", include_in_schema=False) #  USERS ROUTE
 app.include_router(misc.router, prefix="/misc", include_in_schema=True) #  MISC ROUTE
+app.include_router(wishlist.router, prefix="/wishlist", include_in_schema=True) #  WISHLIST ROUTE
+app.include_router(orders.router, prefix="/orders", include_in_schema=True) #  ORDERS ROUTE
+app.include_router(merchant.router, prefix="/merchant", include_in_schema=True) #  MERCHANT ROUTE
 app.include_router(admins.router, prefix="/admin", include_in_schema=False) #  ADMIN ROUTE
+app.include_router(metrics_routes.router, include_in_schema=False) #  METRICS ROUTE
+app.include_router(health.router, include_in_schema=False) #  HEALTH ROUTE
 if __name__ == "__main__":
     app.run()
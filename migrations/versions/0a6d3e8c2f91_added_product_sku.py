@@ -0,0 +1,28 @@
+"""added product sku
+
+Revision ID: 0a6d3e8c2f91
+Revises: f2b8c0d46e17
+Create Date: 2026-10-19 16:58:27.105963
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6d3e8c2f91'
+down_revision: Union[str, None] = 'f2b8c0d46e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('sku', sa.String(length=64), nullable=True))
+    op.create_unique_constraint('uq_products_seller_sku', 'products', ['seller_id', 'sku'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_products_seller_sku', 'products', type_='unique')
+    op.drop_column('products', 'sku')
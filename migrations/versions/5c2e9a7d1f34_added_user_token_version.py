@@ -0,0 +1,26 @@
+"""added user token version
+
+Revision ID: 5c2e9a7d1f34
+Revises: 0a6d3e8c2f91
+Create Date: 2026-10-19 18:12:40.518307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e9a7d1f34'
+down_revision: Union[str, None] = '0a6d3e8c2f91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,55 @@
+"""added product rating aggregates
+
+Revision ID: a3c1f0d2b7e4
+Revises: 76baae60186e
+Create Date: 2026-10-19 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c1f0d2b7e4'
+down_revision: Union[str, None] = '76baae60186e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+HISTOGRAM_COLUMNS = [f'rating_{star}_count' for star in range(1, 6)]
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_avg', sa.Float(), server_default='0', nullable=False))
+    for column in HISTOGRAM_COLUMNS:
+        op.add_column('products', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from existing reviews; from here on the ORM events keep them in sync
+    histogram_updates = ",\n            ".join(
+        f"{column} = (SELECT COUNT(*) FROM reviews r WHERE r.product_id = products.product_id AND r.rating = {star})"
+        for star, column in enumerate(HISTOGRAM_COLUMNS, start=1)
+    )
+    op.execute(f"""
+        UPDATE products SET
+            rating_count = (SELECT COUNT(*) FROM reviews r WHERE r.product_id = products.product_id),
+            rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r WHERE r.product_id = products.product_id),
+            {histogram_updates}
+    """)
+    op.execute("""
+        UPDATE products SET rating_avg = CASE WHEN rating_count > 0 THEN rating_sum * 1.0 / rating_count ELSE 0 END
+    """)
+
+    op.create_index('ix_products_status_rating', 'products', ['status', 'rating_avg', 'rating_count'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_status_rating', table_name='products')
+    for column in reversed(HISTOGRAM_COLUMNS):
+        op.drop_column('products', column)
+    op.drop_column('products', 'rating_avg')
+    op.drop_column('products', 'rating_sum')
+    op.drop_column('products', 'rating_count')
@@ -0,0 +1,26 @@
+"""added review rating feed index
+
+Revision ID: a5d3f8c1e642
+Revises: e7a2c5d9b184
+Create Date: 2026-10-20 14:12:48.301947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d3f8c1e642'
+down_revision: Union[str, None] = 'e7a2c5d9b184'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reviews_product_rating_created', 'reviews', ['product_id', 'rating', 'created_at', 'review_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_product_rating_created', table_name='reviews')
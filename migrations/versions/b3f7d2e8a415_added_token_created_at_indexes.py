@@ -0,0 +1,28 @@
+"""added token created_at indexes
+
+Revision ID: b3f7d2e8a415
+Revises: 8e4b1c6a2d57
+Create Date: 2026-10-19 20:21:05.831244
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f7d2e8a415'
+down_revision: Union[str, None] = '8e4b1c6a2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_verification_tokens_created_at'), 'verification_tokens', ['created_at'], unique=False)
+    op.create_index(op.f('ix_password_reset_tokens_created_at'), 'password_reset_tokens', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_password_reset_tokens_created_at'), table_name='password_reset_tokens')
+    op.drop_index(op.f('ix_verification_tokens_created_at'), table_name='verification_tokens')
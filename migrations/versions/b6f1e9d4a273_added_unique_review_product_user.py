@@ -0,0 +1,51 @@
+"""added unique review product user
+
+Revision ID: b6f1e9d4a273
+Revises: a5d3f8c1e642
+Create Date: 2026-10-20 15:04:31.772915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f1e9d4a273'
+down_revision: Union[str, None] = 'a5d3f8c1e642'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HISTOGRAM_COLUMNS = [f'rating_{star}_count' for star in range(1, 6)]
+
+
+def upgrade() -> None:
+    # Keep each user's latest review of a product
+    op.execute("""
+        DELETE FROM reviews
+        WHERE review_id NOT IN (
+            SELECT MAX(review_id) FROM reviews GROUP BY product_id, user_id
+        )
+    """)
+
+    # The deleted rows were counted in the rating aggregates; rebuild them for every product
+    histogram_updates = ",\n            ".join(
+        f"{column} = (SELECT COUNT(*) FROM reviews r WHERE r.product_id = products.product_id AND r.rating = {star})"
+        for star, column in enumerate(HISTOGRAM_COLUMNS, start=1)
+    )
+    op.execute(f"""
+        UPDATE products SET
+            rating_count = (SELECT COUNT(*) FROM reviews r WHERE r.product_id = products.product_id),
+            rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r WHERE r.product_id = products.product_id),
+            {histogram_updates}
+    """)
+    op.execute("""
+        UPDATE products SET rating_avg = CASE WHEN rating_count > 0 THEN rating_sum * 1.0 / rating_count ELSE 0 END
+    """)
+
+    op.create_unique_constraint('uq_reviews_product_user', 'reviews', ['product_id', 'user_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_reviews_product_user', 'reviews', type_='unique')
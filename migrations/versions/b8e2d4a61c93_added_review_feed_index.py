@@ -0,0 +1,26 @@
+"""added review feed index
+
+Revision ID: b8e2d4a61c93
+Revises: a3c1f0d2b7e4
+Create Date: 2026-10-19 10:03:17.228190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d4a61c93'
+down_revision: Union[str, None] = 'a3c1f0d2b7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reviews_product_created', 'reviews', ['product_id', 'created_at', 'review_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_product_created', table_name='reviews')
@@ -0,0 +1,33 @@
+"""added unique wishlist user product
+
+Revision ID: c51f7a9e3d20
+Revises: b8e2d4a61c93
+Create Date: 2026-10-19 11:27:52.640311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51f7a9e3d20'
+down_revision: Union[str, None] = 'b8e2d4a61c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the oldest row of any duplicated (user_id, product_id) pair
+    op.execute("""
+        DELETE FROM wishlists
+        WHERE wishlist_id NOT IN (
+            SELECT MIN(wishlist_id) FROM wishlists GROUP BY user_id, product_id
+        )
+    """)
+    op.create_unique_constraint('uq_wishlist_user_product', 'wishlists', ['user_id', 'product_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_wishlist_user_product', 'wishlists', type_='unique')
@@ -0,0 +1,140 @@
+"""hashed token lookups
+
+Replaces the stored verification and reset tokens with their SHA-256
+digests and indexes the digests instead.
+
+Tables converted to daily partitions (token_cleanup partition) have a
+different layout: created_at is part of the primary key and unique
+constraint, and the indexes carry a _partitioned suffix. Those are
+detected and rebuilt with the same shape around token_digest.
+
+Revision ID: c9a4e1f7b260
+Revises: b3f7d2e8a415
+Create Date: 2026-10-19 21:07:52.613490
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9a4e1f7b260'
+down_revision: Union[str, None] = 'b3f7d2e8a415'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _backfill_digests(table_name: str, key_column: str) -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            f"UPDATE {table_name} SET token_digest = sha256(convert_to(token, 'UTF8')) WHERE token_digest IS NULL"
+        )
+        return
+
+    table = sa.table(table_name, sa.column(key_column), sa.column('token'), sa.column('token_digest', sa.LargeBinary))
+    update = (
+        table.update()
+        .where(table.c[key_column] == sa.bindparam('b_key'))
+        .values(token_digest=sa.bindparam('b_digest'))
+    )
+    while True:
+        rows = bind.execute(
+            sa.select(table.c[key_column], table.c.token).where(table.c.token_digest.is_(None)).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {'b_key': key, 'b_digest': hashlib.sha256(token.encode()).digest()} for key, token in rows
+        ])
+
+
+def _is_partitioned(table_name: str) -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return False
+    return bind.execute(
+        sa.text("SELECT c.relkind = 'p' FROM pg_class c WHERE c.relname = :table AND pg_table_is_visible(c.oid)"),
+        {'table': table_name},
+    ).scalar() or False
+
+
+def upgrade() -> None:
+    op.add_column('verification_tokens', sa.Column('token_digest', sa.LargeBinary(length=32), nullable=True))
+    _backfill_digests('verification_tokens', 'id')
+    if _is_partitioned('verification_tokens'):
+        # Constraints and indexes on a partitioned table must include created_at
+        op.execute('DROP INDEX IF EXISTS ix_verification_tokens_token_partitioned')
+        op.execute('ALTER TABLE verification_tokens DROP CONSTRAINT IF EXISTS uq_verification_tokens_token_created_at')
+        op.drop_column('verification_tokens', 'token')
+        op.alter_column('verification_tokens', 'token_digest', existing_type=sa.LargeBinary(length=32), nullable=False)
+        op.create_unique_constraint(
+            'uq_verification_tokens_token_digest_created_at', 'verification_tokens', ['token_digest', 'created_at']
+        )
+    else:
+        with op.batch_alter_table('verification_tokens') as batch_op:
+            batch_op.drop_index('ix_verification_tokens_token')
+            batch_op.drop_column('token')
+            batch_op.alter_column('token_digest', existing_type=sa.LargeBinary(length=32), nullable=False)
+            batch_op.create_index('ix_verification_tokens_token_digest', ['token_digest'], unique=True)
+
+    op.add_column('password_reset_tokens', sa.Column('token_digest', sa.LargeBinary(length=32), nullable=True))
+    _backfill_digests('password_reset_tokens', 'token')
+    if _is_partitioned('password_reset_tokens'):
+        op.execute('ALTER TABLE password_reset_tokens DROP CONSTRAINT password_reset_tokens_pkey_partitioned')
+        op.execute('DROP INDEX IF EXISTS ix_password_reset_tokens_token_partitioned')
+        op.drop_column('password_reset_tokens', 'token')
+        op.alter_column('password_reset_tokens', 'token_digest', existing_type=sa.LargeBinary(length=32), nullable=False)
+        op.create_primary_key('password_reset_tokens_pkey_partitioned', 'password_reset_tokens', ['token_digest', 'created_at'])
+    else:
+        with op.batch_alter_table('password_reset_tokens') as batch_op:
+            batch_op.drop_index('ix_password_reset_tokens_token')
+            # Dropping the old primary key column drops its constraint with it
+            batch_op.drop_column('token')
+            batch_op.alter_column('token_digest', existing_type=sa.LargeBinary(length=32), nullable=False)
+            batch_op.create_primary_key('password_reset_tokens_pkey', ['token_digest'])
+
+
+def downgrade() -> None:
+    # The raw tokens are gone; outstanding links stop working, which is harmless
+    # for tokens that expire within minutes. The hex digest keeps the key unique.
+    bind = op.get_bind()
+    hex_digest = "encode(token_digest, 'hex')" if bind.dialect.name == 'postgresql' else "hex(token_digest)"
+
+    op.add_column('password_reset_tokens', sa.Column('token', sa.String(), nullable=True))
+    op.execute(f"UPDATE password_reset_tokens SET token = {hex_digest}")
+    if _is_partitioned('password_reset_tokens'):
+        op.execute('ALTER TABLE password_reset_tokens DROP CONSTRAINT password_reset_tokens_pkey_partitioned')
+        op.drop_column('password_reset_tokens', 'token_digest')
+        op.alter_column('password_reset_tokens', 'token', existing_type=sa.String(), nullable=False)
+        op.create_primary_key('password_reset_tokens_pkey_partitioned', 'password_reset_tokens', ['token', 'created_at'])
+        op.create_index('ix_password_reset_tokens_token_partitioned', 'password_reset_tokens', ['token'], unique=False)
+    else:
+        with op.batch_alter_table('password_reset_tokens') as batch_op:
+            batch_op.drop_constraint('password_reset_tokens_pkey', type_='primary')
+            batch_op.drop_column('token_digest')
+            batch_op.alter_column('token', existing_type=sa.String(), nullable=False)
+            batch_op.create_primary_key('password_reset_tokens_pkey', ['token'])
+            batch_op.create_index('ix_password_reset_tokens_token', ['token'], unique=False)
+
+    op.add_column('verification_tokens', sa.Column('token', sa.String(), nullable=True))
+    op.execute(f"UPDATE verification_tokens SET token = {hex_digest}")
+    if _is_partitioned('verification_tokens'):
+        op.execute('ALTER TABLE verification_tokens DROP CONSTRAINT uq_verification_tokens_token_digest_created_at')
+        op.drop_column('verification_tokens', 'token_digest')
+        op.alter_column('verification_tokens', 'token', existing_type=sa.String(), nullable=False)
+        op.create_unique_constraint(
+            'uq_verification_tokens_token_created_at', 'verification_tokens', ['token', 'created_at']
+        )
+        op.create_index('ix_verification_tokens_token_partitioned', 'verification_tokens', ['token'], unique=False)
+    else:
+        with op.batch_alter_table('verification_tokens') as batch_op:
+            batch_op.drop_index('ix_verification_tokens_token_digest')
+            batch_op.drop_column('token_digest')
+            batch_op.alter_column('token', existing_type=sa.String(), nullable=False)
+            batch_op.create_index('ix_verification_tokens_token', ['token'], unique=True)
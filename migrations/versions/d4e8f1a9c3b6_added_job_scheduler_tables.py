@@ -0,0 +1,59 @@
+"""added job scheduler tables
+
+Revision ID: d4e8f1a9c3b6
+Revises: c9a4e1f7b260
+Create Date: 2026-10-19 22:14:36.402871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8f1a9c3b6'
+down_revision: Union[str, None] = 'c9a4e1f7b260'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scheduled_jobs',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('interval_seconds', sa.Integer(), nullable=False),
+        sa.Column('next_run_at', sa.DateTime(), nullable=False),
+        sa.Column('lease_owner', sa.String(length=100), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_started_at', sa.DateTime(), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+        sa.Column('last_status', sa.String(length=20), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('run_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_table(
+        'queued_jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('lease_owner', sa.String(length=100), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.CheckConstraint("status IN ('pending', 'running', 'done', 'failed')", name='check_queued_job_status'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_queued_jobs_status_run_at', 'queued_jobs', ['status', 'run_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_queued_jobs_status_run_at', table_name='queued_jobs')
+    op.drop_table('queued_jobs')
+    op.drop_table('scheduled_jobs')
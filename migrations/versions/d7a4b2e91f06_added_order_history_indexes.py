@@ -0,0 +1,30 @@
+"""added order history indexes
+
+Revision ID: d7a4b2e91f06
+Revises: c51f7a9e3d20
+Create Date: 2026-10-19 12:48:05.917342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a4b2e91f06'
+down_revision: Union[str, None] = 'c51f7a9e3d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_user_order', 'orders', ['user_id', 'order_id'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_shipping_order_id'), 'shipping', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_shipping_order_id'), table_name='shipping')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index('ix_orders_user_order', table_name='orders')
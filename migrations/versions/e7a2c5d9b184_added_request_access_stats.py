@@ -0,0 +1,35 @@
+"""added request access stats
+
+Revision ID: e7a2c5d9b184
+Revises: d4e8f1a9c3b6
+Create Date: 2026-10-20 09:41:17.583204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c5d9b184'
+down_revision: Union[str, None] = 'd4e8f1a9c3b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'request_access_stats',
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('key', sa.String(length=500), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False),
+        sa.Column('last_seen_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('kind', 'key'),
+    )
+    op.create_index('ix_request_access_stats_kind_hits', 'request_access_stats', ['kind', 'hits'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_request_access_stats_kind_hits', table_name='request_access_stats')
+    op.drop_table('request_access_stats')
@@ -0,0 +1,49 @@
+"""added daily sales rollups
+
+Revision ID: e93c6f1a5b48
+Revises: d7a4b2e91f06
+Create Date: 2026-10-19 14:21:36.382745
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e93c6f1a5b48'
+down_revision: Union[str, None] = 'd7a4b2e91f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('seller_daily_sales',
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('revenue', sa.DECIMAL(precision=12, scale=2), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['seller_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('seller_id', 'day')
+    )
+    op.create_table('product_daily_sales',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.DECIMAL(precision=12, scale=2), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['seller_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'day')
+    )
+    op.create_index('ix_product_daily_sales_seller_day', 'product_daily_sales', ['seller_id', 'day'], unique=False)
+    # Populate from existing orders with: python -m app.services.sales_rollups backfill
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_daily_sales_seller_day', table_name='product_daily_sales')
+    op.drop_table('product_daily_sales')
+    op.drop_table('seller_daily_sales')
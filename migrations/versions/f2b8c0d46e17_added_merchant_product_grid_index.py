@@ -0,0 +1,26 @@
+"""added merchant product grid index
+
+Revision ID: f2b8c0d46e17
+Revises: e93c6f1a5b48
+Create Date: 2026-10-19 15:40:12.774051
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8c0d46e17'
+down_revision: Union[str, None] = 'e93c6f1a5b48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_seller_status_updated', 'products', ['seller_id', 'status', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_seller_status_updated', table_name='products')
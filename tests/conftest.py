@@ -0,0 +1,131 @@
+"""
+Test setup: a throwaway SQLite database, recreated for every test.
+
+Settings are read from the environment when core.config is imported, so
+everything that must differ from the defaults is set here, before any app
+module is imported.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+_test_dir = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_test_dir}/test.db"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["WARMUP_ENABLED"] = "false"
+os.environ["ACCESS_STATS_ENABLED"] = "false"
+os.environ["QUERY_LOG_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+from app import models  # noqa: E402
+from core.auth import create_access_token, access_token_claims, hash_password  # noqa: E402
+from core.database import Base, SessionLocal, engine  # noqa: E402
+
+
+TEST_DIR = _test_dir
+PASSWORD = "Secure@123"
+_password_hash = hash_password(PASSWORD)  # bcrypt is slow; hash once
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    # Without a `with` block, so the lifespan (scheduler, warm-up) does not run
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def make_user():
+    def make(email: str = "buyer@example.com", role: str = "buyer", is_active: bool = True):
+        session = SessionLocal()
+        try:
+            user = models.User(
+                first_name="Test", last_name="User", email=email, password_hash=_password_hash,
+                phone=str(abs(hash(email)) % 10**10), is_active=is_active, role=role,
+            )
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+            headers = {"Authorization": f"Bearer {create_access_token(access_token_claims(user))}"}
+            session.expunge(user)
+            return user, headers
+        finally:
+            session.close()
+    return make
+
+
+@pytest.fixture
+def make_product():
+    def make(seller_id: int, name: str = "Product", price: float = 10, status: str = "published", stock: int = 5, **fields):
+        session = SessionLocal()
+        try:
+            product = models.Product(
+                seller_id=seller_id, name=name, price=price, status=status, stock_quantity=stock, **fields
+            )
+            session.add(product)
+            session.commit()
+            return product.product_id
+        finally:
+            session.close()
+    return make
+
+
+class QueryCounter:
+    """Collects the statements executed on an engine while count_queries is active."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def assert_at_most(self, expected: int):
+        assert self.count <= expected, (
+            f"Expected at most {expected} queries, got {self.count}:\n" + "\n\n".join(self.statements)
+        )
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Counts queries issued on the engine inside the block, to catch N+1 regressions:
+
+        with count_queries() as queries:
+            client.get("/orders/")
+        queries.assert_at_most(6)
+    """
+    @contextmanager
+    def count(bind=None):
+        bind = bind or engine
+        counter = QueryCounter()
+        event.listen(bind, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            event.remove(bind, "before_cursor_execute", counter)
+    return count
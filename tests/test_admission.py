@@ -0,0 +1,48 @@
+import re
+
+from core.admission import AdmissionController, CRITICAL, LOW, RouteClass
+
+
+def make_controller(half_life: float = 5) -> AdmissionController:
+    return AdmissionController([
+        RouteClass("orders", CRITICAL, re.compile(r"^/orders/"), target_ms=100),
+        RouteClass("catalog", LOW, re.compile(r"^/products/"), target_ms=100),
+    ], decrease_factor=0.9, latency_half_life=half_life)
+
+
+def finish(limiter, latency: float):
+    limiter._admit()
+    limiter.release(latency)
+
+
+def test_slow_response_marks_the_class_overloaded():
+    controller = make_controller()
+    orders, catalog = controller.limiters["orders"], controller.limiters["catalog"]
+
+    finish(orders, 0.5)
+
+    assert orders.overloaded
+    assert controller.should_shed(catalog)
+
+
+def test_overload_fades_once_the_class_goes_quiet():
+    controller = make_controller(half_life=5)
+    orders, catalog = controller.limiters["orders"], controller.limiters["catalog"]
+    finish(orders, 0.5)
+
+    # Three half-lives without a request: 500 ms reads as 62.5 ms, under the 100 ms target
+    orders.last_completed -= 15
+
+    assert orders.last_latency == 0.5
+    assert orders.recent_latency < 0.1
+    assert not orders.overloaded
+    assert not controller.should_shed(catalog)
+
+
+def test_fast_response_clears_overload_immediately():
+    controller = make_controller()
+    orders = controller.limiters["orders"]
+    finish(orders, 0.5)
+    finish(orders, 0.01)
+
+    assert not orders.overloaded
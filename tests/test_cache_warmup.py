@@ -0,0 +1,27 @@
+import time
+from datetime import datetime
+
+from app import models
+from app.services.cache_warmup import CacheWarmer, PRODUCT_DETAIL, PRODUCT_LISTING
+
+
+def test_warmup_replays_listings_and_counts_failures(db, make_user, make_product):
+    merchant, _ = make_user("merchant@example.com", role="merchant")
+    product_id = make_product(merchant.user_id, brand="acme")
+    now = datetime.utcnow()
+    db.add_all([
+        models.RequestAccessStat(kind=PRODUCT_DETAIL, key=str(product_id), hits=10, last_seen_at=now),
+        models.RequestAccessStat(kind=PRODUCT_LISTING, key="brand=acme&sort_by=rating", hits=9, last_seen_at=now),
+        models.RequestAccessStat(kind=PRODUCT_LISTING, key="brand=gone", hits=8, last_seen_at=now),  # matches nothing now
+        models.RequestAccessStat(kind=PRODUCT_LISTING, key="sort_by=price", hits=7, last_seen_at=now),  # no longer a valid sort
+        models.RequestAccessStat(kind=PRODUCT_LISTING, key="min_price=cheap", hits=6, last_seen_at=now),
+    ])
+    db.commit()
+
+    warmer = CacheWarmer()
+    assert warmer.warm(deadline=time.monotonic() + 30) is True
+
+    assert warmer.warmed[PRODUCT_DETAIL] == 1
+    assert warmer.warmed[PRODUCT_LISTING] == 2
+    assert warmer.failed[PRODUCT_LISTING] == 2
+    assert warmer.status()["failed"] == {PRODUCT_LISTING: 2}
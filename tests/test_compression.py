@@ -0,0 +1,50 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from core.compression import PrecompressedStaticFiles
+
+
+SCRIPT = b"console.log('precompressed');\n" * 200
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    (tmp_path / "app.js").write_bytes(SCRIPT)
+    static_files = PrecompressedStaticFiles(directory=str(tmp_path))
+    static_files.precompress()
+    return TestClient(Starlette(routes=[Mount("/static", static_files)]))
+
+
+def test_each_encoding_has_its_own_etag(static_client):
+    plain = static_client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+    gzipped = static_client.get("/static/app.js", headers={"Accept-Encoding": "gzip"})
+
+    assert plain.headers["etag"] != gzipped.headers["etag"]
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.content == SCRIPT  # decoded by the client
+    assert plain.headers["vary"] == gzipped.headers["vary"] == "Accept-Encoding"
+
+
+def test_revalidating_a_compressed_variant(static_client):
+    etag = static_client.get("/static/app.js", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    response = static_client.get("/static/app.js", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_identity_etag_does_not_revalidate_a_compressed_variant(static_client):
+    etag = static_client.get("/static/app.js", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    not_modified = static_client.get("/static/app.js", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["vary"] == "Accept-Encoding"
+
+    response = static_client.get("/static/app.js", headers={"Accept-Encoding": "gzip", "If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+TAMPERED = [
+    "not-a-cursor!",
+    raw_cursor({"dt": "2026-01-01T00:00:00"}),
+    raw_cursor([[1, 2], 3]),
+    raw_cursor([None, None]),
+    raw_cursor([{"dt": "2026-01-01T00:00:00"}, "7"]),
+    raw_cursor([{"dt": "2026-01-01T00:00:00"}, True]),
+    raw_cursor([{"dt": "yesterday"}, 1]),
+    raw_cursor([{"dec": "1.5"}, 1]),
+]
+
+
+@pytest.fixture
+def reviewed_product(db, make_user, make_product):
+    merchant, _ = make_user("merchant@example.com", role="merchant")
+    product_id = make_product(merchant.user_id)
+    for index in range(3):
+        user, _ = make_user(f"reviewer{index}@example.com")
+        # Explicit timestamps: SQLite stores the now() default in a format that compares badly with bound datetimes
+        db.add(models.Review(
+            user_id=user.user_id, product_id=product_id, rating=5, comment=str(index),
+            created_at=datetime(2026, 1, 1) + timedelta(minutes=index // 2),
+        ))
+    db.commit()
+    return product_id
+
+
+def test_review_feed_pages_through_every_review(client, reviewed_product):
+    seen, cursor = [], None
+    for _ in range(5):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/products/{reviewed_product}/reviews/", params=params).json()
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 3
+
+
+@pytest.mark.parametrize("cursor", TAMPERED)
+def test_review_feed_rejects_tampered_cursor(client, reviewed_product, cursor):
+    response = client.get(f"/products/{reviewed_product}/reviews/", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("path", ["/wishlist/", "/orders/"])
+@pytest.mark.parametrize("cursor", [raw_cursor(["7"]), raw_cursor([None]), raw_cursor([[7]]), raw_cursor([1, 2])])
+def test_id_cursors_reject_non_integers(client, make_user, path, cursor):
+    _, headers = make_user("buyer@example.com")
+    response = client.get(path, params={"cursor": cursor}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("sort_by, key", [
+    ("price", 5),
+    ("updated_at", "2026-01-01"),
+    ("stock_quantity", {"dt": "2026-01-01T00:00:00"}),
+])
+def test_merchant_grid_rejects_cursor_key_of_the_wrong_type(client, make_user, sort_by, key):
+    _, headers = make_user("merchant@example.com", role="merchant")
+    cursor = raw_cursor([f"{sort_by}:desc", key, 1])
+    response = client.get("/products/mine/", params={"sort_by": sort_by, "cursor": cursor}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_merchant_grid_accepts_its_own_cursor(client, make_user, make_product):
+    merchant, headers = make_user("merchant@example.com", role="merchant")
+    for index in range(3):
+        make_product(merchant.user_id, name=f"Product {index}", price=10 + index)
+
+    seen, cursor = [], None
+    for _ in range(5):
+        params = {"sort_by": "price", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/products/mine/", params=params, headers=headers).json()
+        seen += [item["product_id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 3
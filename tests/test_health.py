@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.routes import health
+from app.services.cache_warmup import cache_warmer
+from core.database import pool_stats
+from tests.conftest import TEST_DIR
+
+
+EXHAUSTED = {"pool": "QueuePool", "size": 5, "max_overflow": 10, "checkedout": 15, "checkedin": 0, "overflow": 10}
+
+
+@pytest.mark.parametrize("max_overflow, checked_out, exhausted", [
+    (0, 1, True),
+    (1, 1, False),
+    (1, 2, True),
+    (-1, 3, False),  # unlimited overflow
+])
+def test_pool_exhausted(max_overflow, checked_out, exhausted):
+    engine = create_engine(f"sqlite:///{TEST_DIR}/pool.db", pool_size=1, max_overflow=max_overflow, pool_timeout=0.1)
+    connections = [engine.connect() for _ in range(checked_out)]
+    try:
+        assert health.pool_exhausted(pool_stats(engine, None)) is exhausted
+    finally:
+        for connection in connections:
+            connection.close()
+        engine.dispose()
+
+
+def test_health_is_ok(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+def test_exhausted_pool_is_degraded_not_dead(client, monkeypatch):
+    monkeypatch.setattr(health, "pool_stats", lambda: dict(EXHAUSTED))
+    monkeypatch.setattr(cache_warmer, "state", "done")
+
+    live = client.get("/health")
+    ready = client.get("/ready")
+
+    assert live.status_code == 200
+    assert live.json()["status"] == "degraded"
+    assert live.json()["database"]["degraded"] == "Connection pool exhausted"
+    assert ready.status_code == 503
+    assert ready.json()["status"] == "busy"
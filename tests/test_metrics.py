@@ -0,0 +1,30 @@
+import pytest
+
+from core.config import settings
+
+
+def test_metrics_are_open_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "Basic scrape-secret", "scrape-secret"])
+def test_metrics_token_is_required_when_set(client, monkeypatch, authorization):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+
+    response = client.get("/metrics", headers={"Authorization": authorization} if authorization else {})
+
+    assert response.status_code == 401
+    assert response.json()["message"] == "Invalid metrics token"
+
+
+def test_metrics_with_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+
+    assert response.status_code == 200
@@ -0,0 +1,44 @@
+from datetime import date
+
+import pytest
+
+from app import models
+
+
+ITEMS_PER_ORDER = 3
+
+
+@pytest.fixture
+def order_history(db, make_user, make_product):
+    merchant, _ = make_user("merchant@example.com", role="merchant")
+    buyer, headers = make_user("buyer@example.com")
+
+    product_ids = [make_product(merchant.user_id, name=f"Product {index}") for index in range(ITEMS_PER_ORDER * 2)]
+    for product_id in product_ids:
+        db.add(models.ProductImages(product_id=product_id, image_url=f"/img/{product_id}.png", rank=0))
+
+    for index in range(20):
+        order = models.Order(user_id=buyer.user_id, total_amount=30)
+        order.order_items = [
+            models.OrderItem(product_id=product_id, quantity=1, unit_price=10, total_price=10)
+            for product_id in product_ids[index % 2::2][:ITEMS_PER_ORDER]
+        ]
+        order.shipping = models.Shipping(carrier="DHL", shipping_status="pending", estimated_delivery_date=date.today())
+        db.add(order)
+    db.commit()
+    return headers
+
+
+def test_order_history_query_count_does_not_grow_with_page_size(client, order_history, count_queries):
+    counts = {}
+    for limit in (1, 5, 20):
+        with count_queries() as queries:
+            response = client.get("/orders/", params={"limit": limit}, headers=order_history)
+        assert response.status_code == 200
+        orders = response.json()["items"]
+        assert len(orders) == limit
+        assert all(len(order["items"]) == ITEMS_PER_ORDER for order in orders)
+        queries.assert_at_most(6)
+        counts[limit] = queries.count
+
+    assert len(set(counts.values())) == 1, counts
@@ -0,0 +1,114 @@
+"""
+Strict test mode for @query_budget: every budgeted route, with its option
+variants, must stay within its budget. QueryStatsMiddleware raises
+QueryBudgetExceeded (listing the statements) when one goes over.
+"""
+from datetime import date
+
+import pytest
+from fastapi.routing import APIRoute
+
+import main
+from app import models
+from core.config import settings
+
+
+# Route path -> requests covering its option variants; {product_id} is filled in
+BUDGETED_REQUESTS = {
+    "/products/": [
+        "/products/",
+        "/products/?category_name=Shoes&brand=acme&min_price=1&max_price=100&sort_by=rating",
+        "/products/?fields=name,price,images,category,currency,rating",
+    ],
+    "/products/mine/": [
+        "/products/mine/",
+        "/products/mine/?include_images=true",
+        "/products/mine/?status=published&in_stock=true&sort_by=price&order=asc&limit=1",
+    ],
+    "/products/batch/": [
+        "/products/batch/?ids={product_id},{other_product_id},999999",
+    ],
+    "/products/{product_id}/product/view/": [
+        "/products/{product_id}/product/view/",
+        "/products/{product_id}/product/view/?fields=name,price",
+        "/products/{product_id}/product/view/?fields=name,category,currency,images",
+    ],
+    "/products/edit/{product_id}/product/": [
+        "/products/edit/{product_id}/product/",
+    ],
+    "/products/{product_id}/reviews/": [
+        "/products/{product_id}/reviews/",
+        "/products/{product_id}/reviews/?rating=5&limit=1",
+    ],
+    "/wishlist/": [
+        "/wishlist/",
+        "/wishlist/?limit=1",
+    ],
+    "/orders/": [
+        "/orders/",
+        "/orders/?limit=1",
+    ],
+}
+
+
+@pytest.fixture
+def catalog(db, make_user, make_product):
+    merchant, merchant_headers = make_user("merchant@example.com", role="merchant")
+    buyer, buyer_headers = make_user("buyer@example.com")
+    reviewer, _ = make_user("reviewer@example.com")
+
+    category = models.Category(name="Shoes")
+    db.add_all([category, models.Currency(code="USD", name="US Dollar", symbol="$")])
+    db.commit()
+
+    product_ids = [
+        make_product(merchant.user_id, name=f"Shoe {index}", brand="acme", category_id=category.category_id, currency_code="USD")
+        for index in range(3)
+    ]
+    for product_id in product_ids:
+        db.add_all([
+            models.ProductImages(product_id=product_id, image_url=f"/img/{product_id}-{rank}.png", rank=rank)
+            for rank in range(2)
+        ])
+        db.add(models.Wishlist(user_id=buyer.user_id, product_id=product_id))
+    db.add_all([
+        models.Review(user_id=buyer.user_id, product_id=product_ids[0], rating=5, comment="Great"),
+        models.Review(user_id=reviewer.user_id, product_id=product_ids[0], rating=5, comment="Good"),
+    ])
+    for _ in range(2):
+        order = models.Order(user_id=buyer.user_id, total_amount=20)
+        order.order_items = [
+            models.OrderItem(product_id=product_id, quantity=1, unit_price=10, total_price=10)
+            for product_id in product_ids[:2]
+        ]
+        order.shipping = models.Shipping(carrier="DHL", shipping_status="pending", estimated_delivery_date=date.today())
+        db.add(order)
+    db.commit()
+
+    return {
+        "product_id": product_ids[0],
+        "other_product_id": product_ids[1],
+        "headers": {"merchant": merchant_headers, "buyer": buyer_headers},
+    }
+
+
+def budgeted_route_paths():
+    return {
+        route.path for route in main.app.routes
+        if isinstance(route, APIRoute) and hasattr(route.endpoint, "__query_budget__")
+    }
+
+
+def test_every_budgeted_route_is_covered():
+    assert budgeted_route_paths() == set(BUDGETED_REQUESTS)
+
+
+@pytest.mark.parametrize("route_path", sorted(BUDGETED_REQUESTS))
+def test_route_stays_within_its_query_budget(route_path, client, catalog, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", True)
+    headers = catalog["headers"]["merchant" if route_path.startswith(("/products/mine", "/products/edit")) else "buyer"]
+
+    for template in BUDGETED_REQUESTS[route_path]:
+        url = template.format(**catalog)
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, (url, response.text)
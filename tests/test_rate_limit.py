@@ -0,0 +1,17 @@
+import pytest
+
+from core.rate_limit import DEFAULT_POLICIES, Limit, parse_policy_overrides
+
+
+def test_policy_overrides_replace_and_disable_buckets():
+    overridden = parse_policy_overrides("catalog.ip=300/60, forgot_password.account=0/1", DEFAULT_POLICIES)
+    policies = {policy.name: policy for policy in overridden}
+
+    assert policies["catalog"].per_ip == Limit(300, 60)
+    assert policies["forgot_password"].per_account is None
+
+
+@pytest.mark.parametrize("entry", ["catalog.ip=5/0", "catalog.ip=5/-10", "catalog.ip=5", "unknown.ip=5/60", "catalog.ip=five/60"])
+def test_invalid_policy_overrides_are_rejected(entry):
+    with pytest.raises(ValueError, match="Invalid RATE_LIMIT_POLICIES entry"):
+        parse_policy_overrides(entry, DEFAULT_POLICIES)
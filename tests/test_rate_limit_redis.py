@@ -0,0 +1,117 @@
+"""RedisBuckets and TOKEN_BUCKET_SCRIPT against fakeredis (with its Lua runtime)."""
+import asyncio
+import re
+
+import pytest
+
+pytest.importorskip("lupa")  # fakeredis runs scripts only with the [lua] extra
+fakeredis = pytest.importorskip("fakeredis")
+import redis.asyncio  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from core.rate_limit import Limit, RateLimitMiddleware, RateLimitPolicy, RedisBuckets, TOKEN_BUCKET_SCRIPT  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def make_buckets(server, monkeypatch):
+    """Each call is a separate client on the same server, like one per worker."""
+    monkeypatch.setattr(redis.asyncio.Redis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    return lambda: RedisBuckets("redis://fake")
+
+
+def test_script_returns_fractional_wait_as_a_string(server):
+    async def run():
+        client = fakeredis.FakeAsyncRedis(server=server)
+        script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        # burst 1, 1.5 tokens per second: the second take waits 2/3 of a second
+        first = await script(keys=["bucket"], args=[1, 1.5, 1])
+        second = await script(keys=["bucket"], args=[1, 1.5, 1])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert isinstance(second, bytes)
+    assert float(first) == 0
+    assert 0.5 < float(second) <= 2 / 3
+
+
+def test_take_spends_then_refills(make_buckets):
+    buckets = make_buckets()
+    limit = Limit(2, 0.4)  # 5 tokens per second
+
+    async def run():
+        waits = [await buckets.take("login:ip:1.2.3.4", limit) for _ in range(3)]
+        await asyncio.sleep(0.25)
+        waits.append(await buckets.take("login:ip:1.2.3.4", limit))
+        return waits
+
+    waits = asyncio.run(run())
+    assert waits[:2] == [0, 0]
+    assert 0 < waits[2] <= 0.2
+    assert waits[3] == 0
+
+
+def test_concurrent_takes_cannot_both_spend_the_last_token(make_buckets):
+    workers = [make_buckets() for _ in range(2)]
+    limit = Limit(1, 60)
+
+    async def run():
+        return await asyncio.gather(*(buckets.take("login:account:abc", limit) for buckets in workers))
+
+    waits = asyncio.run(run())
+    assert sorted(wait == 0 for wait in waits) == [False, True]
+
+
+def test_allows_requests_when_redis_is_down(server, make_buckets):
+    buckets = make_buckets()
+    server.connected = False
+
+    assert asyncio.run(buckets.take("login:ip:1.2.3.4", Limit(1, 60))) == 0
+    assert asyncio.run(buckets.take("login:ip:1.2.3.4", Limit(1, 60))) == 0
+
+
+def login_app(buckets, per_ip: Limit, per_account: Limit) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/auth/login/")
+    async def login():
+        return {"ok": True}
+
+    policy = RateLimitPolicy(
+        "login", frozenset({"POST"}), re.compile(r"^/auth/login/?$"),
+        per_ip=per_ip, per_account=per_account, account_field="username",
+    )
+    app.add_middleware(RateLimitMiddleware, policies=[policy], buckets=buckets)
+    return TestClient(app)
+
+
+def test_middleware_rejects_on_the_ip_bucket(make_buckets):
+    client = login_app(make_buckets(), per_ip=Limit(2, 60), per_account=Limit(10, 60))
+
+    statuses = [
+        client.post("/auth/login/", data={"username": f"user{index}@example.com", "password": "x"}).status_code
+        for index in range(2)
+    ]
+    response = client.post("/auth/login/", data={"username": "other@example.com", "password": "x"})
+
+    assert statuses == [200, 200]
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+
+
+def test_middleware_rejects_on_the_account_bucket(make_buckets):
+    client = login_app(make_buckets(), per_ip=Limit(100, 60), per_account=Limit(1, 300))
+
+    first = client.post("/auth/login/", data={"username": "victim@example.com", "password": "x"})
+    second = client.post("/auth/login/", data={"username": "Victim@Example.com ", "password": "y"})
+    other = client.post("/auth/login/", data={"username": "someone@example.com", "password": "x"})
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert 290 <= int(second.headers["Retry-After"]) <= 300
+    assert other.status_code == 200
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.services.refresh_tokens import issue_refresh_token, rotate_refresh_token
+from core.auth import create_refresh_token
+
+
+@pytest.fixture
+def user(db, make_user):
+    user, _ = make_user("buyer@example.com")
+    return db.get(models.User, user.user_id)
+
+
+def test_rotation_issues_the_next_token_once(db, user):
+    first = issue_refresh_token(db, user)
+
+    _, second = rotate_refresh_token(db, first)
+    _, third = rotate_refresh_token(db, second)
+
+    assert len({first, second, third}) == 3
+
+
+def test_reused_token_revokes_the_family(db, user):
+    first = issue_refresh_token(db, user)
+    _, second = rotate_refresh_token(db, first)
+
+    with pytest.raises(HTTPException) as reuse:
+        rotate_refresh_token(db, first)
+    assert reuse.value.status_code == 401
+
+    # The legitimate holder's token went with the family
+    with pytest.raises(HTTPException):
+        rotate_refresh_token(db, second)
+    assert db.query(models.RefreshToken).filter(models.RefreshToken.revoked_at.is_(None)).count() == 0
+
+
+def test_inactive_user_is_refused_without_consuming_the_token(db, user):
+    token = issue_refresh_token(db, user)
+    user.is_active = False
+    db.commit()
+
+    with pytest.raises(HTTPException):
+        rotate_refresh_token(db, token)
+
+    user.is_active = True
+    db.commit()
+    _, next_token = rotate_refresh_token(db, token)
+    assert next_token != token
+
+
+def test_unknown_token_is_refused(db, user):
+    forged = create_refresh_token({
+        "sub": user.email, "uid": user.user_id, "jti": "0" * 32, "fam": "f" * 32,
+        "exp": datetime.utcnow() + timedelta(days=1),
+    })
+    with pytest.raises(HTTPException) as refused:
+        rotate_refresh_token(db, forged)
+    assert refused.value.status_code == 401
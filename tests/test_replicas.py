@@ -0,0 +1,117 @@
+"""
+Read routing with a replica: a second SQLite file stands in for it, holding
+copies of the rows under different names so each response shows where it
+was read from.
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app import models
+from app.services import product_cache
+from core.database import Base, Replica, ReplicaStickinessMiddleware, engine, replicas
+from tests.conftest import TEST_DIR
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    replica = Replica(f"sqlite:///{TEST_DIR}/replica.db")
+    Base.metadata.drop_all(replica.engine)
+    Base.metadata.create_all(replica.engine)
+    monkeypatch.setattr(replicas, "replicas", [replica])
+    yield replica
+    replica.engine.dispose()
+
+
+@pytest.fixture
+def product_id(db, replica, make_user, make_product):
+    merchant, _ = make_user("merchant@example.com", role="merchant")
+    product_id = make_product(merchant.user_id, name="Primary copy")
+    copy_rows(replica, models.User, models.Product)
+    set_replica_name(replica, product_id, "Replica copy")
+    return product_id
+
+
+def copy_rows(replica, *model_classes):
+    with engine.connect() as source, replica.engine.begin() as target:
+        for model in model_classes:
+            rows = [dict(row._mapping) for row in source.execute(model.__table__.select())]
+            target.execute(model.__table__.insert(), rows)
+
+
+def set_replica_name(replica, product_id: int, name: str):
+    with replica.engine.begin() as connection:
+        connection.execute(
+            models.Product.__table__.update().where(models.Product.product_id == product_id).values(name=name)
+        )
+
+
+def product_name(client, product_id: int) -> str:
+    response = client.get(f"/products/{product_id}/product/view/")
+    assert response.status_code == 200
+    return response.json()["name"]
+
+
+def test_reads_go_to_a_healthy_replica(client, product_id):
+    assert product_name(client, product_id) == "Replica copy"
+
+
+def test_reads_fail_over_to_the_primary(client, replica, product_id):
+    replica.healthy = False
+    assert product_name(client, product_id) == "Primary copy"
+
+
+def test_failed_health_check_takes_the_replica_out_of_rotation(client, replica, product_id, monkeypatch):
+    broken = Replica(f"sqlite:///{TEST_DIR}/missing/replica.db")
+    monkeypatch.setattr(replicas, "replicas", [broken])
+
+    broken.check()
+
+    assert broken.healthy is False
+    assert replicas.pick() is None
+    assert product_name(client, product_id) == "Primary copy"
+
+
+def test_write_keeps_the_client_on_the_primary(replica, product_id, make_user):
+    _, headers = make_user("buyer@example.com")
+    client = TestClient(main.app, headers=headers)
+
+    response = client.post(f"/wishlist/{product_id}/")
+
+    assert response.status_code == 200
+    until = int(client.cookies[ReplicaStickinessMiddleware.cookie_name])
+    assert time.time() < until <= time.time() + 10
+    assert product_name(client, product_id) == "Primary copy"
+    # Another client has no cookie and still reads the replica
+    assert product_name(TestClient(main.app), product_id) == "Replica copy"
+
+
+def test_expired_cookie_reads_the_replica(client, product_id):
+    client.cookies.set(ReplicaStickinessMiddleware.cookie_name, str(int(time.time()) - 1))
+    assert product_name(client, product_id) == "Replica copy"
+
+
+@pytest.fixture
+def product_detail_cache(monkeypatch):
+    monkeypatch.setattr(product_cache.product_detail_cache, "ttl", 60)
+    monkeypatch.setattr(product_cache.product_detail_cache, "maxsize", 100)
+    product_cache.product_detail_cache.clear()
+    yield product_cache.product_detail_cache
+    product_cache.product_detail_cache.clear()
+
+
+def test_replica_reads_fill_the_cache(client, replica, product_id, product_detail_cache):
+    assert product_name(client, product_id) == "Replica copy"
+    set_replica_name(replica, product_id, "Changed on the replica")
+    assert product_name(client, product_id) == "Replica copy"
+
+
+def test_replica_reads_do_not_refill_the_cache_right_after_a_write(client, replica, product_id, product_detail_cache):
+    # The primary has the new name, the replica has not replayed it yet
+    product_cache.invalidate_product(product_id)
+    assert product_name(client, product_id) == "Replica copy"
+
+    set_replica_name(replica, product_id, "Primary copy")
+    assert product_name(client, product_id) == "Primary copy"
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, update
+
+from app import models
+
+
+@pytest.fixture
+def product_id(make_user, make_product):
+    merchant, _ = make_user("merchant@example.com", role="merchant")
+    return make_product(merchant.user_id)
+
+
+def test_second_review_of_a_product_is_rejected(client, db, make_user, product_id):
+    _, headers = make_user("buyer@example.com")
+
+    assert client.post(f"/products/{product_id}/reviews/", json={"rating": 4}, headers=headers).status_code == 200
+    response = client.post(f"/products/{product_id}/reviews/", json={"rating": 1}, headers=headers)
+
+    assert response.status_code == 400
+    product = db.get(models.Product, product_id)
+    assert (product.rating_count, product.rating_sum) == (1, 4)
+
+
+def test_concurrent_duplicate_review_is_a_400(client, db, make_user, product_id):
+    buyer, headers = make_user("buyer@example.com")
+
+    # Another request inserts the same review between the existence check and our insert
+    def insert_competing_review(mapper, connection, target):
+        connection.execute(models.Review.__table__.insert().values(
+            product_id=target.product_id, user_id=target.user_id, rating=5,
+        ))
+
+    event.listen(models.Review, "before_insert", insert_competing_review)
+    try:
+        response = client.post(f"/products/{product_id}/reviews/", json={"rating": 4}, headers=headers)
+    finally:
+        event.remove(models.Review, "before_insert", insert_competing_review)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "You have already reviewed this product"
+    assert db.query(models.Review).filter(models.Review.user_id == buyer.user_id).count() == 0
+
+
+def test_reviews_leave_the_product_updated_at_alone(client, db, make_user, product_id):
+    _, headers = make_user("buyer@example.com")
+    edited_at = datetime(2026, 1, 2, 3, 4, 5)
+    db.execute(update(models.Product).where(models.Product.product_id == product_id).values(updated_at=edited_at))
+    db.commit()
+
+    assert client.post(f"/products/{product_id}/reviews/", json={"rating": 4}, headers=headers).status_code == 200
+
+    db.expire_all()
+    product = db.get(models.Product, product_id)
+    assert product.rating_count == 1
+    assert product.updated_at == edited_at
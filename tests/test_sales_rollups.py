@@ -0,0 +1,167 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.services.sales_rollups import backfill_sales_rollups
+
+
+ORDER_TIME = datetime(2026, 3, 14, 12, 0)
+ORDER_DAY = ORDER_TIME.date()
+
+
+@pytest.fixture
+def seller(make_user):
+    return make_user("merchant@example.com", role="merchant")
+
+
+@pytest.fixture
+def buyer(make_user):
+    user, _ = make_user("buyer@example.com")
+    return user
+
+
+@pytest.fixture
+def place_order(db, seller, buyer, make_product):
+    merchant, _ = seller
+    product_ids = [make_product(merchant.user_id, name=f"Product {index}") for index in range(2)]
+
+    def place(quantities=(2,), payment_status="pending"):
+        order = models.Order(
+            user_id=buyer.user_id, total_amount=0, order_payment_status=payment_status, created_at=ORDER_TIME,
+        )
+        order.order_items = [
+            models.OrderItem(product_id=product_id, quantity=quantity, unit_price=5, total_price=5 * quantity)
+            for product_id, quantity in zip(product_ids, quantities)
+        ]
+        db.add(order)
+        db.commit()
+        return order
+    place.product_ids = product_ids
+    return place
+
+
+def seller_sales(db, seller_id):
+    row = db.execute(
+        select(models.SellerDailySales.units, models.SellerDailySales.revenue, models.SellerDailySales.order_count)
+        .filter_by(seller_id=seller_id, day=ORDER_DAY)
+    ).first()
+    return tuple(row) if row else (0, Decimal("0"), 0)
+
+
+def product_sales(db, product_id):
+    row = db.execute(
+        select(models.ProductDailySales.units, models.ProductDailySales.revenue, models.ProductDailySales.order_count)
+        .filter_by(product_id=product_id, day=ORDER_DAY)
+    ).first()
+    return tuple(row) if row else (0, Decimal("0"), 0)
+
+
+def test_paying_then_cancelling_a_committed_order(db, seller, place_order):
+    merchant, _ = seller
+    order = place_order()
+    assert seller_sales(db, merchant.user_id) == (0, Decimal("0"), 0)
+
+    # Each commit expires the order, so these are plain assignments on committed rows
+    order.order_payment_status = "completed"
+    db.commit()
+    assert seller_sales(db, merchant.user_id) == (2, Decimal("10.00"), 1)
+
+    order.order_status = "cancelled"
+    db.commit()
+    assert seller_sales(db, merchant.user_id) == (0, Decimal("0.00"), 0)
+
+
+def test_status_changes_within_sales_leave_the_rollups_alone(db, seller, place_order):
+    merchant, _ = seller
+    order = place_order(payment_status="completed")
+
+    order.order_status = "shipped"
+    db.commit()
+    order.order_status = "delivered"
+    db.commit()
+
+    assert seller_sales(db, merchant.user_id) == (2, Decimal("10.00"), 1)
+
+
+def test_editing_the_items_of_a_counted_order(db, seller, place_order):
+    merchant, _ = seller
+    order = place_order(quantities=(2, 1), payment_status="completed")
+    first_id, second_id = place_order.product_ids
+    assert seller_sales(db, merchant.user_id) == (3, Decimal("15.00"), 1)
+
+    first, second = sorted(order.order_items, key=lambda item: item.product_id)
+    first.quantity, first.total_price = 4, 20
+    db.commit()
+    assert seller_sales(db, merchant.user_id) == (5, Decimal("25.00"), 1)
+    assert product_sales(db, first_id) == (4, Decimal("20.00"), 1)
+
+    order.order_items.remove(second)
+    db.commit()
+    assert seller_sales(db, merchant.user_id) == (4, Decimal("20.00"), 1)
+    assert product_sales(db, second_id) == (0, Decimal("0.00"), 0)
+
+    order.order_items.append(models.OrderItem(product_id=second_id, quantity=3, unit_price=5, total_price=15))
+    db.commit()
+    assert seller_sales(db, merchant.user_id) == (7, Decimal("35.00"), 1)
+    assert product_sales(db, second_id) == (3, Decimal("15.00"), 1)
+
+
+def test_deleting_a_counted_order(db, seller, place_order):
+    merchant, _ = seller
+    order = place_order(payment_status="completed")
+
+    db.delete(order)
+    db.commit()
+
+    assert seller_sales(db, merchant.user_id) == (0, Decimal("0.00"), 0)
+
+
+def test_rollups_match_a_backfill(db, seller, place_order):
+    merchant, _ = seller
+    kept = place_order(quantities=(1, 2), payment_status="completed")
+    cancelled = place_order(quantities=(3,), payment_status="completed")
+    place_order(quantities=(4,))
+
+    kept.order_items[0].quantity, kept.order_items[0].total_price = 5, 25
+    cancelled.order_status = "cancelled"
+    db.commit()
+    maintained = seller_sales(db, merchant.user_id)
+
+    backfill_sales_rollups(db)
+    assert seller_sales(db, merchant.user_id) == maintained
+
+
+def test_merchant_dashboard_reads_the_rollups(client, db, seller, place_order):
+    merchant, headers = seller
+    place_order(quantities=(2, 1), payment_status="completed")
+    place_order(quantities=(1,), payment_status="completed")
+    order = place_order(quantities=(5,), payment_status="completed")
+    order.order_status = "returned"
+    db.commit()
+
+    response = client.get(
+        "/merchant/dashboard/sales/",
+        params={"start": ORDER_DAY.isoformat(), "end": ORDER_DAY.isoformat()},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["totals"] == {"revenue": 20.0, "units": 4, "orders": 2}
+    assert body["series"]["orders"] == [2]
+    first_id, second_id = place_order.product_ids
+    assert [(product["product_id"], product["units"], product["orders"]) for product in body["top_products"]] == [
+        (first_id, 3, 2),
+        (second_id, 1, 1),
+    ]
+
+
+def test_merchant_dashboard_is_for_merchants_only(client, make_user):
+    _, headers = make_user("shopper@example.com")
+
+    response = client.get("/merchant/dashboard/sales/", headers=headers)
+
+    assert response.status_code == 403
@@ -0,0 +1,53 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from core.database import Base
+from tests.conftest import TEST_DIR
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_standalone_worker_runs_the_registered_jobs():
+    path = os.path.join(TEST_DIR, "worker.db")
+    url = f"sqlite:///{path}"
+    worker_engine = create_engine(url)
+    Base.metadata.create_all(worker_engine)
+
+    env = dict(os.environ, DATABASE_URL=url, SCHEDULER_POLL_SECONDS="0.1", METRICS_ENABLED="false")
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "app.services.scheduler_worker"],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        banner = worker.stdout.readline()
+        assert "periodic job(s)" in banner, banner + worker.stdout.read()
+        assert "running 0 periodic" not in banner
+
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            with worker_engine.connect() as connection:
+                pending = connection.execute(
+                    text("SELECT COUNT(*) FROM scheduled_jobs WHERE run_count = 0")
+                ).scalar()
+                total = connection.execute(text("SELECT COUNT(*) FROM scheduled_jobs")).scalar()
+            if total and not pending:
+                break
+            time.sleep(0.1)
+        assert total and not pending, "periodic jobs never ran"
+    finally:
+        worker.send_signal(signal.SIGTERM)
+        output, _ = worker.communicate(timeout=30)
+
+    assert worker.returncode == 0, output
+    with worker_engine.connect() as connection:
+        failed = connection.execute(
+            text("SELECT name, last_error FROM scheduled_jobs WHERE last_status != 'ok'")
+        ).all()
+    assert failed == []
+    worker_engine.dispose()
@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.routes.wishlist import wishlist_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_wishlist_cache():
+    # User IDs repeat across tests because the database is recreated each time
+    wishlist_cache.clear()
+    yield
+    wishlist_cache.clear()
+
+
+@pytest.fixture
+def product_ids(make_user, make_product):
+    merchant, _ = make_user("merchant@example.com", role="merchant")
+    return [make_product(merchant.user_id, name=f"Product {index}") for index in range(3)]
+
+
+def test_add_list_and_remove(client, make_user, product_ids):
+    _, headers = make_user("buyer@example.com")
+    for product_id in product_ids:
+        assert client.post(f"/wishlist/{product_id}/", headers=headers).status_code == 200
+
+    response = client.get("/wishlist/", params={"limit": 2}, headers=headers)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [item["product_id"] for item in first_page["items"]] == product_ids[:0:-1]
+
+    response = client.get("/wishlist/", params={"cursor": first_page["next_cursor"]}, headers=headers)
+    assert [item["product_id"] for item in response.json()["items"]] == product_ids[:1]
+    assert response.json()["next_cursor"] is None
+
+    assert client.delete(f"/wishlist/{product_ids[1]}/", headers=headers).status_code == 200
+    assert client.delete(f"/wishlist/{product_ids[1]}/", headers=headers).status_code == 404
+
+    response = client.get("/wishlist/", headers=headers)
+    assert [item["product_id"] for item in response.json()["items"]] == [product_ids[2], product_ids[0]]
+
+
+def test_adding_twice_keeps_one_row(client, db, make_user, product_ids):
+    buyer, headers = make_user("buyer@example.com")
+
+    assert client.post(f"/wishlist/{product_ids[0]}/", headers=headers).status_code == 200
+    # The second insert hits uq_wishlist_user_product and is treated as already added
+    assert client.post(f"/wishlist/{product_ids[0]}/", headers=headers).status_code == 200
+
+    rows = db.execute(select(models.Wishlist).filter_by(user_id=buyer.user_id)).scalars().all()
+    assert [row.product_id for row in rows] == [product_ids[0]]
+
+
+def test_unpublished_products_cannot_be_added(client, make_user, make_product):
+    merchant, _ = make_user("merchant@example.com", role="merchant")
+    _, headers = make_user("buyer@example.com")
+    draft_id = make_product(merchant.user_id, status="draft")
+
+    assert client.post(f"/wishlist/{draft_id}/", headers=headers).status_code == 404
+
+
+@pytest.mark.parametrize("cache_ttl", [0, 60])
+def test_bulk_contains(client, make_user, product_ids, monkeypatch, cache_ttl):
+    monkeypatch.setattr(wishlist_cache, "ttl", cache_ttl)
+    _, headers = make_user("buyer@example.com")
+    client.post(f"/wishlist/{product_ids[0]}/", headers=headers)
+
+    def contains():
+        response = client.post("/wishlist/contains/", json={"product_ids": product_ids + [999]}, headers=headers)
+        assert response.status_code == 200
+        return response.json()["contains"]
+
+    assert contains() == {str(product_ids[0]): True, str(product_ids[1]): False, str(product_ids[2]): False, "999": False}
+
+    # Adding and removing invalidate the cached set
+    client.post(f"/wishlist/{product_ids[2]}/", headers=headers)
+    client.delete(f"/wishlist/{product_ids[0]}/", headers=headers)
+    assert contains() == {str(product_ids[0]): False, str(product_ids[1]): False, str(product_ids[2]): True, "999": False}
+
+
+def test_bulk_contains_limits_the_batch(client, make_user):
+    _, headers = make_user("buyer@example.com")
+
+    assert client.post("/wishlist/contains/", json={"product_ids": []}, headers=headers).status_code == 422
+    assert client.post("/wishlist/contains/", json={"product_ids": list(range(101))}, headers=headers).status_code == 422